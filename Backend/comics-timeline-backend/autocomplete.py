@@ -0,0 +1,112 @@
+import bisect
+import heapq
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from data_version import data_version_watcher
+
+# Prefixes up to this length get their top matches precomputed, since their ranges are the largest
+CACHED_PREFIX_LENGTH = 3
+
+# Most results a query can ask for (and the size of each precomputed list)
+MAX_RESULTS = 25
+
+class Suggestion(NamedTuple):
+    text: str
+    kind: str  # "series" or "book"
+    id: int
+    popularity: int
+
+def normalize_title(text: str) -> str:
+    """Casefold, strip accents and collapse punctuation so "Détective: Comics" matches "detective comics" """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.findall(r"\w+", stripped))
+
+class AutocompleteIndex:
+    """Sorted array of normalized title keys, searched with binary search
+
+    Every word position of a title is a key ("the invisible luthor", "invisible luthor",
+    "luthor"), so a query matches titles containing a word that starts with it. Keys in
+    a prefix's range are contiguous, and short prefixes have their top matches cached.
+    """
+
+    def __init__(self, suggestions: List[Suggestion], data_version: int = 0):
+        self.suggestions = suggestions
+        self.data_version = data_version
+
+        pairs: List[Tuple[str, int]] = []
+        for index, suggestion in enumerate(suggestions):
+            words = normalize_title(suggestion.text).split()
+            for start in range(len(words)):
+                pairs.append((" ".join(words[start:]), index))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.owners = [index for _, index in pairs]
+
+        # Prefix -> indexes of its best suggestions, for every short prefix of every key
+        buckets: Dict[str, set] = {}
+        for key, index in pairs:
+            for length in range(1, min(CACHED_PREFIX_LENGTH, len(key)) + 1):
+                buckets.setdefault(key[:length], set()).add(index)
+        self.prefix_cache = {prefix: self._top(indexes, MAX_RESULTS) for prefix, indexes in buckets.items()}
+
+    def _top(self, indexes, limit: int) -> List[int]:
+        """Best suggestions by popularity, then shortest and alphabetical title"""
+        return heapq.nsmallest(
+            limit, indexes,
+            key=lambda index: (-self.suggestions[index].popularity, len(self.suggestions[index].text),
+                               self.suggestions[index].text),
+        )
+
+    def search(self, query: str, limit: int = 10) -> List[Suggestion]:
+        """Top suggestions whose title has a word starting with query"""
+        prefix = normalize_title(query)
+        if not prefix:
+            return []
+
+        cached = self.prefix_cache.get(prefix) if len(prefix) <= CACHED_PREFIX_LENGTH else None
+        if cached is not None:
+            return [self.suggestions[index] for index in cached[:limit]]
+
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo=start)
+        matches = set(self.owners[start:end])
+        return [self.suggestions[index] for index in self._top(matches, limit)]
+
+def load_suggestions(db: sqlite3.Connection) -> List[Suggestion]:
+    """Series ranked by how many book links reprint them, books by how many issues they collect"""
+    series_rows = db.execute('''
+        SELECT s.id, s.title, s.start_year, COUNT(bi.issue_id)
+        FROM comic_series s
+        LEFT JOIN comic_issues i ON i.series_id = s.id
+        LEFT JOIN book_issues bi ON bi.issue_id = i.id
+        GROUP BY s.id
+    ''').fetchall()
+    book_rows = db.execute("SELECT id, title, COALESCE(issue_count, 0) FROM books").fetchall()
+
+    suggestions = [
+        Suggestion(f"{title} ({start_year})" if start_year else title, "series", series_id, links)
+        for series_id, title, start_year, links in series_rows
+    ]
+    suggestions.extend(Suggestion(title, "book", book_id, issue_count) for book_id, title, issue_count in book_rows)
+    return suggestions
+
+_index: Optional[AutocompleteIndex] = None
+_lock = threading.Lock()
+
+def get_autocomplete_index(db: sqlite3.Connection) -> AutocompleteIndex:
+    """Current index, rebuilt when the data version has moved since it was built"""
+    global _index
+
+    data_version = data_version_watcher.current(db)
+    if _index is not None and _index.data_version == data_version:
+        return _index
+
+    with _lock:
+        if _index is None or _index.data_version != data_version:
+            _index = AutocompleteIndex(load_suggestions(db), data_version)
+        return _index
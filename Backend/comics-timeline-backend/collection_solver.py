@@ -0,0 +1,124 @@
+import heapq
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+# Above this many candidate books the exact search is not attempted
+EXACT_MAX_BOOKS = 24
+
+# Candidate books the exact search may examine, over all its branches, before settling
+# for the best cover found so far (a fraction of a second)
+EXACT_MAX_STEPS = 1_000_000
+
+class CandidateBook(NamedTuple):
+    book_id: int
+    title: str
+    bitset: int  # Issues in the book, one bit per comic_issues.dense_id
+    cost: float
+
+def greedy_cover(target: int, candidates: Sequence[CandidateBook]) -> List[int]:
+    """Weighted greedy set cover, returning indexes into candidates
+
+    Picks the book with the lowest cost per newly covered issue each round. Heap
+    entries are only re-scored when they reach the top: coverage never grows, so a
+    re-scored entry that is still no worse than the next one is the true best.
+    """
+    heap = []
+    for index, book in enumerate(candidates):
+        gain = (book.bitset & target).bit_count()
+        if gain:
+            heap.append((book.cost / gain, -gain, index))
+    heapq.heapify(heap)
+
+    uncovered = target
+    chosen = []
+    while uncovered and heap:
+        ratio, _, index = heapq.heappop(heap)
+        book = candidates[index]
+        gain = (book.bitset & uncovered).bit_count()
+        if not gain:
+            continue
+
+        current = (book.cost / gain, -gain, index)
+        if heap and current > heap[0]:
+            heapq.heappush(heap, current)
+            continue
+
+        chosen.append(index)
+        uncovered &= ~book.bitset
+
+    return chosen
+
+def exact_cover(target: int, candidates: Sequence[CandidateBook], upper_bound: Optional[List[int]] = None,
+                max_steps: int = EXACT_MAX_STEPS) -> Tuple[List[int], bool]:
+    """Minimum-cost cover by branch and bound, for small candidate sets
+
+    Branches on the lowest uncovered issue over the books that contain it, pruning
+    any branch that already costs at least as much as the best cover found. The
+    search loops over an explicit stack, so deep covers can't hit the recursion
+    limit, and gives up after examining max_steps books. Returns (best cover found,
+    whether the search finished and so proved it minimal).
+    """
+    best = list(upper_bound) if upper_bound is not None else greedy_cover(target, candidates)
+    best_cost = sum(candidates[index].cost for index in best)
+    order = sorted(range(len(candidates)), key=lambda index: candidates[index].cost)
+
+    # One frame per chosen book: (issues still uncovered, cost so far, position in order to resume at)
+    stack = [(target, 0.0, 0)]
+    chosen: List[int] = []
+    steps = 0
+    while stack:
+        uncovered, cost, position = stack[-1]
+        lowest = uncovered & -uncovered
+        descend = None
+        while position < len(order):
+            index = order[position]
+            position += 1
+            steps += 1
+            if steps > max_steps:
+                return best, False
+            book = candidates[index]
+            if not book.bitset & lowest:
+                continue
+            if cost + book.cost >= best_cost:
+                break  # Books are in cost order, so every later one costs at least as much
+            remaining = uncovered & ~book.bitset
+            if not remaining:
+                best, best_cost = chosen + [index], cost + book.cost
+                continue
+            descend = (index, remaining, cost + book.cost)
+            break
+
+        if descend is None:
+            stack.pop()
+            if chosen:
+                chosen.pop()
+            continue
+        index, remaining, next_cost = descend
+        stack[-1] = (uncovered, cost, position)
+        chosen.append(index)
+        stack.append((remaining, next_cost, 0))
+
+    return best, True
+
+def solve_reading_list(target: int, candidates: Sequence[CandidateBook],
+                       exact: Optional[bool] = None) -> Tuple[List[int], int, bool]:
+    """Cover as much of target as the candidates allow
+
+    Returns (chosen candidate indexes, bitset of issues no candidate contains, whether the
+    cover is proven minimal). The exact search only runs on small inputs; exact=False
+    skips it, but nothing forces it on large ones.
+    """
+    relevant = [index for index, book in enumerate(candidates) if book.bitset & target]
+    coverable = 0
+    for index in relevant:
+        coverable |= candidates[index].bitset
+    uncoverable = target & ~coverable
+    target &= coverable
+
+    subset = [candidates[index] for index in relevant]
+    use_exact = len(subset) <= EXACT_MAX_BOOKS and exact is not False
+
+    chosen = greedy_cover(target, subset)
+    if use_exact:
+        chosen, use_exact = exact_cover(target, subset, upper_bound=chosen)
+
+    return [relevant[index] for index in chosen], uncoverable, use_exact
@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import database_scripts  # puts the Database scripts on sys.path
+from migrate_json_data import get_data_version
+
+# How often a request re-reads the data version to see whether cached data is stale
+VERSION_CHECK_SECONDS = 2.0
+
+class DataVersionWatcher:
+    """Throttled reader of timeline_meta.data_version, shared by every in-process cache
+
+    The stamp is bumped by each migration that changes timeline data, so a cache built
+    at one version stays valid until current() returns a different one.
+    """
+
+    def __init__(self, check_seconds: float = VERSION_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def peek(self) -> Optional[int]:
+        """The last version read, if it was read recently enough to trust without a query"""
+        if self._version is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return self._version
+        return None
+
+    def current(self, db: sqlite3.Connection) -> int:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_seconds:
+            return self._version
+
+        with self._lock:
+            self._version = get_data_version(db.cursor())
+            self._checked_at = now
+            return self._version
+
+data_version_watcher = DataVersionWatcher()
@@ -0,0 +1,49 @@
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from database_scripts import DATABASE_DIR
+from timeline_db import ConnectionPool
+from metrics import TimedConnection
+
+# Timeline database lives in the centralized Database directory, unless TIMELINE_DATABASE_PATH
+# points somewhere else (e.g. a seeded copy for load tests)
+DATABASE_PATH = Path(os.getenv("TIMELINE_DATABASE_PATH", DATABASE_DIR / "comics_timeline.db"))
+
+# Tuned, pooled read-only connections shared by all routers
+timeline_pool = ConnectionPool(DATABASE_PATH, read_only=True, row_factory=sqlite3.Row, factory=TimedConnection)
+
+# Writable connections for the few endpoints that change data (accounts), kept separate
+# so read handlers can never write by accident
+write_pool = ConnectionPool(DATABASE_PATH, row_factory=sqlite3.Row, max_idle=2, factory=TimedConnection)
+
+# Dependency to get a timeline DB connection
+def get_db():
+    with timeline_pool.connection() as conn:
+        yield conn
+
+# Dependency to get a writable DB connection; handlers commit their own short transactions
+def get_write_db():
+    with write_pool.connection() as conn:
+        yield conn
+
+# Most IDs or keys a batch endpoint resolves in one request
+MAX_BATCH_SIZE = 500
+
+def fetch_in_request_order(db: sqlite3.Connection, select_sql: str, values: Sequence[Any]) -> List[Optional[Dict[str, Any]]]:
+    """Look up many rows in one query, returning them in the order of values (None when missing)
+
+    The values are sent as a single JSON array and joined through json_each, so there is
+    no bound-variable limit and no temp table (the pooled connections are read-only).
+    select_sql is a SELECT requested.key AS position, ... FROM json_each(?) AS requested
+    LEFT JOIN ... ON ... = requested.value.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(values)
+    for row in db.execute(select_sql, (json.dumps(list(values)),)):
+        row = dict(row)
+        position = row.pop("position")
+        if row.get("id") is not None:
+            results[position] = row
+    return results
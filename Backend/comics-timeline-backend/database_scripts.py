@@ -0,0 +1,10 @@
+import sys
+from pathlib import Path
+
+# The centralized Database directory, home of the timeline database and the scripts that build it
+DATABASE_DIR = Path(__file__).parent.parent.parent / "Database"
+
+# Make the Database scripts importable so issue strings are parsed exactly like the migration does.
+# Every module importing one of those scripts imports this first, so import order doesn't matter.
+if str(DATABASE_DIR) not in sys.path:
+    sys.path.insert(0, str(DATABASE_DIR))
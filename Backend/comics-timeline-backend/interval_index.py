@@ -0,0 +1,122 @@
+import bisect
+from typing import Generic, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Intervals are stored in months (year * 12 + month - 1) so issue dates keep their month
+OPEN_END = 10_000 * 12  # End of an era that has not ended yet
+
+def year_start(year: int) -> int:
+    return year * 12
+
+def year_end(year: int) -> int:
+    return year * 12 + 11
+
+def month_point(year: int, month: Optional[int] = None) -> int:
+    return year * 12 + (month or 1) - 1
+
+def parse_year_month(date: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(year, month) of a YYYY-MM-DD date, or None for anything not in that form"""
+    if not isinstance(date, str) or len(date) < 7 or date[4] != "-" or not (date[:4].isdigit() and date[5:7].isdigit()):
+        return None
+    year, month = int(date[:4]), int(date[5:7])
+    return (year, month) if 1 <= month <= 12 else None
+
+def year_span(start_year: int, end_year: Optional[int]) -> Tuple[int, int]:
+    """Whole-year interval in months; an open end_year runs to OPEN_END"""
+    return year_start(start_year), OPEN_END if end_year is None else year_end(end_year)
+
+class Interval(NamedTuple):
+    start: int
+    end: int  # Inclusive
+    item: object
+
+class _Node:
+    """Intervals containing center, sorted by start ascending and end descending"""
+    __slots__ = ("center", "by_start", "starts", "by_end", "neg_ends", "left", "right")
+
+    def __init__(self, center: int, intervals: List[Interval]):
+        self.center = center
+        self.by_start = sorted(intervals, key=lambda interval: interval.start)
+        self.starts = [interval.start for interval in self.by_start]
+        self.by_end = sorted(intervals, key=lambda interval: -interval.end)
+        self.neg_ends = [-interval.end for interval in self.by_end]
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+
+class IntervalIndex(Generic[T]):
+    """Static centered interval tree
+
+    Each node holds the intervals containing its center (the median endpoint of
+    what is left), so every node holds at least one interval and the tree is
+    O(log n) deep. Overlap and stabbing queries report k intervals in O(log n + k):
+    at a node the query either takes a sorted prefix of its intervals and goes
+    one way, or takes all of them and goes both ways.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, T]]):
+        items = [Interval(start, end, item) for start, end, item in intervals if start <= end]
+        self.size = len(items)
+        self.root = self._build(items)
+
+    @staticmethod
+    def _build(items: List[Interval]) -> Optional[_Node]:
+        root: Optional[_Node] = None
+        # (parent, is_left, intervals) so deep trees don't hit the recursion limit
+        pending = [(None, False, items)]
+        while pending:
+            parent, is_left, intervals = pending.pop()
+            if not intervals:
+                continue
+            endpoints = sorted(endpoint for interval in intervals for endpoint in (interval.start, interval.end))
+            center = endpoints[len(endpoints) // 2]
+
+            here, left, right = [], [], []
+            for interval in intervals:
+                if interval.end < center:
+                    left.append(interval)
+                elif interval.start > center:
+                    right.append(interval)
+                else:
+                    here.append(interval)
+
+            node = _Node(center, here)
+            if parent is None:
+                root = node
+            elif is_left:
+                parent.left = node
+            else:
+                parent.right = node
+            pending.append((node, True, left))
+            pending.append((node, False, right))
+        return root
+
+    def overlapping(self, start: int, end: int) -> List[T]:
+        """Items whose interval shares at least one point with [start, end]"""
+        return [interval.item for interval in self._overlapping(start, end)]
+
+    def containing(self, point: int) -> List[T]:
+        """Items whose interval contains point (a stabbing query)"""
+        return self.overlapping(point, point)
+
+    def within(self, start: int, end: int) -> List[T]:
+        """Items whose interval lies entirely inside [start, end]"""
+        return [interval.item for interval in self._overlapping(start, end)
+                if interval.start >= start and interval.end <= end]
+
+    def _overlapping(self, start: int, end: int) -> Iterator[Interval]:
+        pending = [self.root] if self.root is not None else []
+        while pending:
+            node = pending.pop()
+            if end < node.center:
+                # Everything here ends at/after center > end, so only starts matter
+                yield from node.by_start[:bisect.bisect_right(node.starts, end)]
+                children = (node.left,)
+            elif start > node.center:
+                # Everything here starts at/before center < start, so only ends matter
+                yield from node.by_end[:bisect.bisect_right(node.neg_ends, -start)]
+                children = (node.right,)
+            else:
+                yield from node.by_start
+                children = (node.left, node.right)
+            pending.extend(child for child in children if child is not None)
@@ -1,6 +1,19 @@
+import os
+import sqlite3
+
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import accounts, books, timeline
+from routers import accounts, books, issues, progress, timeline
+from database import timeline_pool, write_pool
+from autocomplete import get_autocomplete_index
+from response_cache import ResponseCacheMiddleware, response_cache_stats
+from metrics import QUERY_METRICS, CacheStatsCollector
+import shared_modules  # puts Backend/shared on sys.path
+from request_metrics import MetricsMiddleware, metrics_response
+from profiling import PROFILE_DIR, authorize_with_proxy
+from sampling_profiler import ProfilingMiddleware, start_continuous_profiler
+from prometheus_client import REGISTRY
 
 # Create FastAPI application
 app = FastAPI(
@@ -9,6 +22,14 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Serve repeated reads from a cache invalidated by the data version. Added before CORS so
+# CORS stays the outer layer and adds its headers to cached responses too
+app.add_middleware(ResponseCacheMiddleware)
+
+# Admins (as the OAuth proxy sees them) can profile a single request with the X-Profile
+# header or ?profile= flag. Outside the cache, which passes flagged requests through
+app.add_middleware(ProfilingMiddleware, authorize=authorize_with_proxy, directory=PROFILE_DIR)
+
 # Add CORS middleware for frontend integration
 app.add_middleware(
     CORSMiddleware,
@@ -18,9 +39,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latencies include cache hits and CORS, and the response size is what was sent
+app.add_middleware(MetricsMiddleware, routes=app.routes, queries=QUERY_METRICS)
+REGISTRY.register(CacheStatsCollector(response_cache_stats))
+
+# Handlers are plain functions run in AnyIO's worker threads, so sqlite3 calls never block
+# the event loop; this many can be in flight at once
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+@app.on_event("startup")
+async def size_threadpool():
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+# Background profiling to disk, if CONTINUOUS_PROFILE_HZ is set
+@app.on_event("startup")
+def start_profiling():
+    app.state.continuous_profiler = start_continuous_profiler(PROFILE_DIR)
+
+# Build the autocomplete index before the first keystroke arrives. A missing or not yet set up
+# database mustn't stop the app starting; autocomplete answers 503 until the index can be built
+@app.on_event("startup")
+def build_autocomplete_index():
+    try:
+        with timeline_pool.connection() as conn:
+            get_autocomplete_index(conn)
+    except sqlite3.OperationalError as e:
+        print(f"⚠️  Autocomplete index not built at startup: {e}")
+
+# Close pooled timeline DB connections on shutdown
+@app.on_event("shutdown")
+def close_timeline_pool():
+    timeline_pool.close_all()
+    write_pool.close_all()
+
+@app.on_event("shutdown")
+def stop_profiling():
+    if app.state.continuous_profiler is not None:
+        app.state.continuous_profiler.stop()
+
 # Include routers
 app.include_router(accounts.router)
 app.include_router(books.router)
+app.include_router(issues.router)
+app.include_router(progress.router)
 app.include_router(timeline.router)
 
 # Root endpoint
@@ -37,6 +98,16 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "dc-comics-api"}
 
+# Response cache counters
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache_stats.as_dict()
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
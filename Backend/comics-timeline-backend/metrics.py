@@ -0,0 +1,61 @@
+import sqlite3
+import time
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+import shared_modules  # puts Backend/shared on sys.path
+from request_metrics import QueryMetrics
+
+# Query metrics keep the sqlite_ names this service has always exported
+QUERY_METRICS = QueryMetrics("sqlite", "sqlite3", "sqlite3 execute calls (up to the first row)")
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records how long each execute takes"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            QUERY_METRICS.record(time.perf_counter() - start)
+
+    def executemany(self, sql, parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            QUERY_METRICS.record(time.perf_counter() - start)
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind its execute shortcuts, are TimedCursors"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+class CacheStatsCollector:
+    """Exposes a response cache's CacheStats counters and hit ratio at scrape time"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def collect(self):
+        stats = self.stats.as_dict()
+        hits = CounterMetricFamily("response_cache_hits", "Responses served from the cache", labels=["tier"])
+        hits.add_metric(["memory"], stats["hits"])
+        hits.add_metric(["disk"], stats["disk_hits"])
+        yield hits
+        for name, documentation in (
+            ("misses", "Cacheable requests passed through to the app"),
+            ("stores", "Responses stored"),
+            ("evictions", "Entries evicted from the memory tier to stay within its size"),
+            ("invalidations", "Times the cache was dropped for a new data version"),
+        ):
+            yield CounterMetricFamily(f"response_cache_{name}", documentation, value=stats[name])
+        yield GaugeMetricFamily("response_cache_hit_ratio", "Hits over cacheable lookups since startup",
+                                value=stats["hit_ratio"])
@@ -0,0 +1,30 @@
+import base64
+import json
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+# Largest integer SQLite can bind; bigger ones raise OverflowError
+SQLITE_MAX_INT = 2 ** 63 - 1
+
+def is_sort_value(value: Any) -> bool:
+    """Whether a cursor value can be bound as a SQL parameter (no nested lists or objects)"""
+    if isinstance(value, int):
+        return -SQLITE_MAX_INT - 1 <= value <= SQLITE_MAX_INT
+    return value is None or isinstance(value, (str, float))
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque page cursor holding the sort key of the last row returned"""
+    return base64.urlsafe_b64encode(json.dumps(list(values), separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str], length: int) -> Optional[List[Any]]:
+    """Sort key from a cursor made by encode_cursor, or 400 if it was tampered with"""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != length or not all(map(is_sort_value, values)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
@@ -0,0 +1,35 @@
+import json
+import os
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Optional, Tuple
+
+from anyio.to_thread import run_sync
+
+import shared_modules  # puts Backend/shared on sys.path
+from sampling_profiler import profile_dir
+
+# Where this service's profiles are written; continuous ones go in its continuous/ subdirectory
+PROFILE_DIR = profile_dir(Path(__file__).parent)
+
+# The OAuth proxy decides who is an admin; profiling flags are checked against its verify-token
+OAUTH_PROXY_URL = os.getenv("OAUTH_PROXY_URL", "http://localhost:8001")
+
+def proxy_admin_error(token: Optional[str]) -> Optional[Tuple[int, str]]:
+    """Ask the OAuth proxy whether a bearer token belongs to an admin"""
+    if token is None:
+        return 403, "Not authenticated"
+    request = urllib.request.Request(f"{OAUTH_PROXY_URL}/auth/verify-token",
+                                     headers={"Authorization": f"Bearer {token}"})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            user = json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, "Not enough permissions" if error.code == 403 else "Could not validate credentials"
+    except (OSError, ValueError):
+        return 503, "OAuth proxy unavailable"
+    return None if user.get("is_admin") else (403, "Not enough permissions")
+
+async def authorize_with_proxy(token: Optional[str]) -> Optional[Tuple[int, str]]:
+    return await run_sync(proxy_admin_error, token)
@@ -0,0 +1,176 @@
+import heapq
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from data_version import data_version_watcher
+from interval_index import parse_year_month
+from timeline_repository import publisher_matches
+
+# Dated items with no month sort before the months of their year
+UNKNOWN_MONTH = 0
+
+# Items with no date at all go after everything dated
+UNDATED_YEAR = 9999
+
+# Books before the issues they start with, when both land on the same month
+KIND_RANK = {"book": 0, "issue": 1}
+
+class ReadingItem(NamedTuple):
+    sort_key: Tuple
+    kind: str  # "book" or "issue"
+    id: int
+    title: str
+    era_id: int
+    publisher: str
+    year: Optional[int]
+    month: Optional[int]
+    estimated: bool  # Date inferred from the series start year and issue number
+
+    def to_dict(self, position: int) -> Dict[str, Any]:
+        return {
+            "position": position, "kind": self.kind, "id": self.id, "title": self.title,
+            "era_id": self.era_id, "publisher": self.publisher,
+            "year": self.year, "month": self.month, "estimated": self.estimated,
+        }
+
+def issue_number_value(issue_number: str) -> Optional[float]:
+    """Numeric value of "27" or "1.5"; None for "Annual 1" and the like"""
+    return float(issue_number) if re.fullmatch(r"\d+(\.\d+)?", issue_number) else None
+
+def estimate_issue_month(number: Optional[float], start_year: Optional[int],
+                         anchor: Optional[Tuple[float, int]] = None) -> Optional[Tuple[int, int]]:
+    """Publication (year, month) of an undated issue, assuming the series is monthly
+
+    Counts months from anchor, the (issue number, year * 12 + month - 1) of a dated
+    issue of the same series, or else from January of the series' start year.
+    """
+    if number is None:
+        return None
+    if anchor is not None:
+        months = anchor[1] + int(number) - int(anchor[0])
+    elif start_year is not None:
+        months = start_year * 12 + max(int(number) - 1, 0)
+    else:
+        return None
+    return months // 12, months % 12 + 1
+
+def make_sort_key(year: Optional[int], month: Optional[int], era_order: int, kind: str, title: str,
+                  number: Optional[float], item_id: int) -> Tuple:
+    """Chronological key with deterministic tie-breaks: era, books first, title, issue number, id"""
+    return (
+        year if year is not None else UNDATED_YEAR,
+        month if month is not None else UNKNOWN_MONTH,
+        era_order,
+        KIND_RANK[kind],
+        title.casefold(),
+        number if number is not None else float("inf"),
+        item_id,
+    )
+
+class ReadingOrder:
+    """Global chronological order of books and issues at one data version
+
+    Each era's books and issues are sorted on their own (an issue belongs to the
+    first era, in display order, with a book collecting it), and the eras are then
+    k-way merged. Merges for a publisher reuse the same per-era lists.
+    """
+
+    def __init__(self, db: sqlite3.Connection, data_version: int):
+        self.data_version = data_version
+        era_rows = db.execute('''
+            SELECT e.id, p.name AS publisher
+            FROM eras e
+            JOIN publishers p ON p.id = e.publisher_id
+            ORDER BY p.id, e.display_order, e.id
+        ''').fetchall()
+        era_order = {row["id"]: order for order, row in enumerate(era_rows)}
+        era_publisher = {row["id"]: row["publisher"] for row in era_rows}
+        per_era: Dict[int, List[ReadingItem]] = {era_id: [] for era_id in era_order}
+
+        for row in db.execute('''
+            SELECT id, era_id, title, earliest_publish_year, earliest_publish_month
+            FROM books
+        '''):
+            year, month = row["earliest_publish_year"], row["earliest_publish_month"]
+            per_era[row["era_id"]].append(ReadingItem(
+                make_sort_key(year, month, era_order[row["era_id"]], "book", row["title"], None, row["id"]),
+                "book", row["id"], row["title"], row["era_id"], era_publisher[row["era_id"]], year, month, False,
+            ))
+
+        # Each series' lowest-numbered dated issue, which undated issues are counted from
+        anchors: Dict[int, Tuple[float, int]] = {}
+        for row in db.execute("SELECT series_id, issue_number, publication_date FROM comic_issues "
+                              "WHERE publication_date IS NOT NULL"):
+            number = issue_number_value(row["issue_number"])
+            published = parse_year_month(row["publication_date"])
+            if published is not None and number is not None and (
+                    row["series_id"] not in anchors or number < anchors[row["series_id"]][0]):
+                anchors[row["series_id"]] = (number, published[0] * 12 + published[1] - 1)
+
+        seen_issues = set()
+        for row in sorted(db.execute('''
+            SELECT i.id, i.series_id, i.issue_number, i.publication_date, s.title AS series, s.start_year, b.era_id
+            FROM book_issues bi
+            JOIN books b ON b.id = bi.book_id
+            JOIN comic_issues i ON i.id = bi.issue_id
+            JOIN comic_series s ON s.id = i.series_id
+        '''), key=lambda row: (era_order[row["era_id"]], row["id"])):
+            if row["id"] in seen_issues:
+                continue
+            seen_issues.add(row["id"])
+
+            number = issue_number_value(row["issue_number"])
+            published = parse_year_month(row["publication_date"])
+            estimated = published is None  # Undated, or a date not in YYYY-MM-DD form
+            if not estimated:
+                year, month = published
+            else:
+                year, month = estimate_issue_month(number, row["start_year"], anchors.get(row["series_id"])) \
+                    or (row["start_year"], None)
+            title = f"{row['series']} ({row['start_year']}) #{row['issue_number']}" if row["start_year"] \
+                else f"{row['series']} #{row['issue_number']}"
+            per_era[row["era_id"]].append(ReadingItem(
+                make_sort_key(year, month, era_order[row["era_id"]], "issue", row["series"], number, row["id"]),
+                "issue", row["id"], title, row["era_id"], era_publisher[row["era_id"]], year, month, estimated,
+            ))
+
+        for items in per_era.values():
+            items.sort()
+        self.per_era = per_era
+        self.era_publisher = era_publisher
+        self._merged: Dict[Tuple, List[ReadingItem]] = {}
+        self._lock = threading.Lock()
+
+    def items(self, publisher: Optional[str] = None, kind: Optional[str] = None) -> List[ReadingItem]:
+        """Merged order for a publisher (all by default), optionally books or issues only"""
+        key = (publisher.casefold() if publisher else None, kind)
+        merged = self._merged.get(key)
+        if merged is None:
+            with self._lock:
+                merged = self._merged.get(key)
+                if merged is None:
+                    lists = [
+                        items for era_id, items in self.per_era.items()
+                        if publisher_matches(self.era_publisher[era_id], publisher)
+                    ]
+                    merged = [item for item in heapq.merge(*lists) if kind is None or item.kind == kind]
+                    self._merged[key] = merged
+        return merged
+
+_order: Optional[ReadingOrder] = None
+_lock = threading.Lock()
+
+def get_reading_order(db: sqlite3.Connection) -> ReadingOrder:
+    """Current reading order, rebuilt when the data version has moved"""
+    global _order
+
+    data_version = data_version_watcher.current(db)
+    if _order is not None and _order.data_version == data_version:
+        return _order
+
+    with _lock:
+        if _order is None or _order.data_version != data_version:
+            _order = ReadingOrder(db, data_version)
+        return _order
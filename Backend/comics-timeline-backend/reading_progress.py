@@ -0,0 +1,169 @@
+import re
+import sqlite3
+import struct
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import database_scripts  # puts the Database scripts on sys.path
+from book_overlaps import blob_to_bitset
+from data_version import data_version_watcher
+
+# Roaring-style layout: the bitset is cut into chunks of 2^16 dense IDs, and each
+# non-empty chunk is stored in whichever container is smallest for it
+CHUNK_BITS = 1 << 16
+CHUNK_BYTES = CHUNK_BITS // 8
+ARRAY_CONTAINER, BITMAP_CONTAINER, RUN_CONTAINER = 0, 1, 2
+
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<BI")  # format version, container count
+CONTAINER_HEADER = struct.Struct("<HBH")  # chunk key, container type, entries (values or runs) - 1
+
+def compress_bitset(bitset: int) -> bytes:
+    """Encode an issue bitset as roaring-style containers
+
+    A chunk becomes a sorted uint16 array, a run list of (start, length - 1)
+    pairs or a raw 8 KB bitmap, whichever is smallest, so sparse and mostly
+    contiguous read histories both stay a few bytes per issue or less.
+    """
+    raw = bitset.to_bytes((bitset.bit_length() + 7) // 8, "little")
+    containers = []
+    for key in range((len(raw) + CHUNK_BYTES - 1) // CHUNK_BYTES):
+        chunk = raw[key * CHUNK_BYTES:(key + 1) * CHUNK_BYTES]  # The last chunk may be short
+        if chunk == bytes(len(chunk)):
+            continue
+
+        # Bits of the chunk as a string, lowest dense ID first, so runs and positions come from C-speed scans
+        bits = format(int.from_bytes(chunk, "little"), f"0{8 * len(chunk)}b")[::-1]
+        runs = [(match.start(), match.end() - match.start()) for match in re.finditer("1+", bits)]
+        cardinality = sum(length for _, length in runs)
+
+        sizes = {ARRAY_CONTAINER: 2 * cardinality, RUN_CONTAINER: 4 * len(runs), BITMAP_CONTAINER: CHUNK_BYTES}
+        container = min(sizes, key=sizes.get)
+        if container == ARRAY_CONTAINER:
+            values = [start + offset for start, length in runs for offset in range(length)]
+            payload = struct.pack(f"<{len(values)}H", *values)
+            entries = len(values)
+        elif container == RUN_CONTAINER:
+            payload = struct.pack(f"<{2 * len(runs)}H", *(value for start, length in runs for value in (start, length - 1)))
+            entries = len(runs)
+        else:
+            payload = chunk.ljust(CHUNK_BYTES, b"\0")
+            entries = 1
+        containers.append(CONTAINER_HEADER.pack(key, container, entries - 1) + payload)
+
+    return HEADER.pack(FORMAT_VERSION, len(containers)) + b"".join(containers)
+
+def decompress_bitset(blob: Optional[bytes]) -> int:
+    """Decode a bitset written by compress_bitset (an empty set for None)"""
+    if not blob:
+        return 0
+    version, container_count = HEADER.unpack_from(blob)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unknown progress bitmap format {version}")
+
+    bitset = 0
+    offset = HEADER.size
+    for _ in range(container_count):
+        key, container, entries = CONTAINER_HEADER.unpack_from(blob, offset)
+        offset += CONTAINER_HEADER.size
+        entries += 1
+        if container == ARRAY_CONTAINER:
+            chunk = bytearray(CHUNK_BYTES)
+            for value in struct.unpack_from(f"<{entries}H", blob, offset):
+                chunk[value >> 3] |= 1 << (value & 7)
+            bits = int.from_bytes(chunk, "little")
+            offset += 2 * entries
+        elif container == RUN_CONTAINER:
+            values = struct.unpack_from(f"<{2 * entries}H", blob, offset)
+            bits = 0
+            for start, length in zip(values[::2], values[1::2]):
+                bits |= ((1 << (length + 1)) - 1) << start
+            offset += 4 * entries
+        else:
+            bits = int.from_bytes(blob[offset:offset + CHUNK_BYTES], "little")
+            offset += CHUNK_BYTES
+        bitset |= bits << (key * CHUNK_BITS)
+    return bitset
+
+class EraIssueSet(NamedTuple):
+    era_id: int
+    title: str
+    publisher: str
+    bitset: int
+    issue_count: int
+
+class EraIssueSets:
+    """Every era's issues as one bitset (the union of its books' bitsets), at one data version"""
+
+    def __init__(self, db: sqlite3.Connection, data_version: int):
+        self.data_version = data_version
+        bitsets: Dict[int, int] = {}
+        for era_id, blob, base_dense_id in db.execute('''
+            SELECT b.era_id, s.bitset, s.base_dense_id
+            FROM book_issue_bitsets s
+            JOIN books b ON b.id = s.book_id
+        '''):
+            bitsets[era_id] = bitsets.get(era_id, 0) | blob_to_bitset(blob, base_dense_id)
+
+        self.eras: List[EraIssueSet] = [
+            EraIssueSet(era_id, title, publisher, bitsets.get(era_id, 0), bitsets.get(era_id, 0).bit_count())
+            for era_id, title, publisher in db.execute('''
+                SELECT e.id, e.title, p.name
+                FROM eras e
+                JOIN publishers p ON p.id = e.publisher_id
+                ORDER BY p.id, e.display_order, e.id
+            ''')
+        ]
+
+    def completion(self, lists: Dict[str, int]) -> List[Dict[str, object]]:
+        """Per-era issue counts and percentages for each named bitset (e.g. read, owned)"""
+        results = []
+        for era in self.eras:
+            result: Dict[str, object] = {
+                "era_id": era.era_id, "title": era.title, "publisher": era.publisher, "issue_count": era.issue_count,
+            }
+            for name, bitset in lists.items():
+                count = (bitset & era.bitset).bit_count()
+                result[f"{name}_count"] = count
+                result[f"{name}_percent"] = round(100 * count / era.issue_count, 1) if era.issue_count else 0.0
+            results.append(result)
+        return results
+
+_era_sets: Optional[EraIssueSets] = None
+_lock = threading.Lock()
+
+def get_era_issue_sets(db: sqlite3.Connection) -> EraIssueSets:
+    """Current era issue sets, rebuilt when the data version has moved"""
+    global _era_sets
+
+    data_version = data_version_watcher.current(db)
+    if _era_sets is not None and _era_sets.data_version == data_version:
+        return _era_sets
+
+    with _lock:
+        if _era_sets is None or _era_sets.data_version != data_version:
+            _era_sets = EraIssueSets(db, data_version)
+        return _era_sets
+
+def load_progress(db: sqlite3.Connection, account_id: int) -> Dict[str, int]:
+    """An account's stored lists as bitsets, keyed by list name"""
+    return {
+        list_name: decompress_bitset(bitmap)
+        for list_name, bitmap in db.execute(
+            "SELECT list, bitmap FROM reading_progress WHERE account_id = ?", (account_id,)
+        )
+    }
+
+def save_progress(db: sqlite3.Connection, account_id: int, list_name: str, bitset: int) -> Tuple[int, int]:
+    """Store one list's bitset, returning (issue count, compressed size)"""
+    bitmap = compress_bitset(bitset)
+    issue_count = bitset.bit_count()
+    db.execute('''
+        INSERT INTO reading_progress (account_id, list, issue_count, bitmap, updated_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (account_id, list) DO UPDATE SET
+            issue_count = excluded.issue_count,
+            bitmap = excluded.bitmap,
+            updated_at = excluded.updated_at
+    ''', (account_id, list_name, issue_count, bitmap))
+    return issue_count, len(bitmap)
@@ -0,0 +1,293 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from anyio.to_thread import run_sync
+
+from data_version import data_version_watcher
+import database_scripts  # puts the Database scripts on sys.path
+from database import timeline_pool
+import shared_modules  # puts Backend/shared on sys.path
+from sampling_profiler import profile_mode
+from timeline_db import ConnectionPool
+
+# In-process tier size, by total body bytes
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Larger responses are passed through without being cached
+RESPONSE_CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024
+
+# Optional SQLite file shared by every worker process; unset keeps the cache in-process only
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH")
+
+# Read endpoints whose responses only change when the data version does
+CACHED_PATH_PREFIXES = ("/timeline/", "/books/")
+
+# Never cached: streamed exports and anything per-account
+UNCACHED_PATH_PREFIXES = ("/books/export",)
+
+# Response headers replayed on a hit
+REPLAYED_HEADERS = {b"content-type", b"content-encoding", b"etag", b"cache-control", b"vary"}
+
+class CachedEntry(NamedTuple):
+    data_version: int
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+class CacheStats:
+    """Hit/miss counters, read by /cache/stats and the metrics endpoint"""
+
+    def __init__(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+            "stores": self.stores, "evictions": self.evictions, "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+class MemoryTier:
+    """LRU of cached responses, bounded by total body bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: "OrderedDict[str, CachedEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedEntry]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedEntry) -> int:
+        """Store an entry, returning how many old ones were evicted to make room"""
+        evicted = 0
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self.entries[key] = entry
+            self.size += len(entry.body)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, oldest = self.entries.popitem(last=False)
+                self.size -= len(oldest.body)
+                evicted += 1
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+
+class DiskTier:
+    """Cached responses in a SQLite file, so worker processes share one another's work
+
+    Connections come from a pool rather than one per worker thread, so idle handles
+    stay bounded and close() releases them all (and the WAL) at shutdown.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.pool = ConnectionPool(path)
+        with self.pool.connection() as conn, conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    data_version INTEGER NOT NULL,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL
+                )
+            ''')
+
+    def get(self, key: str, data_version: int) -> Optional[CachedEntry]:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT status, headers, body FROM response_cache WHERE key = ? AND data_version = ?",
+                (key, data_version),
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, body = row
+        return CachedEntry(data_version, status, [(name.encode("latin-1"), value.encode("latin-1"))
+                                                  for name, value in json.loads(headers)], body)
+
+    def put(self, key: str, entry: CachedEntry):
+        headers = json.dumps([(name.decode("latin-1"), value.decode("latin-1")) for name, value in entry.headers])
+        # The sqlite3 connection doubles as a commit-on-exit context manager
+        with self.pool.connection() as conn, conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO response_cache (key, data_version, status, headers, body)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (key, entry.data_version, entry.status, headers, entry.body))
+
+    def drop_other_versions(self, data_version: int):
+        with self.pool.connection() as conn, conn:
+            conn.execute("DELETE FROM response_cache WHERE data_version != ?", (data_version,))
+
+    def close(self):
+        self.pool.close_all()
+
+def cache_key(scope) -> str:
+    """Path, query string with parameters sorted, and the Accept-Encoding the body was negotiated for"""
+    query = urlencode(sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)))
+    accept_encoding = ""
+    for name, value in scope["headers"]:
+        if name == b"accept-encoding":
+            accept_encoding = ",".join(part.strip() for part in value.decode("latin-1").lower().split(","))
+    return f"{scope['path']}?{query}#{accept_encoding}"
+
+def if_none_match(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"if-none-match":
+            return value.decode("latin-1")
+    return None
+
+def current_data_version() -> int:
+    version = data_version_watcher.peek()
+    if version is None:
+        with timeline_pool.connection() as conn:
+            version = data_version_watcher.current(conn)
+    return version
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving repeated GETs of read endpoints from a cache
+
+    Entries are tagged with the data version they were built at, and a version bump
+    (a migration or price update) drops every older entry. Only complete 200
+    responses under CACHED_PATH_PREFIXES are stored. A hit whose ETag the client
+    already has is answered with 304, like the routes themselves would.
+    """
+
+    def __init__(self, app, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, disk_path: Optional[str] = RESPONSE_CACHE_PATH):
+        self.app = app
+        self.memory = MemoryTier(max_bytes)
+        self.disk = DiskTier(Path(disk_path)) if disk_path else None
+        self.stats = response_cache_stats
+        self.data_version: Optional[int] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan" and self.disk is not None:
+            await self.app(scope, receive, self.close_disk_on_shutdown(send))
+            return
+        if (scope["type"] != "http" or scope["method"] != "GET" or not self.is_cacheable_path(scope["path"])
+                or profile_mode(scope) is not None):  # A profile of a cache hit says nothing
+            await self.app(scope, receive, send)
+            return
+
+        data_version = data_version_watcher.peek()
+        if data_version is None:
+            try:
+                data_version = await run_sync(current_data_version)
+            except sqlite3.OperationalError:
+                # Database missing or not set up yet: nothing can be cached, the route answers for itself
+                await self.app(scope, receive, send)
+                return
+        if data_version != self.data_version:
+            await self.invalidate(data_version)
+
+        key = cache_key(scope)
+        entry = self.memory.get(key)
+        if entry is not None and entry.data_version == data_version:
+            self.stats.hits += 1
+            await self.replay(scope, entry, send)
+            return
+        if self.disk is not None:
+            entry = await run_sync(self.disk.get, key, data_version)
+            if entry is not None:
+                self.stats.disk_hits += 1
+                self.stats.evictions += self.memory.put(key, entry)
+                await self.replay(scope, entry, send)
+                return
+        self.stats.misses += 1
+
+        start: Dict = {}
+        chunks: List[bytes] = []
+        size = 0
+        cacheable = True
+
+        async def capture(message):
+            nonlocal size, cacheable
+            if message["type"] == "http.response.start":
+                start.update(message)
+                headers = dict(message.get("headers", []))
+                cacheable = message["status"] == 200 and b"set-cookie" not in headers \
+                    and b"no-store" not in headers.get(b"cache-control", b"")
+            elif message["type"] == "http.response.body" and cacheable:
+                size += len(message.get("body", b""))
+                if size > RESPONSE_CACHE_MAX_ENTRY_BYTES:
+                    cacheable = False
+                    chunks.clear()
+                else:
+                    chunks.append(message.get("body", b""))
+                if not message.get("more_body", False) and cacheable:
+                    await self.store(key, CachedEntry(
+                        data_version, start["status"],
+                        [(name, value) for name, value in start.get("headers", []) if name in REPLAYED_HEADERS],
+                        b"".join(chunks),
+                    ))
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+    def close_disk_on_shutdown(self, send):
+        """Wrap the lifespan send so the disk tier's connections close once the app has shut down"""
+        async def wrapped(message):
+            if message["type"] == "lifespan.shutdown.complete":
+                self.disk.close()
+            await send(message)
+        return wrapped
+
+    @staticmethod
+    def is_cacheable_path(path: str) -> bool:
+        return path.startswith(CACHED_PATH_PREFIXES) and not path.startswith(UNCACHED_PATH_PREFIXES)
+
+    async def invalidate(self, data_version: int):
+        if self.data_version is not None:
+            self.stats.invalidations += 1
+        self.data_version = data_version
+        self.memory.clear()
+        if self.disk is not None:
+            await run_sync(self.disk.drop_other_versions, data_version)
+
+    async def store(self, key: str, entry: CachedEntry):
+        self.stats.stores += 1
+        self.stats.evictions += self.memory.put(key, entry)
+        if self.disk is not None:
+            await run_sync(self.disk.put, key, entry)
+
+    @staticmethod
+    async def replay(scope, entry: CachedEntry, send):
+        headers = list(entry.headers)
+        etag = dict(headers).get(b"etag")
+        client_tags = if_none_match(scope)
+        if etag is not None and client_tags is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in client_tags.split(",")}
+            if "*" in tags or etag.decode("latin-1") in tags:
+                await send({"type": "http.response.start", "status": 304,
+                            "headers": [(name, value) for name, value in headers if name != b"content-type"]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        headers.append((b"content-length", str(len(entry.body)).encode()))
+        headers.append((b"x-cache", b"HIT"))
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+response_cache_stats = CacheStats()
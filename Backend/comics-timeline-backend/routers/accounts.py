@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+import sqlite3
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Any, Optional
+from database import get_db, get_write_db
 
 router = APIRouter(
     prefix="/accounts",
@@ -7,52 +10,98 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Sample data - replace with actual database operations
-fake_accounts_db = [
-    {"id": 1, "username": "admin", "email": "admin@example.com", "is_active": True},
-    {"id": 2, "username": "user1", "email": "user1@example.com", "is_active": True},
-]
+ACCOUNT_COLUMNS = "id, username, email, is_active, created_at, updated_at"
+
+class AccountCreate(BaseModel):
+    username: str = Field(..., min_length=1, max_length=50)
+    email: Optional[str] = None
+    is_active: bool = True
+
+class AccountUpdate(BaseModel):
+    username: Optional[str] = Field(None, min_length=1, max_length=50)
+    email: Optional[str] = None
+    is_active: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def no_null_required_fields(self):
+        # Leaving a field out keeps its value; only email can be cleared with null
+        nulled = [name for name in ("username", "is_active")
+                  if name in self.model_fields_set and getattr(self, name) is None]
+        if nulled:
+            raise ValueError(f"{', '.join(nulled)} can't be null")
+        return self
+
+def is_username_taken(error: sqlite3.IntegrityError) -> bool:
+    return "UNIQUE constraint failed: accounts.username" in str(error)
+
+def account_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    account = dict(row)
+    account["is_active"] = bool(account["is_active"])
+    return account
 
 @router.get("/")
-async def get_accounts() -> List[Dict[str, Any]]:
-    """Get all accounts"""
-    return fake_accounts_db
+def get_accounts(
+    username: Optional[str] = Query(None, description="Only the account with this username"),
+    after_id: int = Query(0, ge=0, description="Last id of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: sqlite3.Connection = Depends(get_db)
+) -> List[Dict[str, Any]]:
+    """Get accounts in id order, one page at a time"""
+    if username is not None:
+        rows = db.execute(f"SELECT {ACCOUNT_COLUMNS} FROM accounts WHERE username = ?", (username,)).fetchall()
+    else:
+        rows = db.execute(f"SELECT {ACCOUNT_COLUMNS} FROM accounts WHERE id > ? ORDER BY id LIMIT ?",
+                          (after_id, limit)).fetchall()
+    return [account_to_dict(row) for row in rows]
 
 @router.get("/{account_id}")
-async def get_account(account_id: int) -> Dict[str, Any]:
+def get_account(account_id: int, db: sqlite3.Connection = Depends(get_db)) -> Dict[str, Any]:
     """Get a specific account by ID"""
-    for account in fake_accounts_db:
-        if account["id"] == account_id:
-            return account
-    raise HTTPException(status_code=404, detail="Account not found")
+    row = db.execute(f"SELECT {ACCOUNT_COLUMNS} FROM accounts WHERE id = ?", (account_id,)).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return account_to_dict(row)
 
 @router.post("/")
-async def create_account(account: Dict[str, Any]) -> Dict[str, Any]:
+def create_account(account: AccountCreate, db: sqlite3.Connection = Depends(get_write_db)) -> Dict[str, Any]:
     """Create a new account"""
-    # In a real app, you'd validate the input and save to database
-    new_account = {
-        "id": len(fake_accounts_db) + 1,
-        **account,
-        "is_active": True
-    }
-    fake_accounts_db.append(new_account)
-    return new_account
+    try:
+        with db:
+            row = db.execute(f'''
+                INSERT INTO accounts (username, email, is_active) VALUES (?, ?, ?)
+                RETURNING {ACCOUNT_COLUMNS}
+            ''', (account.username, account.email, account.is_active)).fetchone()
+    except sqlite3.IntegrityError as e:
+        if not is_username_taken(e):
+            raise
+        raise HTTPException(status_code=409, detail="Username already taken")
+    return account_to_dict(row)
 
 @router.put("/{account_id}")
-async def update_account(account_id: int, account: Dict[str, Any]) -> Dict[str, Any]:
+def update_account(account_id: int, account: AccountUpdate,
+                   db: sqlite3.Connection = Depends(get_write_db)) -> Dict[str, Any]:
     """Update an existing account"""
-    for i, existing_account in enumerate(fake_accounts_db):
-        if existing_account["id"] == account_id:
-            updated_account = {**existing_account, **account}
-            fake_accounts_db[i] = updated_account
-            return updated_account
-    raise HTTPException(status_code=404, detail="Account not found")
+    changes = account.model_dump(exclude_unset=True)
+    assignments = [f"{column} = ?" for column in changes] + ["updated_at = CURRENT_TIMESTAMP"]
+    try:
+        with db:
+            row = db.execute(f'''
+                UPDATE accounts SET {", ".join(assignments)} WHERE id = ?
+                RETURNING {ACCOUNT_COLUMNS}
+            ''', (*changes.values(), account_id)).fetchone()
+    except sqlite3.IntegrityError as e:
+        if not is_username_taken(e):
+            raise
+        raise HTTPException(status_code=409, detail="Username already taken")
+    if row is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return account_to_dict(row)
 
 @router.delete("/{account_id}")
-async def delete_account(account_id: int) -> Dict[str, str]:
+def delete_account(account_id: int, db: sqlite3.Connection = Depends(get_write_db)) -> Dict[str, str]:
     """Delete an account"""
-    for i, account in enumerate(fake_accounts_db):
-        if account["id"] == account_id:
-            del fake_accounts_db[i]
-            return {"message": "Account deleted successfully"}
-    raise HTTPException(status_code=404, detail="Account not found")
+    with db:
+        row = db.execute("DELETE FROM accounts WHERE id = ? RETURNING id", (account_id,)).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return {"message": "Account deleted successfully"}
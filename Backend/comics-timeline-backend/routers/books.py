@@ -1,5 +1,19 @@
-from fastapi import APIRouter
-from typing import List, Dict, Any
+import sqlite3
+import statistics
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Iterator, Literal, Optional
+import database_scripts  # puts the Database scripts on sys.path
+from database import MAX_BATCH_SIZE, fetch_in_request_order, get_db, timeline_pool
+from pagination import decode_cursor, encode_cursor
+from setup_timeline_database import BOOK_SORT_KEYS
+from timeline_repository import serialize
+from autocomplete import MAX_RESULTS, get_autocomplete_index
+from collection_solver import CandidateBook, solve_reading_list
+from book_overlaps import blob_to_bitset
+from migrate_json_data import canonical_issue_key, parse_issue_string
+from search_index import build_match_query
 
 router = APIRouter(
     prefix="/books",
@@ -7,40 +21,292 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Sample data - TODO replace with actual database operations
-fake_books_db = [
-    {
-        "id": 1,
-        "title": "Action Comics #1",
-        "series": "Action Comics",
-        "issue_number": 1,
-        "year": 1938,
-        "era": "Pre-Crisis",
-        "price": 3000000.00,
-        "condition": "Good"
-    },
-    {
-        "id": 2,
-        "title": "Batman #1",
-        "series": "Batman",
-        "issue_number": 1,
-        "year": 1940,
-        "era": "Pre-Crisis",
-        "price": 567000.00,
-        "condition": "Very Fine"
-    },
-    {
-        "id": 3,
-        "title": "Crisis on Infinite Earths #1",
-        "series": "Crisis on Infinite Earths",
-        "issue_number": 1,
-        "year": 1985,
-        "era": "Post-Crisis",
-        "price": 25.00,
-        "condition": "Near Mint"
-    }
-]
+# Columns returned for each book in listings and exports
+BOOK_COLUMNS = '''
+    id, title, era_id, sub_era_id, book_type, canon_year, issue_count, current_price,
+    earliest_issue_name, earliest_publish_year, earliest_publish_month,
+    latest_issue_name, latest_publish_year, latest_publish_month, prh_url, ist_url
+'''
+
+# Rows fetched per round trip while exporting
+EXPORT_BATCH_SIZE = 500
+
+class BookFilters:
+    """Query-string filters shared by the listing and the export"""
+
+    def __init__(
+        self,
+        era_id: Optional[int] = Query(None, description="Only books from this era"),
+        sub_era_id: Optional[int] = Query(None, description="Only books from this sub-era"),
+        series_id: Optional[int] = Query(None, description="Only books collecting an issue of this series"),
+        start_year: Optional[int] = Query(None, description="Only books with issues published in or after this year"),
+        end_year: Optional[int] = Query(None, description="Only books with issues published in or before this year"),
+        min_price: Optional[float] = Query(None, ge=0, description="Lowest current price"),
+        max_price: Optional[float] = Query(None, ge=0, description="Highest current price"),
+    ):
+        self.conditions: List[str] = []
+        self.params: List[Any] = []
+        if era_id is not None:
+            self.add("era_id = ?", era_id)
+        if sub_era_id is not None:
+            self.add("sub_era_id = ?", sub_era_id)
+        if series_id is not None:
+            self.add('''id IN (SELECT bi.book_id FROM comic_issues i
+                                JOIN book_issues bi ON bi.issue_id = i.id
+                                WHERE i.series_id = ?)''', series_id)
+        if start_year is not None:
+            self.add("COALESCE(latest_publish_year, earliest_publish_year) >= ?", start_year)
+        if end_year is not None:
+            self.add("earliest_publish_year <= ?", end_year)
+        if min_price is not None:
+            self.add("current_price >= ?", min_price)
+        if max_price is not None:
+            self.add("current_price <= ?", max_price)
+
+    def add(self, condition: str, *params: Any):
+        self.conditions.append(condition)
+        self.params.extend(params)
+
+    def where(self, *extra: str) -> str:
+        conditions = self.conditions + list(extra)
+        return "WHERE " + " AND ".join(conditions) if conditions else ""
+
+class BookBatchRequest(BaseModel):
+    ids: List[int] = Field(..., max_length=MAX_BATCH_SIZE, description="Book IDs, in the order results should come back")
+
+class ReadingListRequest(BaseModel):
+    issues: List[str] = Field(..., description='Issues to read, e.g. "Action Comics (1938) #1"')
+    era_id: Optional[int] = Field(None, description="Only consider books from this era")
+    optimize: Literal["count", "price"] = Field("count", description="Minimize number of books or total price")
+    exact: Optional[bool] = Field(None, description="false skips the exact search, which otherwise runs on small inputs only")
 
 @router.get("/")
-async def get_books() -> List[Dict[str, Any]]:
-    return fake_books_db
+def get_books(
+    filters: BookFilters = Depends(),
+    sort: Literal["title", "year", "price", "issue_count"] = Query("title", description="Sort key"),
+    order: Literal["asc", "desc"] = Query("asc", description="Sort direction"),
+    limit: int = Query(50, ge=1, le=200, description="Books per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: sqlite3.Connection = Depends(get_db),
+) -> Dict[str, Any]:
+    """Get books one page at a time, filtered and sorted
+
+    Pages are keyset-paginated on (sort key, id) through the sort key's index, so
+    deep pages cost the same as the first one.
+    """
+    sort_key = BOOK_SORT_KEYS[sort]
+    descending = order == "desc"
+    after = decode_cursor(cursor, 2)
+    extra: List[str] = []
+    after_params: List[Any] = []
+    if after is not None:
+        # The plain bound lets SQLite seek the sort index; the row value breaks ties on id
+        compare = "<" if descending else ">"
+        extra = [f"{sort_key} {compare}= ?", f"({sort_key}, id) {compare} (?, ?)"]
+        after_params = [after[0], *after]
+    direction = "DESC" if descending else "ASC"
+
+    rows = db.execute(f'''
+        SELECT {BOOK_COLUMNS}, {sort_key} AS sort_value
+        FROM books
+        {filters.where(*extra)}
+        ORDER BY {sort_key} {direction}, id {direction}
+        LIMIT ?
+    ''', (*filters.params, *after_params, limit + 1)).fetchall()
+
+    books = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor((books[-1]["sort_value"], books[-1]["id"]))
+    for book in books:
+        del book["sort_value"]
+    return {"books": books, "next_cursor": next_cursor}
+
+def export_book_lines(filters: BookFilters) -> Iterator[bytes]:
+    """NDJSON lines for every matching book, in id order, a batch at a time
+
+    Holds its own pooled connection for as long as the response streams, rather
+    than the request's, which is released once the handler returns.
+    """
+    with timeline_pool.connection() as conn:
+        cursor = conn.execute(f"SELECT {BOOK_COLUMNS} FROM books {filters.where()} ORDER BY id", filters.params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield b"".join(serialize(dict(row)) + b"\n" for row in rows)
+
+@router.get("/export")
+def export_books(filters: BookFilters = Depends()) -> StreamingResponse:
+    """Stream every matching book as newline-delimited JSON, for bulk consumers"""
+    return StreamingResponse(export_book_lines(filters), media_type="application/x-ndjson")
+
+@router.post("/batch")
+def get_books_batch(request: BookBatchRequest, db: sqlite3.Connection = Depends(get_db)) -> Dict[str, Any]:
+    """Get many books in one round trip, in request order, with null for IDs that don't exist"""
+    books = fetch_in_request_order(db, f'''
+        SELECT requested.key AS position, {", ".join(f"b.{column.strip()}" for column in BOOK_COLUMNS.split(","))}
+        FROM json_each(?) AS requested
+        LEFT JOIN books b ON b.id = requested.value
+    ''', request.ids)
+    return {
+        "results": books,
+        "missing": [book_id for book_id, book in zip(request.ids, books) if book is None],
+    }
+
+@router.post("/reading-list")
+def solve_reading_list_books(request: ReadingListRequest, db: sqlite3.Connection = Depends(get_db)) -> Dict[str, Any]:
+    """Find the fewest (or cheapest) books that together contain every requested issue"""
+    keys = {}
+    unknown = []
+    for issue in request.issues:
+        parsed = parse_issue_string(issue)
+        if parsed is None:
+            unknown.append(issue)
+        else:
+            keys.setdefault(canonical_issue_key(*parsed), issue)
+
+    # Resolve issues to dense IDs, chunked to stay under SQLite's variable limit
+    dense_ids = {}
+    key_list = list(keys)
+    for start in range(0, len(key_list), 500):
+        chunk = key_list[start:start + 500]
+        dense_ids.update(db.execute(
+            f"SELECT canonical_key, dense_id FROM comic_issues WHERE canonical_key IN ({','.join('?' * len(chunk))})",
+            chunk,
+        ).fetchall())
+    unknown.extend(issue for key, issue in keys.items() if dense_ids.get(key) is None)
+
+    target = 0
+    issue_by_dense_id = {}
+    for key, dense_id in dense_ids.items():
+        if dense_id is not None:
+            target |= 1 << dense_id
+            issue_by_dense_id[dense_id] = keys[key]
+
+    query = '''
+        SELECT b.id, b.title, b.current_price, s.bitset, s.base_dense_id
+        FROM book_issue_bitsets s
+        JOIN books b ON b.id = s.book_id
+    '''
+    rows = db.execute(query + " WHERE b.era_id = ?", (request.era_id,)).fetchall() \
+        if request.era_id is not None else db.execute(query).fetchall()
+
+    # Books without a scraped price are costed at the median known price
+    known_prices = [row["current_price"] for row in rows if row["current_price"] is not None]
+    default_price = statistics.median(known_prices) if known_prices else 1.0
+    candidates = [
+        CandidateBook(
+            book_id=row["id"],
+            title=row["title"],
+            bitset=blob_to_bitset(row["bitset"], row["base_dense_id"]),
+            cost=(row["current_price"] if row["current_price"] is not None else default_price)
+            if request.optimize == "price" else 1.0,
+        )
+        for row in rows
+    ]
+
+    chosen, uncoverable, used_exact = solve_reading_list(target, candidates, exact=request.exact)
+
+    books = []
+    uncovered = target & ~uncoverable
+    for index in chosen:
+        book = candidates[index]
+        books.append({
+            "book_id": book.book_id,
+            "title": book.title,
+            "price": rows[index]["current_price"],
+            "new_issues": (book.bitset & uncovered).bit_count(),
+        })
+        uncovered &= ~book.bitset
+
+    return {
+        "books": books,
+        "book_count": len(books),
+        "total_price": sum(book["price"] or 0 for book in books),
+        "covered_issues": (target & ~uncoverable).bit_count(),
+        "uncovered_issues": [issue_by_dense_id[dense_id] for dense_id in sorted(issue_by_dense_id)
+                             if uncoverable >> dense_id & 1],
+        "unknown_issues": unknown,
+        "exact": used_exact,
+    }
+
+@router.get("/autocomplete")
+def autocomplete_titles(
+    q: str = Query(..., min_length=1, description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=MAX_RESULTS),
+) -> Dict[str, Any]:
+    """Type-ahead over series and book titles, most popular first
+
+    Matches titles with a word starting with q, from an in-memory index that is
+    rebuilt whenever a migration changes the data version. Answers 503 while the
+    index can't be built (database missing or not set up yet).
+    """
+    try:
+        with timeline_pool.connection() as db:
+            index = get_autocomplete_index(db)
+    except sqlite3.OperationalError:
+        raise HTTPException(status_code=503, detail="Autocomplete is not available yet")
+    suggestions = index.search(q, limit)
+    return {"query": q, "results": [suggestion._asdict() for suggestion in suggestions]}
+
+@router.get("/search")
+def search_books(
+    q: str = Query(..., min_length=1, description='Search text, e.g. "first appearance lex"'),
+    kind: Optional[Literal["book", "issue", "event"]] = Query(None, description="Only return this kind of result"),
+    prefix: bool = Query(True, description="Match the last word as a prefix"),
+    limit: int = Query(20, ge=1, le=100),
+    db: sqlite3.Connection = Depends(get_db),
+) -> Dict[str, Any]:
+    """Full-text search over book titles, issue strings and notable events
+
+    Results are ranked by BM25 with title matches weighted above body matches, and
+    matched words are wrapped in <mark> tags in the title and snippet.
+    """
+    match_query = build_match_query(q, prefix)
+    if match_query is None:
+        return {"query": q, "results": []}
+
+    sql = '''
+        SELECT kind, book_id, issue_id,
+               highlight(search_index, 0, '<mark>', '</mark>') AS title,
+               snippet(search_index, 1, '<mark>', '</mark>', '…', 12) AS snippet,
+               bm25(search_index, 10.0, 1.0) AS score
+        FROM search_index
+        WHERE search_index MATCH ?
+    '''
+    params: List[Any] = [match_query]
+    if kind is not None:
+        sql += " AND kind = ?"
+        params.append(kind)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+
+    rows = db.execute(sql, params).fetchall()
+    return {
+        "query": q,
+        "results": [
+            {"kind": row["kind"], "book_id": row["book_id"], "issue_id": row["issue_id"],
+             "title": row["title"], "snippet": row["snippet"] or None, "score": round(-row["score"], 4)}
+            for row in rows
+        ],
+    }
+
+@router.get("/{book_id}/overlaps")
+def get_book_overlaps(book_id: int, db: sqlite3.Connection = Depends(get_db)) -> List[Dict[str, Any]]:
+    """Get the books that share the most issues with a book (precomputed by the migration)"""
+    if db.execute("SELECT 1 FROM books WHERE id = ?", (book_id,)).fetchone() is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    rows = db.execute('''
+        SELECT o.other_book_id, b.title, o.shared_count, o.jaccard
+        FROM book_overlaps o
+        JOIN books b ON b.id = o.other_book_id
+        WHERE o.book_id = ?
+        ORDER BY o.rank
+    ''', (book_id,)).fetchall()
+    return [
+        {"book_id": row["other_book_id"], "title": row["title"],
+         "shared_issues": row["shared_count"], "jaccard": row["jaccard"]}
+        for row in rows
+    ]
@@ -0,0 +1,76 @@
+import sqlite3
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Any, Optional
+import database_scripts  # puts the Database scripts on sys.path
+from database import MAX_BATCH_SIZE, fetch_in_request_order, get_db
+from migrate_json_data import canonical_issue_key, parse_issue_string
+from price_rollups import price_history
+
+router = APIRouter(
+    prefix="/issues",
+    tags=["issues"],
+    responses={404: {"description": "Not found"}},
+)
+
+class IssueBatchRequest(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=MAX_BATCH_SIZE, description="Issue IDs")
+    keys: Optional[List[str]] = Field(None, max_length=MAX_BATCH_SIZE,
+                                      description='Issue strings, e.g. "Action Comics (1938) #1"')
+
+    @model_validator(mode="after")
+    def one_kind_of_reference(self):
+        if (self.ids is None) == (self.keys is None):
+            raise ValueError("Give either ids or keys")
+        return self
+
+ISSUE_BATCH_SQL = '''
+    SELECT requested.key AS position, i.id, i.series_id, s.title AS series, s.start_year AS series_start_year,
+           i.issue_number, i.canonical_key, i.title, i.publication_date, i.cover_price
+    FROM json_each(?) AS requested
+    LEFT JOIN comic_issues i ON {match} = requested.value
+    LEFT JOIN comic_series s ON s.id = i.series_id
+'''
+
+@router.post("/batch")
+def get_issues_batch(request: IssueBatchRequest, db: sqlite3.Connection = Depends(get_db)) -> Dict[str, Any]:
+    """Get many issues in one round trip, by ID or issue string, in request order
+
+    Unknown IDs and issue strings (including ones that don't parse) come back as null.
+    """
+    if request.ids is not None:
+        references = request.ids
+        issues = fetch_in_request_order(db, ISSUE_BATCH_SQL.format(match="i.id"), references)
+    else:
+        references = request.keys
+        keys = []
+        for issue in references:
+            parsed = parse_issue_string(issue)
+            keys.append(canonical_issue_key(*parsed) if parsed is not None else None)
+        issues = fetch_in_request_order(db, ISSUE_BATCH_SQL.format(match="i.canonical_key"), keys)
+
+    return {
+        "results": issues,
+        "missing": [reference for reference, issue in zip(references, issues) if issue is None],
+    }
+
+@router.get("/{issue_id}/price-history")
+def get_issue_price_history(
+    issue_id: int,
+    condition: Optional[str] = Query(None, description="Only this condition, e.g. Near Mint"),
+    start: Optional[date] = Query(None, description="First date to include"),
+    end: Optional[date] = Query(None, description="Last date to include"),
+    db: sqlite3.Connection = Depends(get_db)
+) -> Dict[str, Any]:
+    """Price points for an issue over time
+
+    Recent points are daily; older ones are the weekly and monthly rollups kept by
+    the retention policy, marked by each point's period.
+    """
+    if db.execute("SELECT 1 FROM comic_issues WHERE id = ?", (issue_id,)).fetchone() is None:
+        raise HTTPException(status_code=404, detail="Issue not found")
+
+    points = price_history(db.cursor(), issue_id, condition,
+                           start.isoformat() if start else None, end.isoformat() if end else None)
+    return {"issue_id": issue_id, "points": points}
@@ -0,0 +1,105 @@
+import json
+import sqlite3
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Literal
+import database_scripts  # puts the Database scripts on sys.path
+from database import MAX_BATCH_SIZE, get_db, get_write_db
+from book_overlaps import blob_to_bitset
+from reading_progress import get_era_issue_sets, load_progress, save_progress
+
+router = APIRouter(
+    prefix="/accounts/{account_id}/progress",
+    tags=["progress"],
+    responses={404: {"description": "Not found"}},
+)
+
+PROGRESS_LISTS = ("read", "owned")
+
+class IssueRange(BaseModel):
+    series_id: int
+    first: float = Field(..., description="First issue number, e.g. 1")
+    last: float = Field(..., description="Last issue number, e.g. 50")
+
+class ProgressChange(BaseModel):
+    issue_ids: List[int] = Field([], max_length=MAX_BATCH_SIZE * 10, description="Individual issues")
+    book_ids: List[int] = Field([], max_length=MAX_BATCH_SIZE, description="Every issue collected in these books")
+    ranges: List[IssueRange] = Field([], max_length=MAX_BATCH_SIZE,
+                                     description="Numbered issues of a series, annuals and specials excluded")
+
+def ensure_account(db: sqlite3.Connection, account_id: int):
+    if db.execute("SELECT 1 FROM accounts WHERE id = ?", (account_id,)).fetchone() is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+def is_account_missing(error: sqlite3.IntegrityError) -> bool:
+    return "FOREIGN KEY constraint failed" in str(error)
+
+def change_to_bitset(db: sqlite3.Connection, change: ProgressChange) -> int:
+    """Union of every issue a change refers to, as a bitset over dense IDs"""
+    bitset = 0
+    if change.issue_ids:
+        for (dense_id,) in db.execute('''
+            SELECT i.dense_id FROM json_each(?) AS requested
+            JOIN comic_issues i ON i.id = requested.value
+            WHERE i.dense_id IS NOT NULL
+        ''', (json.dumps(change.issue_ids),)):
+            bitset |= 1 << dense_id
+    if change.book_ids:
+        for blob, base_dense_id in db.execute('''
+            SELECT s.bitset, s.base_dense_id FROM json_each(?) AS requested
+            JOIN book_issue_bitsets s ON s.book_id = requested.value
+        ''', (json.dumps(change.book_ids),)):
+            bitset |= blob_to_bitset(blob, base_dense_id)
+    for issue_range in change.ranges:
+        for (dense_id,) in db.execute('''
+            SELECT dense_id FROM comic_issues
+            WHERE series_id = ? AND dense_id IS NOT NULL
+              AND issue_number GLOB '[0-9]*' AND CAST(issue_number AS REAL) BETWEEN ? AND ?
+        ''', (issue_range.series_id, issue_range.first, issue_range.last)):
+            bitset |= 1 << dense_id
+    return bitset
+
+@router.get("")
+def get_progress(account_id: int, db: sqlite3.Connection = Depends(get_db)) -> Dict[str, Any]:
+    """Read and owned counts for every era, from one bitmap AND and popcount per era and list"""
+    ensure_account(db, account_id)
+    lists = load_progress(db, account_id)
+    lists = {list_name: lists.get(list_name, 0) for list_name in PROGRESS_LISTS}
+    return {
+        "account_id": account_id,
+        **{f"{list_name}_count": bitset.bit_count() for list_name, bitset in lists.items()},
+        "eras": get_era_issue_sets(db).completion(lists),
+    }
+
+@router.post("/{list_name}/{action}")
+def update_progress(
+    account_id: int,
+    list_name: Literal["read", "owned"],
+    action: Literal["mark", "unmark"],
+    change: ProgressChange,
+    db: sqlite3.Connection = Depends(get_write_db)
+) -> Dict[str, Any]:
+    """Mark or unmark many issues at once: individual issues, whole books and issue ranges"""
+    ensure_account(db, account_id)
+    requested = change_to_bitset(db, change)
+
+    # BEGIN IMMEDIATE takes the write lock before reading, so concurrent changes can't overwrite each other
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        current = load_progress(db, account_id).get(list_name, 0)
+        updated = current | requested if action == "mark" else current & ~requested
+        issue_count, stored_bytes = save_progress(db, account_id, list_name, updated)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        # The account was deleted after ensure_account found it
+        if isinstance(e, sqlite3.IntegrityError) and is_account_missing(e):
+            raise HTTPException(status_code=404, detail="Account not found")
+        raise
+
+    return {
+        "list": list_name,
+        "changed": (current ^ updated).bit_count(),
+        "issue_count": issue_count,
+        "stored_bytes": stored_bytes,
+    }
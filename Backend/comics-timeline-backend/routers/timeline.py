@@ -1,5 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Dict, Any, Optional
+import json
+import sqlite3
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import List, Dict, Any, Literal, Optional
+from database import get_db
+from pagination import decode_cursor, encode_cursor
+from reading_order import get_reading_order
+from timeline_repository import CachedResponse, EncodedResponse, timeline_repository
 
 router = APIRouter(
     prefix="/timeline",
@@ -7,226 +13,270 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Sample era data - TODO make a table out of this & replace with actual database operations
-era_data = {
-    "DC": [
-        {
-            "id": 1,
-            "title": "Pre-Crisis",
-            "ending_event": "Crisis on Infinite Earths", 
-            "years": [1938, 1985],
-            "description": "Beginning of DC Comics up to the beginning of the modern age",
-        },
-        {
-            "id": 2,
-            "title": "Post-Crisis Part 1",
-            "ending_event": "Zero Hour", 
-            "years": [1985, 1994],
-            "description": "Modern age following Crisis on Infinite Earths through Zero Hour",
-        },
-        {
-            "id": 3,
-            "title": "Post-Crisis Part 2",
-            "ending_event": "Infinite Crisis",
-            "years": [1994, 2005],
-            "description": "DC expands as much as they can in a single continuity before another big event retconning everything",
-        },
-        {
-            "id": 4,
-            "title": "Post-Crisis Part 3",
-            "ending_event": "Final Crisis",
-            "years": [2005, 2009],
-            "description": "The newly streamlined continuity builds up to its most complicated event so far",
-        },
-        {
-            "id": 5,
-            "title": "Post-Crisis Part 4",
-            "ending_event": "Flashpoint",
-            "years": [2009, 2011],
-            "description": "Final chapter of the Post-Crisis era before the New 52",
-        },
-        {
-            "id": 6,
-            "title": "New 52",
-            "years": [2011, 2016],
-            "ending_event": "Rebirth",
-            "description": "DC Universe reboot following Flashpoint event",
-        },
-        {
-            "id": 7,
-            "title": "Rebirth",
-            "years": [2016, 2018],
-            "ending_event": "Doomsday Clock",
-            "description": "Soft reboot bringing back classic elements to DC continuity",
-        }
-    ],
-    "Marvel": [
-        {
-            "id": 8,
-            "title": "Golden Age",
-            "years": [1939, 1956],
-            "description": "Early Marvel Comics under Timely Publications",
-            "ending_event": "Creation of the Fantastic Four",
-        },
-        {
-            "id": 9,
-            "title": "The Marvel Age",
-            "years": [1961, 1984],
-            "description": "Marvel renaissance under Stan Lee(but also Jack Kirby, Steve Ditko, etc.)",
-            "ending_event": "Secret Wars (1984)",
-        },
-        {
-            "id": 10,
-            "title": "Copper Age",
-            "years": [1984, 1996],
-            "description": "Marvel's response to the DC Crisis events, leading to a more interconnected universe",
-            "ending_event": "Onslaught",
-        },
-        {
-            "id": 11,
-            "title": "Modern Age",
-            "years": [1996, 2015],
-            "description": "Marvel's current era with multiple reboots and continuities",
-            "ending_event": "Secret Wars (2015)",
-        },
-        {
-            "id": 12,
-            "title": "All-New, All-Different Marvel",
-            "years": [2015, 2025],
-            "description": "Post-Secret Wars era with new directions for characters and teams",
-            "ending_event": "Ongoing",
-        }
-    ]
-}
-
-# Sample subera data - TODO make a table out of this & replace with actual database operations
-
-subera_data = {
-    "DC": {
-        "Pre-Crisis": [
-            {}
-        ],
-        "Post-Crisis Part 1": [
-            {} 
-        ],
-        "Post-Crisis Part 2": [
-            {} 
-        ],
-        "Post-Crisis Part 3": [
-            {} 
-        ],
-        "Post-Crisis Part 4": [
-            {} 
-        ],
-        "New 52": [
-            {} 
-        ],
-        "Rebirth": [
-            {} 
-        ],
-    },
-    "Marvel": {
-        "Golden Age": [
-            {}
-        ],
-        "The Marvel Age": [
-            {}
-        ],
-        "Copper Age": [
-            {}
-        ],
-        "Modern Age": [
-            {}
-        ]
+# Year filters are bounded so out-of-range values get a 422 instead of overflowing SQLite's integers
+MIN_YEAR, MAX_YEAR = 0, 9999
 
-    }
+def not_modified(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+def etag_response(request: Request, cached: CachedResponse) -> Response:
+    """Serve pre-serialized JSON, or 304 Not Modified when the client already has it"""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if not_modified(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+# Preferred content coding first, when the client accepts several equally
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+
+def choose_encoding(accept_encoding: Optional[str], available) -> str:
+    """Best available content coding for an Accept-Encoding header"""
+    weights: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
 
-}
+    def weight_of(coding: str) -> float:
+        if coding in weights:
+            return weights[coding]
+        if "*" in weights:
+            return weights["*"]
+        # Identity is acceptable unless excluded, but loses to any coding the client listed
+        return 0.001 if coding == "identity" else 0.0
+
+    candidates = [coding for coding in ENCODING_PREFERENCE if coding in available and weight_of(coding) > 0]
+    if not candidates:
+        return "identity"
+    return max(candidates, key=weight_of)  # max keeps the first (most preferred) of equal weights
+
+def encoded_response(request: Request, encoded: EncodedResponse) -> Response:
+    """Serve a precompressed body as raw bytes in the best coding the client accepts"""
+    encoding = choose_encoding(request.headers.get("accept-encoding"), encoded.bodies)
+    etag = encoded.etag_for(encoding)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=encoded.bodies[encoding], media_type="application/json", headers=headers)
 
 @router.get("/eras")
-async def get_eras(
+def get_eras(
+    request: Request,
     publisher: Optional[str] = Query(None, description="Filter by publisher (DC, Marvel, etc.)"),
-    start_year: Optional[int] = Query(None, description="Filter eras that start after this year"),
-    end_year: Optional[int] = Query(None, description="Filter eras that end before this year")
-) -> List[Dict[str, Any]]:
-    all_eras = []
-    for pub, eras in era_data.items():
-        if publisher is None or pub.lower() == publisher.lower():
-            all_eras.extend(eras)
-
-    if start_year is not None:
-        all_eras = [era for era in all_eras if era["years"][0] >= start_year]    
-    if end_year is not None:
-        all_eras = [era for era in all_eras if era["years"][1] <= end_year]
-    if not all_eras:
+    start_year: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR,
+                                      description="Filter eras that start after this year"),
+    end_year: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR,
+                                    description="Filter eras that end before this year"),
+    active_in: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR,
+                                     description="Filter eras running during this year"),
+    db: sqlite3.Connection = Depends(get_db)
+) -> Response:
+    cached = timeline_repository.eras(db, publisher, start_year, end_year, active_in)
+    if not cached.item_count:
         raise HTTPException(status_code=404, detail="No eras found matching the criteria")
-    return all_eras
+    return etag_response(request, cached)
 
 @router.get("/suberas")
-async def get_suberas(
+def get_suberas(
+    request: Request,
     publisher: str = Query(None, description="Filter by publisher (DC, Marvel, etc.)"),
-    era_name: str = Query(None, description="Filter by specific era name")
-) -> List[Dict[str, Any]]:
-    return subera_data.get(publisher, {}).get(era_name, [])
-
-
-# TODO IMPLEMENT SIMILAR LOGIC IN THE FUTURE 
-# @router.get("/events")
-# async def get_major_events(
-#     publisher: Optional[str] = Query(None, description="Filter by publisher"),
-#     era_id: Optional[int] = Query(None, description="Filter by specific era"),
-#     year: Optional[int] = Query(None, description="Filter by specific year")
-# ) -> List[Dict[str, Any]]:
-#     """Get major timeline events with optional filtering"""
-    
-#     events = []
-    
-#     for pub, eras in timeline_data.items():
-#         if publisher is None or pub.lower() == publisher.lower():
-#             for era in eras:
-#                 if era_id is None or era["id"] == era_id:
-#                     for event in era["major_events"]:
-#                         if year is None or event["year"] == year:
-#                             events.append({
-#                                 **event,
-#                                 "era_title": era["title"],
-#                                 "era_id": era["id"],
-#                                 "publisher": pub
-#                             })
-    
-#     if not events:
-#         raise HTTPException(status_code=404, detail="No events found matching the criteria")
-    
-#     return sorted(events, key=lambda x: x["year"])
-
-
-# @router.get("/timeline/full")
-# async def get_full_timeline(
-#     publisher: Optional[str] = Query(None, description="Filter by publisher")
-# ) -> Dict[str, Any]:
-#     """Get complete timeline data for visualization"""
-    
-#     if publisher:
-#         if publisher not in timeline_data:
-#             raise HTTPException(status_code=404, detail=f"Publisher '{publisher}' not found")
-        
-#         eras = timeline_data[publisher]
-#         return {
-#             "publisher": publisher,
-#             "eras": eras,
-#             "total_years": max(era["years"][1] for era in eras) - min(era["years"][0] for era in eras),
-#             "era_count": len(eras)
-#         }
-    
-#     # Return all publishers' data
-#     return {
-#         "publishers": list(timeline_data.keys()),
-#         "all_data": timeline_data,
-#         "summary": {
-#             pub: {
-#                 "era_count": len(eras),
-#                 "year_span": f"{min(era['years'][0] for era in eras)}-{max(era['years'][1] for era in eras)}"
-#             }
-#             for pub, eras in timeline_data.items()
-#         }
-#     }
+    era_name: str = Query(None, description="Filter by specific era name"),
+    db: sqlite3.Connection = Depends(get_db)
+) -> Response:
+    return etag_response(request, timeline_repository.sub_eras(db, publisher, era_name))
+
+RANGE_KINDS = ("eras", "sub_eras", "issues")
+
+@router.get("/range")
+def get_timeline_range(
+    request: Request,
+    start_year: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR, description="First year of the range"),
+    end_year: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR,
+                                    description="Last year of the range (defaults to start_year)"),
+    year: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR,
+                                description="Single year, instead of start_year/end_year"),
+    publisher: Optional[str] = Query(None, description="Filter by publisher (DC, Marvel, etc.)"),
+    kinds: str = Query(",".join(RANGE_KINDS), description="Comma-separated: eras, sub_eras, issues"),
+    issue_limit: int = Query(500, ge=0, le=5000, description="Most issues to return"),
+    db: sqlite3.Connection = Depends(get_db)
+) -> Response:
+    """Eras, sub-eras and issues active at any point in a year range"""
+    if year is not None:
+        start_year = end_year = year
+    if start_year is None:
+        raise HTTPException(status_code=400, detail="Give a year or a start_year")
+    if end_year is None:
+        end_year = start_year
+    if end_year < start_year:
+        raise HTTPException(status_code=400, detail="end_year is before start_year")
+
+    requested = tuple(kind.strip() for kind in kinds.split(",") if kind.strip())
+    unknown = [kind for kind in requested if kind not in RANGE_KINDS]
+    if unknown or not requested:
+        raise HTTPException(status_code=400, detail=f"kinds must be drawn from {', '.join(RANGE_KINDS)}")
+
+    cached = timeline_repository.timeline_range(db, start_year, end_year, publisher, requested, issue_limit)
+    return etag_response(request, cached)
+
+def summary_row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    """Precomputed summary row as a response, with the histogram decoded"""
+    summary = dict(row)
+    if "year_histogram" in summary:
+        summary["year_histogram"] = json.loads(summary["year_histogram"] or "{}")
+    return summary
+
+@router.get("/summary")
+def get_publisher_summary(
+    publisher: str = Query("DC", description="Publisher (DC, Marvel, etc.)"),
+    db: sqlite3.Connection = Depends(get_db)
+) -> Dict[str, Any]:
+    """Era count, year span and totals for a publisher (precomputed by the migration)"""
+    row = db.execute('''
+        SELECT p.name AS publisher, s.*
+        FROM publisher_summaries s
+        JOIN publishers p ON p.id = s.publisher_id
+        WHERE lower(p.name) IN (lower(?), lower(?) || ' comics')
+    ''', (publisher, publisher)).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"No summary for publisher '{publisher}'")
+    return summary_row_to_dict(row)
+
+@router.get("/eras/{era_id}/summary")
+def get_era_summary(era_id: int, db: sqlite3.Connection = Depends(get_db)) -> Dict[str, Any]:
+    """Book, issue and series counts, year histogram and price stats for an era"""
+    row = db.execute('''
+        SELECT e.title, s.*
+        FROM era_summaries s
+        JOIN eras e ON e.id = s.era_id
+        WHERE s.era_id = ?
+    ''', (era_id,)).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Era not found")
+    return summary_row_to_dict(row)
+
+@router.get("/suberas/{sub_era_id}/summary")
+def get_subera_summary(sub_era_id: int, db: sqlite3.Connection = Depends(get_db)) -> Dict[str, Any]:
+    """Book, issue and series counts, year histogram and price stats for a sub-era"""
+    row = db.execute('''
+        SELECT se.title, s.*
+        FROM sub_era_summaries s
+        JOIN sub_eras se ON se.id = s.sub_era_id
+        WHERE s.sub_era_id = ?
+    ''', (sub_era_id,)).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Sub-era not found")
+    return summary_row_to_dict(row)
+
+@router.get("/full")
+def get_full_timeline(
+    request: Request,
+    publisher: Optional[str] = Query(None, description="Filter by publisher"),
+    db: sqlite3.Connection = Depends(get_db)
+) -> Response:
+    """Complete timeline (eras, sub-eras and books) for visualization"""
+    encoded = timeline_repository.full_timeline(db, publisher)
+    if not encoded.item_count:
+        raise HTTPException(status_code=404, detail=f"Publisher '{publisher}' not found")
+    return encoded_response(request, encoded)
+
+@router.get("/reading-order")
+def get_reading_order_page(
+    publisher: Optional[str] = Query(None, description="Filter by publisher"),
+    kind: Optional[Literal["book", "issue"]] = Query(None, description="Only books or only issues"),
+    offset: int = Query(0, ge=0, description="Position of the first item"),
+    limit: int = Query(100, ge=1, le=1000, description="Items per page"),
+    db: sqlite3.Connection = Depends(get_db)
+) -> Dict[str, Any]:
+    """A page of the chronological reading order of books and issues across every era
+
+    The order is built once per data version, so offsets stay stable until the next
+    migration; data_version tells clients when to start over.
+    """
+    order = get_reading_order(db)
+    items = order.items(publisher, kind)
+    page = items[offset:offset + limit]
+    next_offset = offset + len(page)
+    return {
+        "data_version": order.data_version,
+        "total": len(items),
+        "offset": offset,
+        "next_offset": next_offset if next_offset < len(items) else None,
+        "items": [item.to_dict(offset + index) for index, item in enumerate(page)],
+    }
+
+EVENT_TYPES = ("notable", "era_end")
+
+@router.get("/events")
+def get_major_events(
+    publisher: Optional[str] = Query(None, description="Filter by publisher"),
+    era_id: Optional[int] = Query(None, description="Filter by specific era"),
+    year: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR, description="Filter by specific year"),
+    event_type: Optional[str] = Query(None, description="notable or era_end"),
+    limit: int = Query(50, ge=1, le=500, description="Events per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: sqlite3.Connection = Depends(get_db)
+) -> Dict[str, Any]:
+    """Get major timeline events in chronological order, one page at a time"""
+    if event_type is not None and event_type not in EVENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"event_type must be one of {', '.join(EVENT_TYPES)}")
+
+    # Each filter is an equality on an index prefix; the rest of the index is the sort and page key
+    conditions, params = [], []
+    if era_id is not None:
+        conditions.append("ev.era_id = ?")
+        params.append(era_id)
+    if publisher is not None:
+        # Resolved up front so the filter is one equality and rows come back in index order
+        publisher_row = db.execute(
+            "SELECT id FROM publishers WHERE lower(name) IN (lower(?), lower(?) || ' comics')", (publisher, publisher)
+        ).fetchone()
+        if publisher_row is None:
+            raise HTTPException(status_code=404, detail=f"Publisher '{publisher}' not found")
+        conditions.append("ev.publisher_id = ?")
+        params.append(publisher_row["id"])
+    if year is not None:
+        conditions.append("ev.year = ?")
+        params.append(year)
+    if event_type is not None:
+        conditions.append("ev.event_type = ?")
+        params.append(event_type)
+    after = decode_cursor(cursor, 3)
+    if after is not None:
+        conditions.append("(ev.year, ev.month, ev.id) > (?, ?, ?)")
+        params.extend(after)
+
+    rows = db.execute(f'''
+        SELECT ev.id, ev.year, ev.month, ev.event_type, ev.title, ev.detail, ev.book_id, ev.issue_id,
+               ev.era_id, e.title AS era_title, p.name AS publisher
+        FROM timeline_events ev
+        JOIN eras e ON e.id = ev.era_id
+        JOIN publishers p ON p.id = ev.publisher_id
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY ev.year, ev.month, ev.id
+        LIMIT ?
+    ''', (*params, limit + 1)).fetchall()
+
+    if not rows and after is None:
+        raise HTTPException(status_code=404, detail="No events found matching the criteria")
+
+    events = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = events[-1]
+        next_cursor = encode_cursor((last["year"], last["month"], last["id"]))
+    return {"events": events, "next_cursor": next_cursor}
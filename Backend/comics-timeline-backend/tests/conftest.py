@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The app reads its database path at import, so the test database is built before any test imports it
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import database_scripts  # puts the Database scripts on sys.path
+from setup_timeline_database import create_indexes, create_timeline_tables, insert_publishers, insert_timeline_eras
+from timeline_db import connect
+
+TEST_DATABASE_PATH = Path(tempfile.mkdtemp(prefix="comics-timeline-tests-")) / "comics_timeline.db"
+os.environ["TIMELINE_DATABASE_PATH"] = str(TEST_DATABASE_PATH)
+
+def build_test_database(path: Path):
+    """Schema, publishers and eras, without any era JSON loaded"""
+    conn = connect(path)
+    cursor = conn.cursor()
+    create_timeline_tables(cursor)
+    insert_publishers(cursor)
+    insert_timeline_eras(cursor)
+    create_indexes(cursor)
+    conn.commit()
+    conn.close()
+
+build_test_database(TEST_DATABASE_PATH)
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
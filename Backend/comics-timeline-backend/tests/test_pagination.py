@@ -0,0 +1,32 @@
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor(("Batman", 12)), 2) == ["Batman", 12]
+    assert decode_cursor(encode_cursor((None, 1.5, 3)), 3) == [None, 1.5, 3]
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor({"a": 1}),
+    raw_cursor([1]),
+    raw_cursor([[1], {"a": 1}]),
+    raw_cursor([2 ** 64, 1]),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 2)
+    assert error.value.status_code == 400
+
+@pytest.mark.parametrize("value", [[[1], {"a": 1}], [{"a": 1}, 1], [2 ** 64, 1]])
+def test_books_with_malformed_cursor(client, value):
+    response = client.get("/books/", params={"cursor": raw_cursor(value)})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
@@ -0,0 +1,24 @@
+from conftest import TEST_DATABASE_PATH
+from timeline_db import connect
+
+import routers.progress as progress
+
+def test_progress_for_missing_account(client):
+    response = client.post("/accounts/999999/progress/read/mark", json={"issue_ids": [1]})
+    assert response.status_code == 404
+
+def test_account_deleted_during_progress_write(client, monkeypatch):
+    account = client.post("/accounts/", json={"username": "deleted-mid-write"}).json()
+    ensure_account = progress.ensure_account
+
+    def delete_after_check(db, account_id):
+        ensure_account(db, account_id)
+        conn = connect(TEST_DATABASE_PATH)
+        with conn:
+            conn.execute("DELETE FROM accounts WHERE id = ?", (account_id,))
+        conn.close()
+
+    monkeypatch.setattr(progress, "ensure_account", delete_after_check)
+    response = client.post(f"/accounts/{account['id']}/progress/read/mark", json={"issue_ids": [1]})
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Account not found"}
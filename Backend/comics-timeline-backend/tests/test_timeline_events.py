@@ -0,0 +1,19 @@
+import base64
+import json
+
+import pytest
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+@pytest.mark.parametrize("value", [
+    [[1], {"a": 1}, 1],
+    [1986, [1], 1],
+    [1986, 1, {"id": 1}],
+    [1986, 1, 2 ** 64],
+    [1986, 1],
+])
+def test_events_with_malformed_cursor(client, value):
+    response = client.get("/timeline/events", params={"cursor": raw_cursor(value)})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
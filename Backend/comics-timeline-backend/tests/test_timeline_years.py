@@ -0,0 +1,17 @@
+import pytest
+
+HUGE_YEAR = "100000000000000000000"
+
+@pytest.mark.parametrize("path, params", [
+    ("/timeline/range", {"year": HUGE_YEAR}),
+    ("/timeline/range", {"start_year": "1986", "end_year": HUGE_YEAR}),
+    ("/timeline/range", {"year": "-1"}),
+    ("/timeline/eras", {"start_year": HUGE_YEAR}),
+    ("/timeline/eras", {"active_in": HUGE_YEAR}),
+    ("/timeline/events", {"year": HUGE_YEAR}),
+])
+def test_out_of_range_year_is_rejected(client, path, params):
+    assert client.get(path, params=params).status_code == 422
+
+def test_year_in_range_is_accepted(client):
+    assert client.get("/timeline/range", params={"year": "1986"}).status_code == 200
@@ -0,0 +1,352 @@
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Serve gzip only
+    brotli = None
+
+from data_version import data_version_watcher
+from interval_index import OPEN_END, IntervalIndex, month_point, parse_year_month, year_end, year_span, year_start
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str  # Strong ETag, quoted
+    item_count: int
+
+class EncodedResponse(NamedTuple):
+    bodies: Dict[str, bytes]  # Content coding ("identity", "gzip", "br") -> body
+    etag: str  # Strong ETag of the identity body, quoted
+    item_count: int
+
+    def etag_for(self, encoding: str) -> str:
+        """Each coding is its own representation, so it gets its own strong ETag"""
+        return self.etag if encoding == "identity" else f'{self.etag[:-1]}-{encoding}"'
+
+def serialize(payload: Any) -> bytes:
+    """Compact JSON body for a cached response"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def make_cached_response(payload: Any, item_count: Optional[int] = None) -> CachedResponse:
+    """Serialize a payload once and tag it with a hash of its bytes"""
+    body = serialize(payload)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    return CachedResponse(body, etag, len(payload) if item_count is None else item_count)
+
+def make_encoded_response(payload: Any, item_count: int) -> EncodedResponse:
+    """Serialize a payload once and compress it ahead of time with every supported coding"""
+    cached = make_cached_response(payload, item_count)
+    bodies = {"identity": cached.body, "gzip": gzip.compress(cached.body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(cached.body, quality=11, mode=brotli.MODE_TEXT)
+    return EncodedResponse(bodies, cached.etag, item_count)
+
+def publisher_matches(name: str, publisher: Optional[str]) -> bool:
+    """"DC" and "dc comics" both select "DC Comics" """
+    if publisher is None:
+        return True
+    name, publisher = name.casefold(), publisher.casefold()
+    return name == publisher or name == f"{publisher} comics"
+
+class TimelineSnapshot:
+    """Eras and sub-eras at one data version, plus the responses serialized from them"""
+
+    def __init__(self, db: sqlite3.Connection, data_version: int):
+        self.data_version = data_version
+
+        self.eras: List[Dict[str, Any]] = [
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "ending_event": row["ending_event"],
+                "years": [row["start_year"], row["end_year"]],
+                "description": row["description"],
+                "publisher": row["publisher"],
+            }
+            for row in db.execute('''
+                SELECT e.id, e.title, e.ending_event, e.start_year, e.end_year, e.description, p.name AS publisher
+                FROM eras e
+                JOIN publishers p ON p.id = e.publisher_id
+                ORDER BY p.id, e.display_order, e.id
+            ''')
+        ]
+
+        self.sub_eras: List[Dict[str, Any]] = [
+            {
+                "id": row["id"],
+                "era_id": row["era_id"],
+                "title": row["title"],
+                "years": [row["start_year"], row["end_year"]],
+                "description": row["description"],
+                "era_title": row["era_title"],
+                "publisher": row["publisher"],
+            }
+            for row in db.execute('''
+                SELECT se.id, se.era_id, se.title, se.start_year, se.end_year, se.description,
+                       e.title AS era_title, p.name AS publisher
+                FROM sub_eras se
+                JOIN eras e ON e.id = se.era_id
+                JOIN publishers p ON p.id = e.publisher_id
+                ORDER BY p.id, e.display_order, se.display_order, se.id
+            ''')
+        ]
+
+        # Issues whose date isn't YYYY-MM-DD are left out, rather than failing the whole snapshot
+        self.issues: List[Dict[str, Any]] = []
+        issue_months: List[int] = []
+        for row in db.execute('''
+            SELECT i.id, s.title AS series, i.issue_number, i.canonical_key, i.publication_date, p.name AS publisher
+            FROM comic_issues i
+            JOIN comic_series s ON s.id = i.series_id
+            JOIN publishers p ON p.id = s.publisher_id
+            WHERE i.publication_date IS NOT NULL
+            ORDER BY i.publication_date, i.id
+        '''):
+            published = parse_year_month(row["publication_date"])
+            if published is None:
+                continue
+            self.issues.append({
+                "id": row["id"],
+                "series": row["series"],
+                "issue_number": row["issue_number"],
+                "canonical_key": row["canonical_key"],
+                "publication_date": row["publication_date"],
+                "publisher": row["publisher"],
+            })
+            issue_months.append(month_point(*published))
+
+        # Interval indexes hold positions in the lists above, so results can be put back in order
+        self.era_intervals = IntervalIndex(
+            (*year_span(*era["years"]), position) for position, era in enumerate(self.eras)
+        )
+        self.sub_era_intervals = IntervalIndex(
+            (*year_span(*sub_era["years"]), position) for position, sub_era in enumerate(self.sub_eras)
+        )
+        self.issue_intervals = IntervalIndex((point, point, position) for position, point in enumerate(issue_months))
+
+        # Responses are memoized under the known publishers and eras a filter resolves to, never
+        # the raw query string, so the memo can't grow past one entry per real filter
+        self.publishers: List[str] = list(dict.fromkeys(era["publisher"] for era in self.eras))
+        self.era_titles = {era["title"].casefold() for era in self.eras}
+
+        self.responses: Dict[Tuple, Any] = {}
+        self._building: Dict[Tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def cached(self, key: Tuple, make: Callable[[], Any]) -> Any:
+        """Value stored under key, made on first use
+
+        Only one thread makes each value, and it does so outside the shared lock: a
+        slow one (such as the brotli-compressed full timeline) holds up requests for
+        that key alone, not every request after a data version change.
+        """
+        while True:
+            cached = self.responses.get(key)
+            if cached is not None:
+                return cached
+            with self._lock:
+                cached = self.responses.get(key)
+                if cached is not None:
+                    return cached
+                building = self._building.get(key)
+                if building is None:
+                    building = self._building[key] = threading.Event()
+                    break
+            building.wait()  # Another thread is making it; loop to pick it up, or make it if that failed
+
+        try:
+            cached = self.responses[key] = make()
+        finally:
+            with self._lock:
+                del self._building[key]
+            building.set()
+        return cached
+
+    def response(self, key: Optional[Tuple], build: Callable[[], List[Dict[str, Any]]]) -> CachedResponse:
+        """Serialized response for a query, built on first use (every time for a key of None)"""
+        if key is None:
+            return make_cached_response(build())
+        return self.cached(key, lambda: make_cached_response(build()))
+
+    def publisher_key(self, publisher: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Known publishers a filter selects (none at all for an unknown one), or None for no filter"""
+        if publisher is None:
+            return None
+        return tuple(name for name in self.publishers if publisher_matches(name, publisher))
+
+    def era_key(self, era_name: Optional[str]) -> Optional[str]:
+        """Known era title a filter selects, "" for an unknown one, or None for no filter"""
+        if era_name is None:
+            return None
+        return era_name.casefold() if era_name.casefold() in self.era_titles else ""
+
+class TimelineRepository:
+    """Reads eras and sub-eras from the timeline DB through an in-memory snapshot
+
+    The snapshot is replaced when the data version moves, which also drops every
+    response serialized from the old one.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[TimelineSnapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self, db: sqlite3.Connection) -> TimelineSnapshot:
+        data_version = data_version_watcher.current(db)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.data_version == data_version:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.data_version != data_version:
+                self._snapshot = TimelineSnapshot(db, data_version)
+            return self._snapshot
+
+    def eras(self, db: sqlite3.Connection, publisher: Optional[str] = None,
+             start_year: Optional[int] = None, end_year: Optional[int] = None,
+             active_in: Optional[int] = None) -> CachedResponse:
+        """Eras of a publisher starting at/after start_year, ending at/before end_year
+        and running during active_in"""
+        snapshot = self.snapshot(db)
+
+        def build():
+            positions = None
+            if start_year is not None or end_year is not None:
+                positions = set(snapshot.era_intervals.within(
+                    year_start(start_year if start_year is not None else 0),
+                    OPEN_END if end_year is None else year_end(end_year),
+                ))
+            if active_in is not None:
+                active = set(snapshot.era_intervals.overlapping(year_start(active_in), year_end(active_in)))
+                positions = active if positions is None else positions & active
+            if positions is None:
+                positions = range(len(snapshot.eras))
+            return [
+                snapshot.eras[position] for position in sorted(positions)
+                if publisher_matches(snapshot.eras[position]["publisher"], publisher)
+            ]
+
+        # Year filters are unbounded in number, so only the unfiltered lists are kept, as with ranges
+        key = ("eras", snapshot.publisher_key(publisher)) \
+            if start_year is None and end_year is None and active_in is None else None
+        return snapshot.response(key, build)
+
+    def timeline_range(self, db: sqlite3.Connection, start_year: int, end_year: int,
+                       publisher: Optional[str] = None, kinds: Tuple[str, ...] = ("eras", "sub_eras", "issues"),
+                       issue_limit: int = 500) -> CachedResponse:
+        """Eras, sub-eras and issues active at some point from start_year through end_year"""
+        snapshot = self.snapshot(db)
+        window = (year_start(start_year), year_end(end_year))
+        sources = {
+            "eras": (snapshot.eras, snapshot.era_intervals),
+            "sub_eras": (snapshot.sub_eras, snapshot.sub_era_intervals),
+            "issues": (snapshot.issues, snapshot.issue_intervals),
+        }
+
+        payload: Dict[str, Any] = {"start_year": start_year, "end_year": end_year}
+        item_count = 0
+        for kind in kinds:
+            items, intervals = sources[kind]
+            matches = [
+                items[position] for position in sorted(intervals.overlapping(*window))
+                if publisher_matches(items[position]["publisher"], publisher)
+            ]
+            if kind == "issues":
+                payload["issue_count"] = len(matches)
+                matches = matches[:issue_limit]
+            payload[kind] = matches
+            item_count += len(matches)
+
+        # Year windows are unbounded in number, so range responses are not kept on the snapshot
+        return make_cached_response(payload, item_count)
+
+    def sub_eras(self, db: sqlite3.Connection, publisher: Optional[str] = None,
+                 era_name: Optional[str] = None) -> CachedResponse:
+        """Sub-eras of a publisher, optionally of a single era"""
+        snapshot = self.snapshot(db)
+
+        def build():
+            return [
+                sub_era for sub_era in snapshot.sub_eras
+                if publisher_matches(sub_era["publisher"], publisher)
+                and (era_name is None or sub_era["era_title"].casefold() == era_name.casefold())
+            ]
+
+        key = ("sub_eras", snapshot.publisher_key(publisher), snapshot.era_key(era_name))
+        return snapshot.response(key, build)
+
+    def full_timeline(self, db: sqlite3.Connection, publisher: Optional[str] = None) -> EncodedResponse:
+        """Every era with its sub-eras and books, serialized and compressed once per data version"""
+        snapshot = self.snapshot(db)
+        key = ("full", snapshot.publisher_key(publisher))
+        return snapshot.cached(key, lambda: self._build_full_timeline(db, snapshot, publisher))
+
+    @staticmethod
+    def _build_full_timeline(db: sqlite3.Connection, snapshot: TimelineSnapshot,
+                             publisher: Optional[str]) -> EncodedResponse:
+        books_by_era: Dict[int, List[Dict[str, Any]]] = {}
+        books_by_sub_era: Dict[int, List[Dict[str, Any]]] = {}
+        for row in db.execute('''
+            SELECT id, era_id, sub_era_id, title, book_type, canon_year, issue_count, current_price,
+                   earliest_issue_name, earliest_publish_year, earliest_publish_month,
+                   latest_issue_name, latest_publish_year, latest_publish_month
+            FROM books
+            ORDER BY era_id, earliest_publish_year IS NULL, earliest_publish_year, earliest_publish_month, id
+        '''):
+            book = dict(row)
+            sub_era_id = book.pop("sub_era_id")
+            if sub_era_id is None:
+                books_by_era.setdefault(book["era_id"], []).append(book)
+            else:
+                books_by_sub_era.setdefault(sub_era_id, []).append(book)
+
+        sub_eras_by_era: Dict[int, List[Dict[str, Any]]] = {}
+        for sub_era in snapshot.sub_eras:
+            sub_eras_by_era.setdefault(sub_era["era_id"], []).append(
+                {**sub_era, "books": books_by_sub_era.get(sub_era["id"], [])}
+            )
+
+        timeline: Dict[str, List[Dict[str, Any]]] = {}
+        for era in snapshot.eras:
+            if publisher_matches(era["publisher"], publisher):
+                timeline.setdefault(era["publisher"], []).append({
+                    **era,
+                    "sub_eras": sub_eras_by_era.get(era["id"], []),
+                    "books": books_by_era.get(era["id"], []),
+                })
+
+        def span_years(eras):
+            start = min(era["years"][0] for era in eras)
+            end = max(era["years"][1] or era["years"][0] for era in eras)
+            return start, end
+
+        if publisher is not None:
+            if not timeline:
+                return make_encoded_response({}, 0)
+            name, eras = next(iter(timeline.items()))
+            start, end = span_years(eras)
+            payload = {"publisher": name, "eras": eras, "total_years": end - start, "era_count": len(eras)}
+            return make_encoded_response(payload, len(eras))
+
+        payload = {
+            "publishers": list(timeline),
+            "all_data": timeline,
+            "summary": {
+                name: {"era_count": len(eras), "year_span": "-".join(map(str, span_years(eras)))}
+                for name, eras in timeline.items()
+            },
+        }
+        return make_encoded_response(payload, sum(len(eras) for eras in timeline.values()))
+
+timeline_repository = TimelineRepository()
@@ -5,10 +5,10 @@ from datetime import datetime
 import os
 from pathlib import Path
 
-# Database URL for SQLite - store in the centralized Database directory
+# Database URL for SQLite - store in the centralized Database directory unless DATABASE_URL is set
 database_dir = Path(__file__).parent.parent.parent / "Database"
 database_path = database_dir / "comics_auth.db"
-DATABASE_URL = f"sqlite:///{database_path}"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{database_path}")
 
 # Create engine
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
@@ -1,7 +1,7 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from database import get_db, User
+from database import SessionLocal, get_db, User
 from auth import verify_token
 from crud import get_user_by_username, is_token_blacklisted
 from typing import Optional
@@ -69,3 +69,16 @@ def get_token_from_request(
 ) -> str:
     """Extract token from request"""
     return credentials.credentials
+
+def admin_token_error(token: Optional[str]) -> Optional[HTTPException]:
+    """Run a bearer token through get_current_admin_user outside a route, for middleware"""
+    if token is None:
+        return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authenticated")
+    db = SessionLocal()
+    try:
+        get_current_admin_user(get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db))
+    except HTTPException as error:
+        return error
+    finally:
+        db.close()
+    return None
@@ -1,11 +1,17 @@
+from anyio import to_thread
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
-from database import create_tables, get_db
+from database import create_tables, engine, get_db
 from routers import auth, admin
-from dependencies import get_current_user
+from dependencies import admin_token_error, get_current_user
+from metrics import QUERY_METRICS, instrument_engine
+import shared_modules  # puts Backend/shared on sys.path
+from request_metrics import MetricsMiddleware, metrics_response
+from sampling_profiler import ProfilingMiddleware, profile_dir, start_continuous_profiler
 import uvicorn
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,6 +24,17 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Where this service's profiles are written; continuous ones go in its continuous/ subdirectory
+PROFILE_DIR = profile_dir(Path(__file__).parent)
+
+async def authorize_profiling(token):
+    error = await to_thread.run_sync(admin_token_error, token)
+    return None if error is None else (error.status_code, error.detail)
+
+# Admins can profile a single request with the X-Profile header or ?profile= flag.
+# Added before CORS so CORS headers reach profile responses too
+app.add_middleware(ProfilingMiddleware, authorize=authorize_profiling, directory=PROFILE_DIR)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -27,10 +44,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create database tables on startup
+# Outermost, so latencies include CORS preflights and the response size is what was sent
+app.add_middleware(MetricsMiddleware, routes=app.routes, queries=QUERY_METRICS)
+instrument_engine(engine)
+
+# Handlers are plain functions run in AnyIO's worker threads, so SQLAlchemy queries and
+# bcrypt hashing never block the event loop; this many can be in flight at once
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+# Create database tables, size the threadpool and start continuous profiling if enabled on startup
 @app.on_event("startup")
 async def startup_event():
     create_tables()
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    app.state.continuous_profiler = start_continuous_profiler(PROFILE_DIR)
+
+@app.on_event("shutdown")
+def stop_continuous_profiler():
+    if app.state.continuous_profiler is not None:
+        app.state.continuous_profiler.stop()
 
 # Include routers
 app.include_router(auth.router)
@@ -51,9 +83,14 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "oauth-proxy"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
+
 # Protected test endpoint
 @app.get("/protected")
-async def protected_endpoint(current_user = Depends(get_current_user)):
+def protected_endpoint(current_user = Depends(get_current_user)):
     return {
         "message": "This is a protected endpoint",
         "user": current_user.username,
@@ -0,0 +1,40 @@
+import time
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import shared_modules  # puts Backend/shared on sys.path
+from request_metrics import QueryMetrics
+
+# Query metrics keep the sqlalchemy_ names this service has always exported
+QUERY_METRICS = QueryMetrics("sqlalchemy", "SQLAlchemy", "SQLAlchemy cursor executes")
+
+# bcrypt is deliberately slow, so its share of login and registration time is worth watching
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds", "Time spent hashing or verifying a password with bcrypt",
+    ["operation"], buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+def instrument_engine(engine: Engine):
+    """Time every statement the engine runs, overall and per request, failed ones included"""
+
+    # Start times are keyed by DBAPI cursor, so an error outside an execute (e.g. while
+    # fetching) finds nothing to pop instead of taking another statement's entry
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", {})[id(cursor)] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        QUERY_METRICS.record(time.perf_counter() - conn.info["query_started_at"].pop(id(cursor)))
+
+    # after_cursor_execute doesn't run when the execute raises
+    @event.listens_for(engine, "handle_error")
+    def record_failed_query(context):
+        if context.connection is None or context.execution_context is None:
+            return
+        cursor = context.execution_context.cursor
+        started_at = context.connection.info.get("query_started_at", {}).pop(id(cursor), None)
+        if started_at is not None:
+            QUERY_METRICS.record(time.perf_counter() - started_at)
@@ -9,7 +9,7 @@ from dependencies import get_current_admin_user
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.get("/users", response_model=List[UserResponse])
-async def list_users(
+def list_users(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
@@ -20,7 +20,7 @@ async def list_users(
     return users
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-async def get_user(
+def get_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin_user)
@@ -35,7 +35,7 @@ async def get_user(
     return user
 
 @router.post("/users", response_model=UserResponse)
-async def create_admin_user(
+def create_admin_user(
     user: AdminUserCreate,
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin_user)
@@ -67,7 +67,7 @@ async def create_admin_user(
     return db_user
 
 @router.put("/users/{user_id}", response_model=UserResponse)
-async def update_user_admin(
+def update_user_admin(
     user_id: int,
     user_update: UserUpdate,
     db: Session = Depends(get_db),
@@ -83,7 +83,7 @@ async def update_user_admin(
     return db_user
 
 @router.delete("/users/{user_id}")
-async def delete_user_admin(
+def delete_user_admin(
     user_id: int,
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin_user)
@@ -105,7 +105,7 @@ async def delete_user_admin(
     return {"message": "User deleted successfully"}
 
 @router.get("/stats")
-async def get_admin_stats(
+def get_admin_stats(
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin_user)
 ):
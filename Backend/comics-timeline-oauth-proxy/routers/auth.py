@@ -12,7 +12,7 @@ from email_service import create_verification_token, send_verification_email, ge
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=EmailVerificationResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+def register(user: UserCreate, db: Session = Depends(get_db)):
     """Register a new user and send verification email"""
     # Check if username already exists
     if get_user_by_username(db, user.username):
@@ -41,7 +41,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     }
 
 @router.post("/login", response_model=Token)
-async def login(user_login: UserLogin, db: Session = Depends(get_db)):
+def login(user_login: UserLogin, db: Session = Depends(get_db)):
     """Login user and return access token"""
     user = authenticate_user(db, user_login.username, user_login.password)
     if not user:
@@ -80,7 +80,7 @@ async def login(user_login: UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.post("/logout")
-async def logout(
+def logout(
     token: str = Depends(get_token_from_request),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
@@ -90,12 +90,12 @@ async def logout(
     return {"message": "Successfully logged out"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user = Depends(get_current_user)):
+def get_current_user_info(current_user = Depends(get_current_user)):
     """Get current user information"""
     return current_user
 
 @router.post("/change-password")
-async def change_user_password(
+def change_user_password(
     password_change: PasswordChange,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -118,7 +118,7 @@ async def change_user_password(
         )
 
 @router.get("/verify-email")
-async def verify_email(token: str, db: Session = Depends(get_db)):
+def verify_email(token: str, db: Session = Depends(get_db)):
     """Verify email address with token"""
     # Get verification token
     verification = get_verification_token(db, token)
@@ -163,7 +163,7 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
         )
 
 @router.post("/resend-verification")
-async def resend_verification_email(email: str, db: Session = Depends(get_db)):
+def resend_verification_email(email: str, db: Session = Depends(get_db)):
     """Resend verification email"""
     user = get_user_by_email(db, email)
     if not user:
@@ -183,7 +183,7 @@ async def resend_verification_email(email: str, db: Session = Depends(get_db)):
     return {"message": "Verification email sent. Please check your inbox."}
 
 @router.get("/verify-token")
-async def verify_token_endpoint(current_user = Depends(get_current_user)):
+def verify_token_endpoint(current_user = Depends(get_current_user)):
     """Verify if token is valid"""
     return {
         "valid": True,
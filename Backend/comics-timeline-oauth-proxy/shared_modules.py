@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+# Modules both services use (request metrics, the sampling profiler) live in Backend/shared
+SHARED_DIR = Path(__file__).parent.parent / "shared"
+
+# Every module importing one of them imports this first, so import order doesn't matter
+if str(SHARED_DIR) not in sys.path:
+    sys.path.insert(0, str(SHARED_DIR))
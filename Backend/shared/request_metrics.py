@@ -0,0 +1,121 @@
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+from starlette.routing import BaseRoute, Match
+
+# Requests to paths no route matches share one label, so scanners can't grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+# Not measured, so scrapes don't show up in their own numbers
+UNMEASURED_PATHS = {"/metrics"}
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last body byte sent",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes", "Response body size as sent, after any compression",
+    ["method", "route"], buckets=SIZE_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled", ["method", "route"])
+
+class QueryTotals:
+    """Queries run by one request, gathered across the threads that handle it"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+# Set by MetricsMiddleware; worker threads see the same object through the copied context
+request_queries: ContextVar[Optional[QueryTotals]] = ContextVar("request_queries", default=None)
+
+class QueryMetrics:
+    """Query time overall and per request, named after the database layer a service times"""
+
+    def __init__(self, prefix: str, layer: str, timed: str):
+        self.seconds = Histogram(f"{prefix}_query_duration_seconds", f"Time in {timed}", buckets=LATENCY_BUCKETS)
+        self.per_request = Histogram(
+            f"{prefix}_queries_per_request", f"{layer} queries run while handling a request",
+            ["route"], buckets=QUERY_COUNT_BUCKETS,
+        )
+        self.seconds_per_request = Histogram(
+            f"{prefix}_query_seconds_per_request", f"Total {layer} query time while handling a request",
+            ["route"], buckets=LATENCY_BUCKETS,
+        )
+
+    def record(self, seconds: float):
+        self.seconds.observe(seconds)
+        totals = request_queries.get()
+        if totals is not None:
+            totals.count += 1
+            totals.seconds += seconds
+
+    def observe_request(self, route: str, totals: QueryTotals):
+        self.per_request.labels(route).observe(totals.count)
+        self.seconds_per_request.labels(route).observe(totals.seconds)
+
+def route_template(routes: List[BaseRoute], scope) -> str:
+    """Path template of the route a request will hit, e.g. /books/{book_id}/overlaps"""
+    partial = UNMATCHED_ROUTE
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+        if match == Match.PARTIAL and partial == UNMATCHED_ROUTE:
+            partial = getattr(route, "path", UNMATCHED_ROUTE)  # Right path, wrong method (405)
+    return partial
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, size, in-flight count and queries per route
+
+    Routes are resolved up front from the app's route table, so requests answered
+    before routing (response cache hits, CORS preflights) still get their route.
+    """
+
+    def __init__(self, app, routes: List[BaseRoute], queries: QueryMetrics):
+        self.app = app
+        self.routes = routes
+        self.queries = queries
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNMEASURED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(self.routes, scope)
+        status = 500
+        size = 0
+        totals = QueryTotals()
+        token = request_queries.set(totals)
+
+        async def measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, measure)
+        finally:
+            REQUEST_SECONDS.labels(method, route, str(status)).observe(time.perf_counter() - start)
+            in_flight.dec()
+            RESPONSE_BYTES.labels(method, route).observe(size)
+            self.queries.observe_request(route, totals)
+            request_queries.reset(token)
+
+def metrics_response() -> Response:
+    """Every registered metric in the Prometheus text format"""
+    return Response(generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
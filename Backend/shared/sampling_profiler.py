@@ -0,0 +1,276 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from anyio.to_thread import run_sync
+
+# Time between stack samples while a single request is profiled
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+
+# Samples per second taken all the time in the background; 0 turns continuous profiling off
+CONTINUOUS_PROFILE_HZ = float(os.getenv("CONTINUOUS_PROFILE_HZ", "0"))
+
+# Each continuous profile file covers this many seconds
+CONTINUOUS_PROFILE_WINDOW_SECONDS = float(os.getenv("CONTINUOUS_PROFILE_WINDOW_SECONDS", "60"))
+
+# Older continuous profiles are deleted past this many
+CONTINUOUS_PROFILE_KEEP = int(os.getenv("CONTINUOUS_PROFILE_KEEP", "1440"))
+
+# Header or query flag asking for a request to be profiled: "return" answers with the
+# profile instead of the response, a true value (1, true, yes, on) stores it in the profile
+# directory, and anything else (0, false, ...) leaves the request unprofiled
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "profile"
+RETURN_PROFILE, STORE_PROFILE = "return", "store"
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+# A thread blocked in these modules, called straight from a worker or event loop's main
+# loop, is waiting for work rather than doing any (a handler waiting on a lock still counts)
+IDLE_MODULES = {"threading.py", "queue.py", "selectors.py"}
+IDLE_CALLERS = {"run", "_run", "_run_once"}
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+def profile_dir(service_dir: Path) -> Path:
+    """Where a service writes profiles: PROFILE_DIR, or else the service's own profiles/ directory"""
+    return Path(os.getenv("PROFILE_DIR", str(service_dir / "profiles")))
+
+def parse_profile_flag(value: str) -> Optional[str]:
+    value = value.strip().lower()
+    if value == RETURN_PROFILE:
+        return RETURN_PROFILE
+    return STORE_PROFILE if value in TRUE_VALUES else None
+
+def profile_mode(scope) -> Optional[str]:
+    """The profiling a request asks for (RETURN_PROFILE or STORE_PROFILE), or None"""
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return parse_profile_flag(value.decode("latin-1"))
+    for name, value in parse_qsl(scope.get("query_string", b"").decode("latin-1")):
+        if name == PROFILE_QUERY_PARAM:
+            return parse_profile_flag(value)
+    return None
+
+def is_idle(frame) -> bool:
+    if os.path.basename(frame.f_code.co_filename) not in IDLE_MODULES:
+        return False
+    while frame is not None and os.path.basename(frame.f_code.co_filename) in IDLE_MODULES:
+        frame = frame.f_back
+    return frame is None or frame.f_code.co_name in IDLE_CALLERS
+
+def bearer_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token.strip() if scheme.lower() == "bearer" and token.strip() else None
+    return None
+
+class StackSampler:
+    """Samples the Python stacks of every busy thread at a fixed interval
+
+    Handlers run in AnyIO's worker threads and middleware on the event loop,
+    so one request's work spans several threads; each busy thread gets its own
+    profile. Idle threads are skipped, but a request running alongside others
+    will share worker profiles with them.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.frame_indexes: Dict[Tuple[str, str, int], int] = {}
+        self.frames: List[Dict] = []
+        self.threads: Dict[int, Tuple[List[List[int]], List[float]]] = {}
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack sampler", daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self.sample(now - last)
+            last = now
+            self.after_sample(now)
+
+    def after_sample(self, now: float):
+        pass
+
+    def frame_index(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self.frame_indexes.get(key)
+        if index is None:
+            index = self.frame_indexes[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def sample(self, weight: float):
+        own = threading.get_ident()
+        with self._lock:
+            for ident, frame in sys._current_frames().items():
+                if ident == own or is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self.frame_index(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                samples, weights = self.threads.setdefault(ident, ([], []))
+                samples.append(stack)
+                weights.append(weight)
+
+    def take(self, name: str) -> Dict:
+        """Speedscope document of everything sampled so far, starting afresh"""
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        with self._lock:
+            duration = time.perf_counter() - self.started_at
+            profiles = [
+                {
+                    "type": "sampled",
+                    "name": f"{thread_names.get(ident, 'thread')} ({ident})",
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(duration, 6),
+                    "samples": samples,
+                    "weights": [round(weight, 6) for weight in weights],
+                }
+                for ident, (samples, weights) in self.threads.items()
+            ]
+            document = {
+                "$schema": SPEEDSCOPE_SCHEMA,
+                "name": name,
+                "exporter": "comics-timeline-profiling",
+                "activeProfileIndex": 0,
+                "shared": {"frames": self.frames},
+                "profiles": profiles,
+            }
+            self.frame_indexes, self.frames, self.threads = {}, [], {}
+            self.started_at = time.perf_counter()
+        return document
+
+def write_profile(path: Path, document: Dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, separators=(",", ":")), encoding="utf-8")
+
+class ContinuousProfiler(StackSampler):
+    """Low-rate sampler writing one speedscope file per window, for comparing over time"""
+
+    def __init__(self, hz: float, window: float, directory: Path, keep: int):
+        super().__init__(1 / hz)
+        self.window = window
+        self.directory = directory
+        self.keep = keep
+
+    def after_sample(self, now: float):
+        if now - self.started_at >= self.window:
+            self.flush()
+
+    def flush(self):
+        if not self.threads:
+            self.started_at = time.perf_counter()
+            return
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        write_profile(self.directory / f"{stamp}.speedscope.json", self.take(f"continuous {stamp}"))
+        for old in sorted(self.directory.glob("*.speedscope.json"))[:-self.keep]:
+            old.unlink(missing_ok=True)
+
+    def stop(self):
+        super().stop()
+        self.flush()
+
+def start_continuous_profiler(directory: Path) -> Optional[ContinuousProfiler]:
+    """Start background profiling into directory/continuous if CONTINUOUS_PROFILE_HZ is set"""
+    if CONTINUOUS_PROFILE_HZ <= 0:
+        return None
+    profiler = ContinuousProfiler(CONTINUOUS_PROFILE_HZ, CONTINUOUS_PROFILE_WINDOW_SECONDS,
+                                  directory / "continuous", CONTINUOUS_PROFILE_KEEP)
+    profiler.start()
+    return profiler
+
+def profile_name(scope) -> str:
+    path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{path}-{uuid.uuid4().hex[:6]}"
+
+async def send_json(send, status: int, body: Dict, headers: List[Tuple[bytes, bytes]] = ()):
+    payload = json.dumps(body).encode()
+    await send({
+        "type": "http.response.start", "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode()),
+                    *headers],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+# Given a request's bearer token (or None), returns None for an admin or (status, detail) otherwise
+Authorize = Callable[[Optional[str]], Awaitable[Optional[Tuple[int, str]]]]
+
+class ProfilingMiddleware:
+    """ASGI middleware running admin requests flagged with X-Profile or ?profile= under the sampler
+
+    `X-Profile: return` answers with the speedscope profile in place of the
+    response (its status is in X-Profiled-Status); a true value (1, true, yes,
+    on) stores the profile in the service's profile directory and names the
+    file in the X-Profile-Id header. Each service supplies its own authorize hook.
+    """
+
+    def __init__(self, app, authorize: Authorize, directory: Path,
+                 interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.app = app
+        self.authorize = authorize
+        self.directory = directory
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        mode = profile_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        error = await self.authorize(bearer_token(scope))
+        if error is not None:
+            status, detail = error
+            await send_json(send, status, {"detail": detail})
+            return
+
+        name = profile_name(scope)
+        sampler = StackSampler(self.interval)
+        if mode == RETURN_PROFILE:
+            status = 500
+
+            async def discard(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+
+            sampler.start()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                await run_sync(sampler.stop)  # Joins the sampler thread, so not on the event loop
+            await send_json(send, 200, sampler.take(name), [(b"x-profiled-status", str(status).encode())])
+            return
+
+        async def tag(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", name.encode())]
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, tag)
+        finally:
+            await run_sync(sampler.stop)
+            await run_sync(write_profile, self.directory / f"{name}.speedscope.json", sampler.take(name))
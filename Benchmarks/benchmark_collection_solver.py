@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Collected Edition Solver Benchmark for Comics Timeline
+
+Builds a synthetic era (thousands of issues, hundreds of overlapping books)
+and times the reading-list solver in the backend against it, covering the
+whole era with the greedy solver and a small reading list with the exact one.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "Backend" / "comics-timeline-backend"
+sys.path.insert(0, str(backend_dir))
+
+from collection_solver import CandidateBook, solve_reading_list
+
+def build_synthetic_era(issue_count: int, book_count: int, seed: int):
+    """Books are runs of consecutive issues, like trades and omnibuses of one series"""
+    rng = random.Random(seed)
+    books = []
+    for book_id in range(book_count):
+        length = rng.choice((6, 12, 25, 50, 100))
+        first = rng.randrange(0, max(1, issue_count - length))
+        bitset = ((1 << length) - 1) << first
+        books.append(CandidateBook(book_id, f"Synthetic Book {book_id}", bitset, round(length * rng.uniform(0.5, 1.5), 2)))
+
+    # Single-issue books make sure every issue can be covered
+    for dense_id in range(issue_count):
+        books.append(CandidateBook(book_count + dense_id, f"Single Issue {dense_id}", 1 << dense_id, 4.99))
+    return books
+
+def time_solve(label: str, target: int, books, exact, repeats: int):
+    """Run the solver repeats times and print the best and mean wall time"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chosen, _, used_exact = solve_reading_list(target, books, exact=exact)
+        timings.append(time.perf_counter() - start)
+
+    cost = sum(books[index].cost for index in chosen)
+    print(f"✓ {label:<28} {min(timings) * 1000:8.2f} ms best  {sum(timings) / len(timings) * 1000:8.2f} ms mean  "
+          f"{len(chosen)} books, cost {cost:.2f}{' (exact)' if used_exact else ''}")
+
+def run_benchmark(issue_count: int, book_count: int, repeats: int, seed: int):
+    """Time whole-era and small reading lists"""
+
+    print("Comics Timeline Collection Solver Benchmark")
+    print("=" * 40)
+
+    books = build_synthetic_era(issue_count, book_count, seed)
+    print(f"✓ {issue_count:,} issues, {len(books):,} candidate books")
+
+    whole_era = (1 << issue_count) - 1
+    time_solve("whole era (greedy)", whole_era, books, False, repeats)
+
+    rng = random.Random(seed + 1)
+    start = rng.randrange(0, issue_count - 40)
+    small_list = 0
+    for dense_id in rng.sample(range(start, start + 40), 15):
+        small_list |= 1 << dense_id
+    time_solve("15-issue list (greedy)", small_list, books, False, repeats)
+    time_solve("15-issue list (auto)", small_list, books, None, repeats)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the collected edition solver")
+    parser.add_argument('--issues', type=int, default=5000, help="Number of issues in the era")
+    parser.add_argument('--books', type=int, default=500, help="Number of multi-issue books in the era")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed runs per scenario")
+    parser.add_argument('--seed', type=int, default=52, help="Random seed for the synthetic era")
+    args = parser.parse_args()
+
+    run_benchmark(args.issues, args.books, args.repeats, args.seed)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Handler Concurrency Benchmark for Comics Timeline
+
+Both FastAPI services use synchronous database drivers (sqlite3 in the
+backend, SQLAlchemy in the OAuth proxy). An `async def` handler runs those
+calls on the event loop, so one slow query stalls every other request,
+while a plain `def` handler is run in the threadpool and the loop stays free.
+
+This benchmark serves the same slow SQLite query both ways, drives it over
+ASGI with a rising number of in-flight requests, and meanwhile times a cheap
+health probe. The query spends most of its time waiting inside SQLite (a
+registered wait_ms() function stands in for cold pages and lock waits), the
+way slow queries in production mostly do. With blocking handlers the probe
+waits behind every queued query; with threadpool handlers its p99 stays flat
+as the in-flight count rises, up to the threadpool size.
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+# Add the Database directory to the Python path
+database_dir = Path(__file__).parent.parent / "Database"
+sys.path.insert(0, str(database_dir))
+
+from timeline_db import ConnectionPool, connect
+
+# A little SQLite work plus a wait that stands in for disk reads and lock contention
+SLOW_QUERY = '''
+    WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < ?)
+    SELECT SUM(n % 7) + wait_ms(?) FROM numbers
+'''
+
+def wait_ms(milliseconds: float) -> int:
+    time.sleep(milliseconds / 1000)
+    return 0
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def create_app(pool: ConnectionPool, rows: int, wait: float) -> FastAPI:
+    """App with the slow query served by a blocking handler and by a threadpool handler"""
+    app = FastAPI()
+
+    @app.get("/blocking")
+    async def blocking_query():
+        with pool.connection() as conn:
+            return {"total": conn.execute(SLOW_QUERY, (rows, wait)).fetchone()[0]}
+
+    @app.get("/threadpool")
+    def threadpool_query():
+        with pool.connection() as conn:
+            return {"total": conn.execute(SLOW_QUERY, (rows, wait)).fetchone()[0]}
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    return app
+
+async def run_level(client: httpx.AsyncClient, path: str, in_flight: int, duration: float, probe_interval: float):
+    """Keep in_flight slow requests running while probing /health, returning both latency lists
+
+    Probes are sent on a fixed schedule and timed from when they were due, so a
+    stalled event loop shows up as probe latency instead of as fewer probes.
+    """
+    stop = time.perf_counter() + duration
+    query_latencies, probe_latencies = [], []
+
+    async def worker():
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            (await client.get(path)).raise_for_status()
+            query_latencies.append(time.perf_counter() - start)
+
+    async def probe(due: float):
+        (await client.get("/health")).raise_for_status()
+        probe_latencies.append(time.perf_counter() - due)
+
+    async def prober():
+        probes = []
+        due = time.perf_counter()
+        while due < stop:
+            probes.append(asyncio.create_task(probe(due)))
+            due += probe_interval
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        await asyncio.gather(*probes)
+
+    await asyncio.gather(prober(), *(worker() for _ in range(in_flight)))
+    return sorted(query_latencies), sorted(probe_latencies)
+
+async def run_benchmark(levels, rows: int, wait: float, duration: float, probe_interval: float):
+    """Compare blocking and threadpool handlers at each concurrency level"""
+
+    print("Comics Timeline Handler Concurrency Benchmark")
+    print("=" * 45)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "concurrency.db"
+        connect(database_path).close()
+        pool = ConnectionPool(database_path, read_only=True, max_idle=max(levels))
+        connections = [pool.acquire() for _ in range(max(levels))]
+        for conn in connections:
+            conn.create_function("wait_ms", 1, wait_ms)
+            pool.release(conn)
+        app = create_app(pool, rows, wait)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            await client.get("/threadpool")  # Warm up the pool and the threadpool
+            for label, path in (("async def", "/blocking"), ("def", "/threadpool")):
+                print(f"\n{label} handlers")
+                for in_flight in levels:
+                    queries, probes = await run_level(client, path, in_flight, duration, probe_interval)
+                    print(f"✓ {in_flight:3} in flight  {len(queries) / duration:7,.0f} queries/s  "
+                          f"query p99 {percentile(queries, 0.99) * 1000:8.2f} ms  "
+                          f"probe p50 {percentile(probes, 0.50) * 1000:7.2f} ms  "
+                          f"probe p99 {percentile(probes, 0.99) * 1000:7.2f} ms")
+        pool.close_all()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark blocking vs threadpool database handlers")
+    parser.add_argument('--levels', type=int, nargs="+", default=[1, 4, 16, 32], help="In-flight query counts")
+    parser.add_argument('--rows', type=int, default=200, help="Rows the slow query generates")
+    parser.add_argument('--wait-ms', type=float, default=100.0, help="Milliseconds the slow query waits in SQLite")
+    parser.add_argument('--duration', type=float, default=3.0, help="Seconds per concurrency level")
+    parser.add_argument('--probe-interval', type=float, default=0.01, help="Seconds between health probes")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.levels, args.rows, args.wait_ms, args.duration, args.probe_interval))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Interval Index Benchmark for Comics Timeline
+
+Builds synthetic timeline intervals (long era-like spans, shorter
+sub-era/run spans and single-month issue dates) and times the backend's
+interval index against the linear scans it replaced, for "active in one
+year" stabbing queries and multi-year overlap queries.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "Backend" / "comics-timeline-backend"
+sys.path.insert(0, str(backend_dir))
+
+from interval_index import IntervalIndex, month_point, year_end, year_start
+
+FIRST_YEAR = 1938
+LAST_YEAR = 2025
+
+def build_synthetic_intervals(count: int, seed: int):
+    """Mostly issue dates, with a share of multi-year runs and a few decade-long eras"""
+    rng = random.Random(seed)
+    intervals = []
+    for item in range(count):
+        kind = rng.random()
+        start_year = rng.randint(FIRST_YEAR, LAST_YEAR)
+        if kind < 0.01:
+            length = rng.randint(5, 20)
+        elif kind < 0.2:
+            length = rng.randint(0, 4)
+        else:
+            point = month_point(start_year, rng.randint(1, 12))
+            intervals.append((point, point, item))
+            continue
+        intervals.append((year_start(start_year), year_end(min(start_year + length, LAST_YEAR)), item))
+    return intervals
+
+def linear_overlapping(intervals, start: int, end: int):
+    return [item for interval_start, interval_end, item in intervals if interval_start <= end and interval_end >= start]
+
+def time_queries(label: str, query, windows):
+    """Run query over every window and print the median and p99 latency"""
+    timings = []
+    found = 0
+    for start, end in windows:
+        began = time.perf_counter()
+        found += len(query(start, end))
+        timings.append(time.perf_counter() - began)
+
+    timings.sort()
+    print(f"✓ {label:<36} median {statistics.median(timings) * 1000:8.3f} ms  "
+          f"p99 {timings[int(0.99 * (len(timings) - 1))] * 1000:8.3f} ms  ({found / len(windows):,.0f} hits/query)")
+
+def run_benchmark(count: int, queries: int, seed: int):
+    """Compare linear scans with the interval index for stabbing and overlap queries"""
+
+    print("Comics Timeline Interval Index Benchmark")
+    print("=" * 40)
+
+    intervals = build_synthetic_intervals(count, seed)
+    start = time.perf_counter()
+    index = IntervalIndex(intervals)
+    print(f"✓ Indexed {index.size:,} intervals in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(seed + 1)
+    stabbing = [(point, point) for point in
+                (month_point(rng.randint(FIRST_YEAR, LAST_YEAR), rng.randint(1, 12)) for _ in range(queries))]
+    one_year = [(year_start(year), year_end(year)) for year in
+                (rng.randint(FIRST_YEAR, LAST_YEAR) for _ in range(queries))]
+    decade = [(year_start(year), year_end(year + 9)) for year in
+              (rng.randint(FIRST_YEAR, LAST_YEAR - 9) for _ in range(queries))]
+
+    # Spot check that both approaches agree before timing them
+    for window in stabbing[:10] + one_year[:10] + decade[:10]:
+        if sorted(index.overlapping(*window)) != sorted(linear_overlapping(intervals, *window)):
+            print(f"✗ Index and linear scan disagree for window {window}")
+            sys.exit(1)
+
+    for label, windows in (("active in a month", stabbing), ("active in a year", one_year),
+                           ("overlapping a decade", decade)):
+        time_queries(f"linear scan, {label}", lambda lo, hi: linear_overlapping(intervals, lo, hi), windows)
+        time_queries(f"interval index, {label}", index.overlapping, windows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the timeline interval index")
+    parser.add_argument('--intervals', type=int, default=100_000, help="Number of synthetic intervals")
+    parser.add_argument('--queries', type=int, default=200, help="Queries timed per scenario")
+    parser.add_argument('--seed', type=int, default=38, help="Random seed for the synthetic intervals")
+    args = parser.parse_args()
+
+    run_benchmark(args.intervals, args.queries, args.seed)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Migration Benchmark for Comics Timeline JSON Files
+
+Generates a synthetic era file in the real sub-era -> book -> ISSUES shape and
+loads it into a scratch timeline database twice: once with a per-row
+SELECT/INSERT loader and once with the cached, batched TimelineLoader in
+migrate_json_data.py. With --files it also times the parse stage over several
+era files, serially and in the process pool.
+
+Measured with SQLite 3.40.1 on one core, 100 issues per book:
+  100k book issues    legacy  1.6 s   batched  0.9 s   1.8x
+  1M book issues      legacy 47.7 s   batched 12.9 s   3.7x
+The gap grows with size, as per-row round trips dominate the legacy loader.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the Database directory to the Python path
+database_dir = Path(__file__).parent.parent / "Database"
+sys.path.insert(0, str(database_dir))
+
+from setup_timeline_database import create_timeline_tables, insert_publishers
+from migrate_json_data import (
+    TimelineLoader, canonical_issue_key, file_content_hash, iter_era_books, parse_era_file,
+    parse_era_files, parse_issue_string,
+)
+
+def write_synthetic_era_file(file_path: Path, issue_count: int, issues_per_book: int):
+    """Write an era file whose books hold issue_count issues in total
+    
+    Consecutive books overlap by half their issues, like collected editions
+    that reprint part of the previous volume.
+    """
+    book_count = max(1, issue_count // issues_per_book)
+    step = max(1, issues_per_book // 2)
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('{"synthetic age": {')
+        for book_index in range(book_count):
+            first = book_index * step
+            series = f"Synthetic Series {first // 500}"
+            book = {
+                "TYPE": "book",
+                "ISSUES": [f"{series} (1938) #{first % 500 + n + 1}" for n in range(issues_per_book)],
+                "EQUIVALENTS": [],
+                "CHILDREN": [],
+                "PRH": "",
+                "IST": "",
+                "earliest_issue": {"issue": f"{series} (1938) #{first % 500 + 1}",
+                                   "publish_year": 1938 + book_index % 48, "publish_month": 1},
+            }
+            if book_index:
+                f.write(",")
+            f.write(f"{json.dumps(f'Synthetic Book {book_index}')}: {json.dumps(book)}")
+        f.write("}}")
+
+def create_scratch_database(database_path: Path):
+    """Create an empty timeline database with a single DC era"""
+    conn = sqlite3.connect(database_path)
+    cursor = conn.cursor()
+    create_timeline_tables(cursor)
+    insert_publishers(cursor)
+    cursor.execute("SELECT id FROM publishers WHERE name = 'DC Comics'")
+    dc_id = cursor.fetchone()[0]
+    cursor.execute('''
+        INSERT INTO eras (publisher_id, title, start_year, end_year, display_order)
+        VALUES (?, 'Synthetic', 1938, 1985, 1)
+    ''', (dc_id,))
+    era_id = cursor.lastrowid
+    conn.commit()
+    return conn, dc_id, era_id
+
+def legacy_load_era_file(file_path: Path, era_id: int, publisher_id: int, cursor: sqlite3.Cursor):
+    """Per-row SELECT/INSERT loader used as the baseline"""
+    for _, title, book in iter_era_books(file_path):
+        cursor.execute("INSERT INTO books (era_id, title) VALUES (?, ?)", (era_id, title))
+        book_id = cursor.lastrowid
+
+        for position, issue_str in enumerate(book["ISSUES"]):
+            series_title, start_year, issue_number = parse_issue_string(issue_str)
+            cursor.execute('''
+                SELECT id FROM comic_series
+                WHERE publisher_id = ? AND title = ? AND start_year = ?
+            ''', (publisher_id, series_title, start_year))
+            result = cursor.fetchone()
+            if result:
+                series_id = result[0]
+            else:
+                cursor.execute('''
+                    INSERT INTO comic_series (publisher_id, era_id, title, start_year, series_type)
+                    VALUES (?, ?, ?, ?, 'ongoing')
+                ''', (publisher_id, era_id, series_title, start_year))
+                series_id = cursor.lastrowid
+
+            cursor.execute('''
+                INSERT OR IGNORE INTO comic_issues (series_id, issue_number, canonical_key)
+                VALUES (?, ?, ?)
+            ''', (series_id, issue_number, canonical_issue_key(series_title, start_year, issue_number)))
+            cursor.execute("SELECT id FROM comic_issues WHERE series_id = ? AND issue_number = ?",
+                           (series_id, issue_number))
+            cursor.execute("INSERT OR IGNORE INTO book_issues (book_id, issue_id, position) VALUES (?, ?, ?)",
+                           (book_id, cursor.fetchone()[0], position))
+
+def batched_load_era_file(file_path: Path, era_id: int, publisher_id: int, cursor: sqlite3.Cursor):
+    """Cached, batched loader from migrate_json_data.py"""
+    loader = TimelineLoader(cursor, publisher_id)
+    loader.load_era_file(file_path, era_id)
+    loader.finish()
+
+def run_parse_benchmark(tmp_dir: Path, file_count: int, issue_count: int, issues_per_book: int):
+    """Time the parse stage over several era files, serially and in the process pool"""
+    file_hashes = {}
+    for index in range(file_count):
+        era_file = tmp_dir / f"synthetic_era_{index}.json"
+        write_synthetic_era_file(era_file, issue_count, issues_per_book)
+        file_hashes[era_file] = file_content_hash(era_file)
+
+    start = time.perf_counter()
+    for era_file, content_hash in file_hashes.items():
+        parse_era_file(era_file, content_hash)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parse_era_files(file_hashes)
+    pooled = time.perf_counter() - start
+
+    print(f"\n✓ Parse {file_count} files of {issue_count:,} book issues")
+    print(f"✓ serial   {serial:8.2f}s")
+    print(f"✓ pooled   {pooled:8.2f}s  ({serial / pooled:.2f}x)")
+
+def run_benchmark(issue_count: int, issues_per_book: int, file_count: int = 0):
+    """Time both loaders against the same synthetic file"""
+
+    print("Comics Timeline Migration Benchmark")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        era_file = tmp_dir / "synthetic_era.json"
+
+        start = time.perf_counter()
+        write_synthetic_era_file(era_file, issue_count, issues_per_book)
+        print(f"✓ Generated {issue_count:,} book issues in {time.perf_counter() - start:.2f}s "
+              f"({era_file.stat().st_size / 1024 / 1024:.1f} MB)")
+
+        results = {}
+        for name, loader in (("legacy", legacy_load_era_file), ("batched", batched_load_era_file)):
+            conn, dc_id, era_id = create_scratch_database(tmp_dir / f"{name}.db")
+            cursor = conn.cursor()
+
+            start = time.perf_counter()
+            loader(era_file, era_id, dc_id, cursor)
+            conn.commit()
+            results[name] = time.perf_counter() - start
+
+            cursor.execute("SELECT (SELECT COUNT(*) FROM comic_issues), (SELECT COUNT(*) FROM book_issues)")
+            issues, links = cursor.fetchone()
+            print(f"✓ {name:<8} {results[name]:8.2f}s  ({issues:,} issues, {links:,} book issues loaded)")
+            conn.close()
+
+        print(f"\n✓ Speedup: {results['legacy'] / results['batched']:.2f}x")
+
+        if file_count:
+            run_parse_benchmark(tmp_dir, file_count, issue_count, issues_per_book)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the JSON era file migration")
+    parser.add_argument('--issues', type=int, default=1_000_000,
+                        help="Number of synthetic book issues to generate")
+    parser.add_argument('--issues-per-book', type=int, default=100,
+                        help="Number of issues in each synthetic book")
+    parser.add_argument('--files', type=int, default=0,
+                        help="Also time parsing this many era files serially and in parallel")
+    args = parser.parse_args()
+
+    run_benchmark(args.issues, args.issues_per_book, args.files)
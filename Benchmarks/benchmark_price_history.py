@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Price History Benchmark for Comics Timeline
+
+Fills a scratch database with years of daily price rows (issues x sources
+x days) and times the "price over time for one issue" chart query three
+ways: with the old single-column indexes, with the covering
+(issue_id, tracked_date, ...) index, and after price_rollups.py has
+compacted old history under the default retention policy.
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the Database directory to the Python path
+database_dir = Path(__file__).parent.parent / "Database"
+sys.path.insert(0, str(database_dir))
+
+from setup_timeline_database import create_timeline_tables, create_indexes, insert_publishers
+from price_rollups import price_history, run_rollups
+
+SOURCES = ("instocktrades", "amazon", "ebay", "mycomicshop")
+
+def create_scratch_database(database_path: Path, issue_count: int, source_count: int, days: int,
+                            today: date, seed: int) -> int:
+    """Create a timeline database with daily price rows, returning the number of rows"""
+    conn = sqlite3.connect(database_path)
+    cursor = conn.cursor()
+    create_timeline_tables(cursor)
+    insert_publishers(cursor)
+
+    cursor.execute("INSERT INTO comic_series (publisher_id, title, start_year) VALUES (1, 'Synthetic', 1938)")
+    cursor.executemany("INSERT INTO comic_issues (series_id, issue_number) VALUES (1, ?)",
+                       [(str(number),) for number in range(1, issue_count + 1)])
+
+    rng = random.Random(seed)
+    first_day = today - timedelta(days=days)
+    base_prices = [rng.uniform(5, 300) for _ in range(issue_count)]
+    row_count = 0
+    for offset in range(days):
+        tracked_date = (first_day + timedelta(days=offset)).isoformat()
+        rows = [
+            (issue_id, round(base_prices[issue_id - 1] * rng.uniform(0.9, 1.1), 2), source, tracked_date)
+            for issue_id in range(1, issue_count + 1)
+            for source in SOURCES[:source_count]
+        ]
+        cursor.executemany('''
+            INSERT INTO price_tracking (issue_id, condition, price, source, tracked_date)
+            VALUES (?, 'Near Mint', ?, ?, ?)
+        ''', rows)
+        row_count += len(rows)
+
+    # The indexes the table had before the covering index
+    cursor.execute("CREATE INDEX idx_price_tracking_issue ON price_tracking(issue_id)")
+    cursor.execute("CREATE INDEX idx_price_tracking_date ON price_tracking(tracked_date)")
+    conn.commit()
+    conn.close()
+    return row_count
+
+def time_queries(label: str, cursor: sqlite3.Cursor, issue_count: int, queries: int, seed: int):
+    """Time full-history chart queries for random issues"""
+    rng = random.Random(seed)
+    timings = []
+    points = 0
+    for _ in range(queries):
+        issue_id = rng.randint(1, issue_count)
+        start = time.perf_counter()
+        points = len(price_history(cursor, issue_id))
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(f"✓ {label:<26} median {statistics.median(timings) * 1000:7.2f} ms  "
+          f"p99 {timings[int(0.99 * (len(timings) - 1))] * 1000:7.2f} ms  ({points} points per issue)")
+
+def run_benchmark(issue_count: int, source_count: int, days: int, queries: int, seed: int):
+    """Compare chart queries before and after the covering index and rollups"""
+
+    print("Comics Timeline Price History Benchmark")
+    print("=" * 40)
+
+    today = date(2025, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "prices.db"
+
+        start = time.perf_counter()
+        row_count = create_scratch_database(database_path, issue_count, source_count, days, today, seed)
+        print(f"✓ Generated {row_count:,} daily price rows in {time.perf_counter() - start:.1f}s")
+
+        conn = sqlite3.connect(database_path)
+        cursor = conn.cursor()
+
+        time_queries("single-column indexes", cursor, issue_count, queries, seed)
+
+        start = time.perf_counter()
+        create_indexes(cursor)
+        conn.commit()
+        print(f"✓ Built covering index in {time.perf_counter() - start:.1f}s")
+        time_queries("covering index", cursor, issue_count, queries, seed)
+
+        start = time.perf_counter()
+        compacted = run_rollups(cursor, today=today)
+        conn.commit()
+        cursor.execute("SELECT (SELECT COUNT(*) FROM price_tracking), (SELECT COUNT(*) FROM price_rollups)")
+        daily_rows, rollup_rows = cursor.fetchone()
+        print(f"✓ Rolled up {compacted['daily']:,} daily rows in {time.perf_counter() - start:.1f}s "
+              f"({daily_rows:,} daily + {rollup_rows:,} rollup rows left)")
+        time_queries("covering index + rollups", cursor, issue_count, queries, seed)
+
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark price history chart queries")
+    parser.add_argument('--issues', type=int, default=1000, help="Number of issues with price history")
+    parser.add_argument('--sources', type=int, default=2, choices=range(1, len(SOURCES) + 1),
+                        help="Retailers scraped per issue per day")
+    parser.add_argument('--days', type=int, default=4 * 365, help="Days of daily price history")
+    parser.add_argument('--queries', type=int, default=200, help="Chart queries timed per scenario")
+    parser.add_argument('--seed', type=int, default=36, help="Random seed for the synthetic data")
+    args = parser.parse_args()
+
+    run_benchmark(args.issues, args.sources, args.days, args.queries, args.seed)
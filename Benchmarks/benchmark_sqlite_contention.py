@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+SQLite Read/Write Contention Benchmark for Comics Timeline
+
+Runs reader threads (like backend requests) against a scratch timeline
+database while a writer thread inserts price rows in small transactions
+(like a scrape job). The run is repeated with default sqlite3 connections
+and with the tuned, pooled connections from timeline_db.py, reporting
+reader throughput, latency percentiles, lock errors and writer commits.
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the Database directory to the Python path
+database_dir = Path(__file__).parent.parent / "Database"
+sys.path.insert(0, str(database_dir))
+
+from setup_timeline_database import create_timeline_tables, create_indexes, insert_publishers
+from timeline_db import ConnectionPool, connect
+
+READ_QUERY = '''
+    SELECT COUNT(*), MIN(price), MAX(price), AVG(price)
+    FROM price_tracking
+    WHERE issue_id = ?
+'''
+
+def create_scratch_database(database_path: Path, issue_count: int, price_rows: int, seed: int):
+    """Create a timeline database with issues and a price history to read"""
+    conn = sqlite3.connect(database_path)
+    cursor = conn.cursor()
+    create_timeline_tables(cursor)
+    insert_publishers(cursor)
+    create_indexes(cursor)
+
+    cursor.execute("INSERT INTO comic_series (publisher_id, title, start_year) VALUES (1, 'Synthetic', 1938)")
+    cursor.executemany("INSERT INTO comic_issues (series_id, issue_number) VALUES (1, ?)",
+                       [(str(number),) for number in range(1, issue_count + 1)])
+
+    rng = random.Random(seed)
+    cursor.executemany('''
+        INSERT INTO price_tracking (issue_id, condition, price, source, tracked_date)
+        VALUES (?, 'Near Mint', ?, 'synthetic', ?)
+    ''', [(rng.randint(1, issue_count), round(rng.uniform(1, 500), 2), f"20{rng.randint(10, 24)}-01-01")
+          for _ in range(price_rows)])
+    conn.commit()
+    conn.close()
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def run_scenario(label: str, open_reader, open_writer, issue_count: int, readers: int,
+                 duration: float, rows_per_commit: int, seed: int):
+    """Run readers against a concurrent writer for duration seconds"""
+    stop = threading.Event()
+    latencies = [[] for _ in range(readers)]
+    errors = [0] * readers
+    commits = [0]
+
+    def reader(index: int):
+        rng = random.Random(seed + index)
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with open_reader() as conn:
+                    conn.execute(READ_QUERY, (rng.randint(1, issue_count),)).fetchone()
+            except sqlite3.OperationalError:
+                errors[index] += 1
+                continue
+            latencies[index].append(time.perf_counter() - start)
+
+    def writer():
+        rng = random.Random(seed - 1)
+        conn = open_writer()
+        while not stop.is_set():
+            try:
+                conn.executemany('''
+                    INSERT INTO price_tracking (issue_id, condition, price, source, tracked_date)
+                    VALUES (?, 'Near Mint', ?, 'scrape', '2025-01-01')
+                ''', [(rng.randint(1, issue_count), round(rng.uniform(1, 500), 2)) for _ in range(rows_per_commit)])
+                conn.commit()
+                commits[0] += 1
+            except sqlite3.OperationalError:
+                conn.rollback()
+        conn.close()
+
+    threads = [threading.Thread(target=reader, args=(index,)) for index in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    all_latencies = sorted(latency for per_reader in latencies for latency in per_reader)
+    print(f"✓ {label:<8} {len(all_latencies) / duration:9,.0f} reads/s  "
+          f"p50 {percentile(all_latencies, 0.50) * 1000:7.2f} ms  "
+          f"p99 {percentile(all_latencies, 0.99) * 1000:7.2f} ms  "
+          f"max {percentile(all_latencies, 1.0) * 1000:8.2f} ms  "
+          f"{sum(errors)} lock errors  {commits[0] / duration:7,.0f} commits/s")
+
+def run_benchmark(issue_count: int, price_rows: int, readers: int, duration: float,
+                  rows_per_commit: int, seed: int):
+    """Compare default connections with the tuned connection layer"""
+
+    print("Comics Timeline SQLite Contention Benchmark")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Default settings: rollback journal, a new connection per request
+        default_path = Path(tmp) / "default.db"
+        create_scratch_database(default_path, issue_count, price_rows, seed)
+
+        class DefaultReader:
+            def __enter__(self):
+                self.conn = sqlite3.connect(default_path, check_same_thread=False)
+                return self.conn
+
+            def __exit__(self, *exc_info):
+                self.conn.close()
+
+        run_scenario("default", DefaultReader, lambda: sqlite3.connect(default_path, check_same_thread=False),
+                     issue_count, readers, duration, rows_per_commit, seed)
+
+        # Tuned settings: WAL, mmap, busy timeout and pooled connections
+        tuned_path = Path(tmp) / "tuned.db"
+        create_scratch_database(tuned_path, issue_count, price_rows, seed)
+        connect(tuned_path).close()  # Switch the file to WAL
+        pool = ConnectionPool(tuned_path, read_only=True)
+        run_scenario("tuned", pool.connection, lambda: connect(tuned_path),
+                     issue_count, readers, duration, rows_per_commit, seed)
+        pool.close_all()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent reads against a writing scrape job")
+    parser.add_argument('--issues', type=int, default=20000, help="Number of issues with price history")
+    parser.add_argument('--price-rows', type=int, default=200000, help="Initial price_tracking rows")
+    parser.add_argument('--readers', type=int, default=4, help="Concurrent reader threads")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per scenario")
+    parser.add_argument('--rows-per-commit', type=int, default=50, help="Price rows inserted per write transaction")
+    parser.add_argument('--seed', type=int, default=32, help="Random seed for the synthetic data")
+    args = parser.parse_args()
+
+    run_benchmark(args.issues, args.price_rows, args.readers, args.duration, args.rows_per_commit, args.seed)
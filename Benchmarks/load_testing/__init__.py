@@ -0,0 +1,13 @@
+"""
+Load Testing Suite for the Comics Timeline Services
+
+Drives the timeline backend and the OAuth proxy through scripted scenarios
+(browsing the timeline, searching, logging in and out, listing users as an
+admin) against synthetic data at several scales, either in-process over an
+ASGI transport or over real sockets against uvicorn, and reports p50, p95
+and p99 latency and requests per second against stored baselines.
+
+Run from the Benchmarks directory:
+
+    python -m load_testing --scales small medium --transports asgi socket
+"""
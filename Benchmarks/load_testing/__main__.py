@@ -0,0 +1,67 @@
+"""
+Run the load tests for every requested service, transport and scale
+
+Each combination runs in its own driver subprocess and writes its results to
+a scratch file; the results are then printed against baselines.json. The
+exit status is 1 when any scenario regressed, so the suite can gate a build.
+Baselines depend on the machine they were recorded on: re-record them with
+--save-baselines before comparing runs on a different machine.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .driver import SERVICE_DIRS
+from .report import DEFAULT_TOLERANCE, load_baselines, print_report, save_baselines
+from .seed import SCALES
+
+def run_load_tests(services, transports, scales, virtual_users: int, duration: float, seed: int):
+    """Run one driver subprocess per combination, returning their results in order"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            for service in services:
+                for transport in transports:
+                    output = Path(tmp) / f"{service}-{transport}-{scale}.json"
+                    print(f"Running {service} over {transport} at {scale} scale...")
+                    completed = subprocess.run(
+                        [sys.executable, "-m", "load_testing.driver", "--service", service, "--transport", transport,
+                         "--scale", scale, "--virtual-users", str(virtual_users), "--duration", str(duration),
+                         "--seed", str(seed), "--output", str(output)],
+                        cwd=Path(__file__).parent.parent, stdout=subprocess.DEVNULL,
+                    )
+                    if completed.returncode != 0:
+                        print(f"✗ {service} over {transport} at {scale} scale failed")
+                        continue
+                    results.append(json.loads(output.read_text(encoding="utf-8")))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the backend and OAuth proxy")
+    parser.add_argument('--services', nargs="+", choices=sorted(SERVICE_DIRS), default=sorted(SERVICE_DIRS))
+    parser.add_argument('--transports', nargs="+", choices=["asgi", "socket"], default=["asgi", "socket"])
+    parser.add_argument('--scales', nargs="+", choices=list(SCALES), default=["small"])
+    parser.add_argument('--virtual-users', type=int, default=8, help="Concurrent simulated users")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument('--seed', type=int, default=48, help="Random seed for data and scenarios")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Fraction p99 may rise or req/s fall before a scenario regresses")
+    parser.add_argument('--steps', action="store_true", help="Also print per-step latencies")
+    parser.add_argument('--save-baselines', action="store_true", help="Store this run as the new baselines")
+    args = parser.parse_args()
+
+    print("Comics Timeline Load Tests")
+    print("=" * 40)
+    results = run_load_tests(args.services, args.transports, args.scales, args.virtual_users, args.duration, args.seed)
+    regressions = print_report(results, load_baselines(), args.tolerance, args.steps)
+
+    if args.save_baselines:
+        save_baselines(results)
+        print("\n✓ Saved baselines")
+    elif regressions:
+        print(f"\n✗ Regressed scenarios: {regressions}")
+        sys.exit(1)
@@ -0,0 +1,161 @@
+"""
+Load test driver for a single service
+
+Seeds a scratch database, serves the service from it either in this process
+over an ASGI transport or from a uvicorn subprocess over a real socket, runs
+every scenario for the service with a pool of virtual users and writes the
+summaries as JSON. One service per process, since both apps are made of
+top-level modules with the same names (main, database, routers).
+
+    python -m load_testing.driver --service backend --transport asgi --scale small --output result.json
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Tuple
+
+import httpx
+
+from .report import summarize
+from .scenarios import SCENARIOS, SeedData, Session
+from .seed import SCALES, Scale, seed_auth_database, seed_timeline_database
+
+backend_dir = Path(__file__).parent.parent.parent / "Backend"
+SERVICE_DIRS = {
+    "backend": backend_dir / "comics-timeline-backend",
+    "oauth": backend_dir / "comics-timeline-oauth-proxy",
+}
+
+# How long a uvicorn subprocess gets to start answering /health
+STARTUP_TIMEOUT = 30.0
+
+SCENARIOS_BY_NAME = {name: scenario for scenarios in SCENARIOS.values() for name, scenario in scenarios.items()}
+
+def prepare_service(service: str, scale: Scale, seed: int, tmp_dir: Path) -> Tuple[Dict[str, int], SeedData]:
+    """Seed the service's database and point the service at it through its environment variable"""
+    if service == "backend":
+        database_path = tmp_dir / "comics_timeline.db"
+        os.environ["TIMELINE_DATABASE_PATH"] = str(database_path)
+        counts = seed_timeline_database(database_path, scale, seed)
+        conn = sqlite3.connect(database_path)
+        eras = conn.execute("SELECT id, start_year, end_year FROM eras ORDER BY id").fetchall()
+        conn.close()
+        data = SeedData([era_id for era_id, _, _ in eras], counts["books"], 0,
+                        min(start for _, start, _ in eras), max(end for _, _, end in eras))
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir / 'comics_auth.db'}"
+        sys.path.insert(0, str(SERVICE_DIRS[service]))
+        counts = seed_auth_database(scale)
+        data = SeedData([], 0, scale.users, 0, 0)
+    return counts, data
+
+@asynccontextmanager
+async def asgi_client(service: str) -> AsyncIterator[httpx.AsyncClient]:
+    """Client calling the app in this process, with its startup and shutdown handlers run"""
+    sys.path.insert(0, str(SERVICE_DIRS[service]))
+    app = importlib.import_module("main").app
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest") as client:
+            yield client
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@asynccontextmanager
+async def socket_client(service: str, virtual_users: int) -> AsyncIterator[httpx.AsyncClient]:
+    """Client calling the app in a uvicorn subprocess over a local TCP socket"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=SERVICE_DIRS[service], env=os.environ.copy(),
+    )
+    try:
+        limits = httpx.Limits(max_connections=virtual_users, max_keepalive_connections=virtual_users)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            deadline = time.monotonic() + STARTUP_TIMEOUT
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{service} did not start within {STARTUP_TIMEOUT:.0f} s")
+                await asyncio.sleep(0.1)
+            yield client
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+async def run_scenario(client: httpx.AsyncClient, name: str, data: SeedData, virtual_users: int,
+                       duration: float, seed: int) -> Dict[str, Any]:
+    """Run one scenario closed-loop: each virtual user starts its next iteration when the last ends"""
+    scenario = SCENARIOS_BY_NAME[name]
+    sessions = [Session(client, index, virtual_users, seed) for index in range(virtual_users)]
+    for session in sessions:
+        session.scenario = name
+
+    # One untimed iteration per user fills caches and pools, like a server that has been up a while
+    await asyncio.gather(*(scenario(session, data) for session in sessions))
+    for session in sessions:
+        session.samples.clear()
+        session.iteration = 1
+
+    async def run(session: Session):
+        while time.perf_counter() < stop:
+            await scenario(session, data)
+            session.iteration += 1
+
+    start = time.perf_counter()
+    stop = start + duration
+    await asyncio.gather(*(run(session) for session in sessions))
+    elapsed = time.perf_counter() - start
+
+    samples = [sample for session in sessions for sample in session.samples]
+    return summarize(samples, elapsed, sum(session.iteration - 1 for session in sessions))
+
+async def run_service(service: str, transport: str, scale_name: str, virtual_users: int,
+                      duration: float, seed: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        counts, data = prepare_service(service, SCALES[scale_name], seed, Path(tmp))
+        open_client = asgi_client(service) if transport == "asgi" else socket_client(service, virtual_users)
+        async with open_client as client:
+            scenarios = {
+                name: await run_scenario(client, name, data, virtual_users, duration, seed)
+                for name in SCENARIOS[service]
+            }
+    return {
+        "service": service, "transport": transport, "scale": scale_name, "counts": counts,
+        "virtual_users": virtual_users, "duration": duration, "scenarios": scenarios,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test one service")
+    parser.add_argument('--service', choices=sorted(SERVICE_DIRS), required=True)
+    parser.add_argument('--transport', choices=["asgi", "socket"], default="asgi")
+    parser.add_argument('--scale', choices=sorted(SCALES), default="small")
+    parser.add_argument('--virtual-users', type=int, default=8, help="Concurrent simulated users")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument('--seed', type=int, default=48, help="Random seed for data and scenarios")
+    parser.add_argument('--output', type=Path, required=True, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_service(args.service, args.transport, args.scale, args.virtual_users,
+                                     args.duration, args.seed))
+    args.output.write_text(json.dumps(result, indent=2), encoding="utf-8")
@@ -0,0 +1,104 @@
+"""
+Latency summaries, baseline comparison and the printed report
+
+Results are summarized per scenario as request count, errors, requests per
+second and p50/p95/p99 latency, plus the same percentiles for each step.
+Baselines are the summaries of an earlier run, stored in baselines.json
+under "service/transport/scale/scenario"; a scenario regresses when its
+p99 rises, or its throughput drops, by more than the tolerance.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from .scenarios import Sample
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+
+# Fraction p99 may rise, or requests/s fall, before a scenario counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def latency_summary(samples: List[Sample]) -> Dict[str, float]:
+    latencies = sorted(sample.seconds for sample in samples)
+    return {
+        "requests": len(samples),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(percentile(latencies, 1.0) * 1000, 2),
+    }
+
+def summarize(samples: List[Sample], elapsed: float, iterations: int) -> Dict[str, Any]:
+    """Summary of one scenario's run, overall and per step"""
+    steps: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        steps.setdefault(sample.step, []).append(sample)
+
+    summary = latency_summary(samples)
+    summary.update({
+        "errors": sum(not sample.ok for sample in samples),
+        "iterations": iterations,
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "mean_bytes": round(sum(sample.size for sample in samples) / len(samples)) if samples else 0,
+        "steps": {step: latency_summary(step_samples) for step, step_samples in steps.items()},
+    })
+    return summary
+
+def baseline_key(result: Dict[str, Any], scenario: str) -> str:
+    return f"{result['service']}/{result['transport']}/{result['scale']}/{scenario}"
+
+def load_baselines(path: Path = BASELINES_PATH) -> Dict[str, Dict[str, Any]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def save_baselines(results: List[Dict[str, Any]], path: Path = BASELINES_PATH):
+    """Store these results as the baselines, keeping entries for runs not repeated here"""
+    baselines = load_baselines(path)
+    for result in results:
+        for scenario, summary in result["scenarios"].items():
+            baselines[baseline_key(result, scenario)] = {
+                "virtual_users": result["virtual_users"],
+                "p50_ms": summary["p50_ms"], "p95_ms": summary["p95_ms"], "p99_ms": summary["p99_ms"],
+                "rps": summary["rps"],
+            }
+    path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+def print_report(results: List[Dict[str, Any]], baselines: Dict[str, Dict[str, Any]],
+                 tolerance: float = DEFAULT_TOLERANCE, show_steps: bool = False) -> int:
+    """Print every scenario against its baseline, returning the number of regressions"""
+    regressions = 0
+    for result in results:
+        counts = ", ".join(f"{count:,} {table}" for table, count in result["counts"].items())
+        print(f"\n{result['service']} over {result['transport']}, {result['scale']} scale ({counts}), "
+              f"{result['virtual_users']} virtual users")
+
+        for scenario, summary in result["scenarios"].items():
+            print(f"  {scenario:<8} {summary['rps']:8,.1f} req/s  p50 {summary['p50_ms']:7.2f} ms  "
+                  f"p95 {summary['p95_ms']:7.2f} ms  p99 {summary['p99_ms']:7.2f} ms  "
+                  f"{summary['requests']:,} requests, {summary['errors']} errors")
+            if show_steps:
+                for step, step_summary in summary["steps"].items():
+                    print(f"    {step:<16} p50 {step_summary['p50_ms']:7.2f} ms  p99 {step_summary['p99_ms']:7.2f} ms  "
+                          f"({step_summary['requests']:,})")
+
+            baseline = baselines.get(baseline_key(result, scenario))
+            if baseline is None:
+                print("    ⚠️  No baseline")
+            elif baseline["virtual_users"] != result["virtual_users"]:
+                print(f"    ⚠️  Baseline was recorded with {baseline['virtual_users']} virtual users, not compared")
+            else:
+                p99_change = summary["p99_ms"] / baseline["p99_ms"] - 1 if baseline["p99_ms"] else 0.0
+                rps_change = summary["rps"] / baseline["rps"] - 1 if baseline["rps"] else 0.0
+                regressed = p99_change > tolerance or rps_change < -tolerance or summary["errors"] > 0
+                regressions += regressed
+                print(f"    {'✗' if regressed else '✓'} vs baseline: p99 {p99_change:+.0%}, req/s {rps_change:+.0%}"
+                      + (f", {summary['errors']} errors" if summary["errors"] else ""))
+    return regressions
@@ -0,0 +1,125 @@
+"""
+Scripted user journeys for the load tests
+
+Each scenario is one iteration of what a user of a service does, written as an
+async function of a Session (one virtual user's client) and the SeedData it
+may pick from. Every request a scenario makes is timed by the session and
+recorded under the scenario's name and a short step name.
+"""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import httpx
+
+from .seed import ADMIN_USERNAME, HEROES, SEED_PASSWORD, user_name
+
+class Sample(NamedTuple):
+    scenario: str
+    step: str
+    seconds: float
+    status: int
+    size: int
+    ok: bool
+
+class SeedData(NamedTuple):
+    """What the scenarios may ask for: seeded era IDs, book and user counts, the years eras span"""
+    era_ids: List[int]
+    book_count: int
+    user_count: int
+    first_year: int
+    last_year: int
+
+class Session:
+    """One virtual user's view of the client, recording every request it makes"""
+
+    def __init__(self, client: httpx.AsyncClient, index: int, virtual_users: int, seed: int):
+        self.client = client
+        self.index = index
+        self.virtual_users = virtual_users
+        self.rng = random.Random(seed + index)
+        self.samples: List[Sample] = []
+        self.scenario = ""
+        self.iteration = 0
+        self.admin_token: Optional[str] = None
+
+    async def request(self, step: str, method: str, url: str, expected: Sequence[int] = (200,),
+                      **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.samples.append(Sample(self.scenario, step, time.perf_counter() - start, response.status_code,
+                                   len(response.content), response.status_code in expected))
+        # A cached response over ASGI completes without ever suspending, so yield here the way
+        # a socket read would, or one user could run every iteration before the others get a turn
+        await asyncio.sleep(0)
+        return response
+
+async def browse_timeline(session: Session, data: SeedData):
+    """Open the timeline, drill into an era and page through its books and events"""
+    era_id = session.rng.choice(data.era_ids)
+    await session.request("eras", "GET", "/timeline/eras")
+    await session.request("full", "GET", "/timeline/full")
+    await session.request("range", "GET", "/timeline/range",
+                          params={"year": session.rng.randint(data.first_year, data.last_year), "issue_limit": 100})
+    await session.request("era_summary", "GET", f"/timeline/eras/{era_id}/summary")
+
+    cursor = None
+    for _ in range(2):
+        params = {"era_id": era_id, "sort": "year", "limit": 50}
+        if cursor:
+            params["cursor"] = cursor
+        response = await session.request("books", "GET", "/books/", params=params)
+        cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+        if not cursor:
+            break
+
+    await session.request("events", "GET", "/timeline/events", params={"era_id": era_id, "limit": 50})
+    await session.request("reading_order", "GET", "/timeline/reading-order",
+                          params={"offset": session.rng.randrange(0, data.book_count, 50), "limit": 100})
+
+async def search(session: Session, data: SeedData):
+    """Type a hero's name into the search box, then run the full search"""
+    hero = session.rng.choice(HEROES).lower()
+    for length in range(3, min(len(hero), 6) + 1):
+        await session.request("autocomplete", "GET", "/books/autocomplete", params={"q": hero[:length]})
+    await session.request("search", "GET", "/books/search", params={"q": hero})
+    await session.request("search_events", "GET", "/books/search", params={"q": f"{hero} first", "kind": "event"})
+
+async def login_verify_logout(session: Session, data: SeedData):
+    """Log in, check the token the way the backend does, then log out
+
+    Virtual users take turns through the seeded users, so the same account is
+    not logged in twice in one second (tokens are only unique per second).
+    """
+    username = user_name((session.index + session.iteration * session.virtual_users) % data.user_count)
+    response = await session.request("login", "POST", "/auth/login",
+                                     json={"username": username, "password": SEED_PASSWORD})
+    if response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    await session.request("verify_token", "GET", "/auth/verify-token", headers=headers)
+    await session.request("me", "GET", "/auth/me", headers=headers)
+    await session.request("logout", "POST", "/auth/logout", headers=headers)
+
+async def admin_list(session: Session, data: SeedData):
+    """Page through the user list as an admin, open a user and the stats"""
+    if session.admin_token is None:
+        response = await session.client.post("/auth/login", json={"username": ADMIN_USERNAME, "password": SEED_PASSWORD})
+        response.raise_for_status()
+        session.admin_token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {session.admin_token}"}
+
+    skip = session.rng.randrange(0, max(data.user_count - 50, 1))
+    await session.request("list_users", "GET", "/admin/users", params={"skip": skip, "limit": 50}, headers=headers)
+    await session.request("get_user", "GET", f"/admin/users/{session.rng.randint(1, data.user_count)}", headers=headers)
+    await session.request("stats", "GET", "/admin/stats", headers=headers)
+
+Scenario = Callable[[Session, SeedData], Awaitable[None]]
+
+# Scenarios run against each service
+SCENARIOS: Dict[str, Dict[str, Scenario]] = {
+    "backend": {"browse": browse_timeline, "search": search},
+    "oauth": {"login": login_verify_logout, "admin": admin_list},
+}
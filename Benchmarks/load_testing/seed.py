@@ -0,0 +1,154 @@
+"""
+Synthetic data for the load tests, at several scales
+
+The timeline database is built the way the migration builds the real one:
+era files in the sub-era -> book -> ISSUES shape are written to a scratch
+directory and applied with TimelineLoader, followed by the same overlap,
+summary, event and index steps as setup_timeline_database.py. The auth
+database gets users that all share one bcrypt hash, so seeding thousands
+of them does not take thousands of hashes.
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+# Add the Database directory to the Python path
+database_dir = Path(__file__).parent.parent.parent / "Database"
+sys.path.insert(0, str(database_dir))
+
+from book_overlaps import compute_book_overlaps
+from migrate_json_data import TimelineLoader, parse_era_file
+from setup_timeline_database import create_indexes, create_timeline_tables, insert_publishers
+from timeline_db import connect
+from timeline_events import refresh_timeline_events
+from timeline_summaries import refresh_era_summaries
+
+class Scale(NamedTuple):
+    eras: int
+    books_per_era: int
+    issues_per_book: int
+    users: int
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale(eras=2, books_per_era=150, issues_per_book=8, users=100),
+    "medium": Scale(eras=4, books_per_era=600, issues_per_book=10, users=2000),
+    "large": Scale(eras=6, books_per_era=1500, issues_per_book=12, users=10000),
+}
+
+# Every seeded user (and the admin) logs in with this password
+SEED_PASSWORD = "load-test-password"
+ADMIN_USERNAME = "loadtest-admin"
+
+# Words titles and event descriptions are made of, so searches have something to match
+HEROES = ["Batman", "Superman", "Wonder Woman", "Flash", "Green Lantern", "Aquaman", "Nightwing",
+          "Catwoman", "Supergirl", "Cyborg", "Zatanna", "Hawkman", "Starfire", "Raven"]
+ARCS = ["Year One", "Rebirth", "Endgame", "Dark Knights", "Blackest Night", "Lost Days", "Hush",
+        "Legacy", "Secret Origin", "No Man's Land", "Final Hour", "Brightest Day", "Long Halloween"]
+EVENTS = ["First appearance of", "Death of", "Return of", "Origin of", "Wedding of", "Debut of"]
+
+def user_name(index: int) -> str:
+    return f"loadtest-{index:05d}"
+
+def write_synthetic_era_file(file_path: Path, era_index: int, start_year: int, scale: Scale, rng: random.Random):
+    """Write an era file whose books reprint overlapping runs of a handful of series"""
+    series_count = max(2, scale.books_per_era // 40)
+    series = [f"{HEROES[(era_index * 3 + n) % len(HEROES)]} Vol {era_index + 1}.{n}" for n in range(series_count)]
+    next_issue = {title: 1 for title in series}
+
+    sub_eras: Dict[str, Dict] = {}
+    for book_index in range(scale.books_per_era):
+        title = series[book_index % series_count]
+        # Books step forward by half a book, so consecutive volumes share issues
+        first = max(1, next_issue[title] - scale.issues_per_book // 2)
+        next_issue[title] = first + scale.issues_per_book
+        issues = [f"{title} ({start_year}) #{number}" for number in range(first, first + scale.issues_per_book)]
+
+        months = (first - 1) + rng.randint(0, 2)
+        year, month = start_year + months // 12, months % 12 + 1
+        book = {
+            "TYPE": "book",
+            "ISSUES": issues,
+            "EQUIVALENTS": [],
+            "CHILDREN": [],
+            "PRH": "",
+            "IST": "",
+            "earliest_issue": {"issue": issues[0], "name": issues[0], "publish_year": year, "publish_month": month},
+            "latest_issue": {"issue": issues[-1], "name": issues[-1],
+                             "publish_year": year + (month + scale.issues_per_book - 2) // 12,
+                             "publish_month": (month + scale.issues_per_book - 2) % 12 + 1},
+        }
+        if book_index % 5 == 0:
+            book["notable_events"] = {issues[rng.randrange(len(issues))]: f"{rng.choice(EVENTS)} {rng.choice(HEROES)}"}
+
+        sub_era = f"synthetic part {book_index * 3 // scale.books_per_era + 1}"
+        book_title = f"{title.split(' Vol ')[0]}: {rng.choice(ARCS)} Book {book_index + 1}"
+        sub_eras.setdefault(sub_era, {})[book_title] = book
+
+    file_path.write_text(json.dumps(sub_eras), encoding="utf-8")
+
+def seed_timeline_database(database_path: Path, scale: Scale, seed: int) -> Dict[str, int]:
+    """Create a timeline database with scale.eras synthetic DC eras, returning row counts"""
+    rng = random.Random(seed)
+    conn = connect(database_path)
+    cursor = conn.cursor()
+    create_timeline_tables(cursor)
+    insert_publishers(cursor)
+    cursor.execute("SELECT id FROM publishers WHERE name = 'DC Comics'")
+    dc_id = cursor.fetchone()[0]
+
+    loader = TimelineLoader(cursor, dc_id)
+    for era_index in range(scale.eras):
+        start_year = 1938 + era_index * 10
+        cursor.execute('''
+            INSERT INTO eras (publisher_id, title, ending_event, start_year, end_year, description, display_order)
+            VALUES (?, ?, ?, ?, ?, 'Synthetic load test era', ?)
+        ''', (dc_id, f"Synthetic Era {era_index + 1}", f"Synthetic Crisis {era_index + 1}",
+              start_year, start_year + 9, era_index + 1))
+        era_id = cursor.lastrowid
+
+        era_file = database_path.with_name(f"synthetic_era_{era_index + 1}.json")
+        write_synthetic_era_file(era_file, era_index, start_year, scale, rng)
+        loader.apply_era_file(parse_era_file(era_file), era_id)
+    loader.finish()
+
+    compute_book_overlaps(cursor)
+    refresh_era_summaries(cursor)
+    refresh_timeline_events(cursor)
+    create_indexes(cursor)
+    conn.commit()
+
+    counts = {
+        table: cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("eras", "books", "comic_issues", "timeline_events")
+    }
+    conn.close()
+    return counts
+
+def seed_auth_database(scale: Scale) -> Dict[str, int]:
+    """Fill the OAuth proxy database (DATABASE_URL) with active users and one admin
+
+    Imports the proxy's own models, so it must run in a process with the proxy
+    directory on sys.path and DATABASE_URL already set.
+    """
+    from sqlalchemy import insert
+
+    from auth import get_password_hash
+    from database import SessionLocal, User, create_tables
+
+    create_tables()
+    hashed_password = get_password_hash(SEED_PASSWORD)
+    rows: List[Dict] = [
+        {"username": user_name(index), "email": f"{user_name(index)}@example.com", "hashed_password": hashed_password,
+         "is_active": True, "is_admin": False, "is_email_verified": True}
+        for index in range(scale.users)
+    ]
+    rows.append({"username": ADMIN_USERNAME, "email": f"{ADMIN_USERNAME}@example.com",
+                 "hashed_password": hashed_password, "is_active": True, "is_admin": True, "is_email_verified": True})
+
+    with SessionLocal() as db:
+        db.execute(insert(User), rows)
+        db.commit()
+    return {"users": len(rows)}
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Book Overlap Precompute Script for Comics Timeline
+
+Many collected editions reprint the same issues. This script gives every
+canonical issue a dense integer ID, stores each book's issues as a bitset
+and computes the pairwise overlap (shared issue count and Jaccard index)
+between all books in an era, keeping the top overlaps per book.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from timeline_db import connect
+
+# Database configuration
+DATABASE_NAME = "comics_timeline.db"
+DATABASE_PATH = Path(__file__).parent / DATABASE_NAME
+
+# Number of overlapping books kept for each book
+TOP_OVERLAPS_PER_BOOK = 10
+
+def assign_dense_issue_ids(cursor: sqlite3.Cursor) -> int:
+    """Give issues without a dense ID the next free ones, returning how many were assigned
+
+    Existing dense IDs never change, so bitsets stored against them stay valid.
+    """
+    cursor.execute("SELECT COALESCE(MAX(dense_id), -1) + 1 FROM comic_issues")
+    next_dense_id = cursor.fetchone()[0]
+
+    cursor.execute("SELECT id FROM comic_issues WHERE dense_id IS NULL ORDER BY id")
+    rows = [(next_dense_id + offset, issue_id) for offset, (issue_id,) in enumerate(cursor.fetchall())]
+    cursor.executemany("UPDATE comic_issues SET dense_id = ? WHERE id = ?", rows)
+    return len(rows)
+
+def bitset_to_blob(bitset: int) -> Tuple[int, bytes]:
+    """Serialize an issue bitset as (base dense ID, little-endian bytes of the bits from the base up)
+
+    The base is the book's lowest dense ID rounded down to a byte boundary, so a
+    blob is as long as the span of the book's issues rather than the catalogue.
+    """
+    if not bitset:
+        return 0, b""
+    base = ((bitset & -bitset).bit_length() - 1) & ~7
+    shifted = bitset >> base
+    return base, shifted.to_bytes((shifted.bit_length() + 7) // 8, 'little')
+
+def blob_to_bitset(blob: bytes, base_dense_id: int = 0) -> int:
+    """Deserialize an issue bitset stored by bitset_to_blob"""
+    return int.from_bytes(blob, 'little') << base_dense_id
+
+def load_book_bitsets(cursor: sqlite3.Cursor, era_id: int) -> Dict[int, int]:
+    """Build {book_id: issue bitset} for every book in an era"""
+    cursor.execute('''
+        SELECT bi.book_id, ci.dense_id
+        FROM book_issues bi
+        JOIN books b ON b.id = bi.book_id
+        JOIN comic_issues ci ON ci.id = bi.issue_id
+        WHERE b.era_id = ?
+    ''', (era_id,))
+
+    bitsets: Dict[int, int] = {}
+    for book_id, dense_id in cursor.fetchall():
+        bitsets[book_id] = bitsets.get(book_id, 0) | (1 << dense_id)
+    return bitsets
+
+def top_overlaps(bitsets: Dict[int, int], limit: int = TOP_OVERLAPS_PER_BOOK) -> Dict[int, List[Tuple[int, int, float]]]:
+    """Return {book_id: [(other_book_id, shared_count, jaccard), ...]} sorted by shared count
+
+    Each pair is a single AND over the two bitsets followed by a popcount, both of
+    which run word-at-a-time in C over the whole bitset.
+    """
+    book_ids = sorted(bitsets)
+    sizes = {book_id: bitsets[book_id].bit_count() for book_id in book_ids}
+    overlaps: Dict[int, List[Tuple[int, int, float]]] = {book_id: [] for book_id in book_ids}
+
+    for index, book_id in enumerate(book_ids):
+        bits = bitsets[book_id]
+        for other_id in book_ids[index + 1:]:
+            shared = (bits & bitsets[other_id]).bit_count()
+            if not shared:
+                continue
+            jaccard = shared / (sizes[book_id] + sizes[other_id] - shared)
+            overlaps[book_id].append((other_id, shared, jaccard))
+            overlaps[other_id].append((book_id, shared, jaccard))
+
+    return {
+        book_id: sorted(pairs, key=lambda pair: (-pair[1], -pair[2], pair[0]))[:limit]
+        for book_id, pairs in overlaps.items()
+    }
+
+def compute_book_overlaps(cursor: sqlite3.Cursor, era_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute stored bitsets and top overlaps for the given eras (all eras by default)
+
+    Returns the number of overlap rows written.
+    """
+    assign_dense_issue_ids(cursor)
+
+    if era_ids is None:
+        cursor.execute("SELECT id FROM eras")
+        era_ids = [era_id for (era_id,) in cursor.fetchall()]
+
+    written = 0
+    for era_id in era_ids:
+        cursor.execute('''
+            DELETE FROM book_issue_bitsets WHERE book_id IN (SELECT id FROM books WHERE era_id = ?)
+        ''', (era_id,))
+        cursor.execute('''
+            DELETE FROM book_overlaps WHERE book_id IN (SELECT id FROM books WHERE era_id = ?)
+        ''', (era_id,))
+
+        bitsets = load_book_bitsets(cursor, era_id)
+        cursor.executemany('''
+            INSERT INTO book_issue_bitsets (book_id, issue_count, base_dense_id, bitset)
+            VALUES (?, ?, ?, ?)
+        ''', [(book_id, bits.bit_count(), *bitset_to_blob(bits)) for book_id, bits in bitsets.items()])
+
+        rows = [
+            (book_id, rank, other_id, shared, round(jaccard, 4))
+            for book_id, pairs in top_overlaps(bitsets).items()
+            for rank, (other_id, shared, jaccard) in enumerate(pairs, start=1)
+        ]
+        cursor.executemany('''
+            INSERT INTO book_overlaps (book_id, rank, other_book_id, shared_count, jaccard)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        written += len(rows)
+
+    return written
+
+if __name__ == "__main__":
+    if not DATABASE_PATH.exists():
+        print(f"✗ Database {DATABASE_NAME} not found!")
+        print("Please run setup_timeline_database.py first.")
+        sys.exit(1)
+
+    conn = connect(DATABASE_PATH)
+    try:
+        overlap_count = compute_book_overlaps(conn.cursor())
+        conn.commit()
+        print(f"✓ Stored {overlap_count} book overlaps")
+    finally:
+        conn.close()
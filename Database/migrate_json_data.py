@@ -3,180 +3,690 @@
 Data Migration Script for Comics Timeline JSON Files
 
 This script processes the existing JSON files and loads the comic data
-into the timeline database. It parses the JSON structure and creates
-appropriate database records for series, issues, and price tracking.
+into the timeline database. Each era file is a map of sub-era -> book title
+-> {TYPE, ISSUES, EQUIVALENTS, CHILDREN, PRH, IST, earliest_issue, ...};
+books are loaded with their issues deduped into canonical series/issue rows
+and linked through book_issues.
 """
 
 import sqlite3
+import copy
+import csv
+import hashlib
 import json
 import os
+import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Iterator, NamedTuple, Iterable
+
+from book_overlaps import compute_book_overlaps
+from search_index import update_search_index
+from timeline_events import refresh_timeline_events
+from timeline_summaries import refresh_era_summaries
+from timeline_db import connect
+from schema_version import upgrade_schema
+
+try:
+    import ijson
+except ImportError:  # Fall back to loading each era file in one go
+    ijson = None
 
 # Database configuration
 DATABASE_NAME = "comics_timeline.db"
 DATABASE_PATH = Path(__file__).parent / DATABASE_NAME
 
-def connect_database():
+# Current book prices scraped from InStockTrades, matched to books by IST url
+PRICE_CSV_PATH = Path(__file__).parent.parent / "Scrapers" / "Prices" / "ist_rw.csv"
+
+# Number of issue/link rows buffered before they are flushed with executemany
+ISSUE_BATCH_SIZE = 10000
+
+# Issue strings look like "Action Comics (1938) #1" or "tales of the teen titans (1984) annual #1"
+ISSUE_PATTERN = re.compile(
+    r"^(?P<series>.+?)\s*\((?P<year>\d{4})\)\s*(?P<kind>[^#]*?)\s*#\s*(?P<number>[^\s#]+)$"
+)
+
+# Nested book lists and the relation they describe
+BOOK_RELATIONS = (("EQUIVALENTS", "equivalent"), ("CHILDREN", "child"))
+
+# (publisher_id, casefolded series title, series start year) -> comic_series.id
+SeriesCache = Dict[Tuple[int, str, Optional[int]], int]
+
+def connect_database(database_path: Path = DATABASE_PATH):
     """Connect to the timeline database"""
-    if not DATABASE_PATH.exists():
-        print(f"✗ Database {DATABASE_NAME} not found!")
+    if not database_path.exists():
+        print(f"✗ Database {database_path.name} not found!")
         print("Please run setup_timeline_database.py first.")
         sys.exit(1)
     
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
+    return connect(database_path)
 
-def get_or_create_series(cursor: sqlite3.Cursor, publisher_id: int, era_id: int, 
-                        series_title: str, volume: int = 1) -> int:
-    """Get existing series ID or create new series"""
-    
-    # Check if series exists
-    cursor.execute('''
-        SELECT id FROM comic_series 
-        WHERE publisher_id = ? AND title = ? AND volume = ?
-    ''', (publisher_id, series_title, volume))
+def load_series_cache(cursor: sqlite3.Cursor) -> SeriesCache:
+    """Preload every existing series into an in-memory lookup table"""
+    cursor.execute("SELECT id, publisher_id, title, start_year FROM comic_series")
+    return {
+        (publisher_id, title.casefold(), start_year): series_id
+        for series_id, publisher_id, title, start_year in cursor.fetchall()
+    }
+
+def get_or_create_series(cursor: sqlite3.Cursor, series_cache: SeriesCache, publisher_id: int,
+                        era_id: int, series_title: str, start_year: Optional[int] = None) -> int:
+    """Get existing series ID from the cache or create new series"""
     
-    result = cursor.fetchone()
-    if result:
-        return result[0]
+    key = (publisher_id, series_title.casefold(), start_year)
+    series_id = series_cache.get(key)
+    if series_id is not None:
+        return series_id
     
     # Create new series
     cursor.execute('''
-        INSERT INTO comic_series (publisher_id, era_id, title, volume, series_type)
+        INSERT INTO comic_series (publisher_id, era_id, title, start_year, series_type)
         VALUES (?, ?, ?, ?, 'ongoing')
-    ''', (publisher_id, era_id, series_title, volume))
+    ''', (publisher_id, era_id, series_title, start_year))
     
+    series_cache[key] = cursor.lastrowid
     return cursor.lastrowid
 
-def parse_issue_number(issue_str: str) -> str:
-    """Parse and normalize issue number strings"""
-    # Handle various issue number formats
-    issue_str = str(issue_str).strip()
-    
-    # Common patterns to normalize
-    replacements = {
-        '#': '',
-        'Issue ': '',
-        'issue ': '',
-        'No. ': '',
-        'no. ': ''
+@lru_cache(maxsize=65536)
+def parse_issue_string(issue_str: str) -> Optional[Tuple[str, int, str]]:
+    """Split an issue string into (series title, series start year, issue number)"""
+    match = ISSUE_PATTERN.match(" ".join(str(issue_str).split()))
+    if not match:
+        return None
+    
+    issue_number = match.group('number')
+    if match.group('kind'):
+        # "annual #1" -> "Annual 1", matching the comic_issues.issue_number convention
+        issue_number = f"{match.group('kind').title()} {issue_number}"
+    
+    return match.group('series'), int(match.group('year')), issue_number
+
+def canonical_issue_key(series_title: str, start_year: int, issue_number: str) -> str:
+    """Case-insensitive key used to dedupe the same issue across books"""
+    return f"{series_title.casefold()} ({start_year}) #{issue_number.casefold()}"
+
+def normalize_sub_era_title(raw_title: str) -> str:
+    """Normalize sub-era keys such as 'golden_age' and 'golden age' to 'Golden Age'"""
+    return raw_title.replace('_', ' ').strip().title()
+
+def iter_era_books(file_path: Path) -> Iterator[Tuple[str, str, Any]]:
+    """Yield (sub-era, book title, book) from an era file one book at a time"""
+    
+    with open(file_path, 'rb') as f:
+        if ijson is None:
+            for sub_era, books in json.load(f).items():
+                for title, book in books.items():
+                    yield sub_era, title, book
+            return
+        
+        # Only one book is ever materialized, so memory stays flat for large files
+        depth = 0
+        sub_era = title = builder = None
+        for _, event, value in ijson.parse(f, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if event in ('start_map', 'start_array'):
+                    depth += 1
+                elif event in ('end_map', 'end_array'):
+                    depth -= 1
+                if depth == 2:
+                    yield sub_era, title, builder.value
+                    builder = None
+            elif event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+            elif event == 'map_key' and depth == 1:
+                sub_era = value
+            elif event == 'map_key' and depth == 2:
+                title = value
+                builder = ijson.ObjectBuilder()
+
+def iter_book_entries(title: str, book: Any, parent_title: Optional[str] = None,
+                      relation: Optional[str] = None) -> Iterator[Tuple[str, Optional[Dict], Optional[str], Optional[str]]]:
+    """Yield (title, book, parent title, relation) for a book and every nested EQUIVALENTS/CHILDREN entry
+    
+    String entries refer to a book listed elsewhere in the era and are yielded with book=None.
+    """
+    yield title, book if isinstance(book, dict) else None, parent_title, relation
+    
+    if not isinstance(book, dict):
+        return
+    
+    for key, nested_relation in BOOK_RELATIONS:
+        for index, nested in enumerate(book.get(key) or [], start=1):
+            if isinstance(nested, str):
+                yield nested, None, title, nested_relation
+            elif isinstance(nested, dict) and 'ISSUES' in nested:
+                # Untitled book, name it after the book it belongs to
+                yield from iter_book_entries(f"{title} ({nested_relation} {index})", nested, title, nested_relation)
+            elif isinstance(nested, dict):
+                for nested_title, nested_book in nested.items():
+                    yield from iter_book_entries(nested_title, nested_book, title, nested_relation)
+
+def normalize_book(title: str, book: Dict) -> Dict[str, Any]:
+    """Flatten a raw era JSON book into the columns and rows the loader writes"""
+    
+    earliest = book.get('earliest_issue') or {}
+    latest = book.get('latest_issue') or {}
+    elseworlds = book.get('ELSEWORLDS')
+    if isinstance(elseworlds, dict):
+        elseworlds_earth, elseworlds_coverage = elseworlds.get('earth'), elseworlds.get('percent')
+    else:
+        elseworlds_earth, elseworlds_coverage = elseworlds or None, None
+    
+    # Issue dates are only known for a book's earliest and latest issue
+    issue_dates = {}
+    for edge in (earliest, latest):
+        if not (edge.get('issue') and edge.get('publish_year')):
+            continue
+        try:
+            # Era files hold years and months as numbers or strings such as "1986"
+            year, month = int(edge['publish_year']), int(edge.get('publish_month') or 1)
+        except (TypeError, ValueError):
+            continue
+        if 1 <= month <= 12:
+            issue_dates[edge['issue']] = f"{year:04d}-{month:02d}-01"
+    
+    issues = []
+    seen_keys = set()
+    unparsed = []
+    for issue_str in book.get('ISSUES') or []:
+        parsed = parse_issue_string(issue_str)
+        if parsed is None:
+            unparsed.append(issue_str)
+            continue
+        key = canonical_issue_key(*parsed)
+        if key not in seen_keys:
+            seen_keys.add(key)
+            issues.append((*parsed, key, issue_dates.get(issue_str)))
+    
+    events = []
+    for issue_str, description in (book.get('notable_events') or {}).items():
+        parsed = parse_issue_string(issue_str)
+        if parsed is None:
+            unparsed.append(issue_str)
+            continue
+        events.append((*parsed, canonical_issue_key(*parsed), issue_dates.get(issue_str), description))
+    
+    return {
+        "title": title,
+        "book_type": book.get('TYPE', 'book'),
+        "prh_url": book.get('PRH') or None,
+        "ist_url": book.get('IST') or None,
+        "canon_year": book.get('canon_year'),
+        "elseworlds_earth": elseworlds_earth,
+        "elseworlds_coverage": elseworlds_coverage,
+        "true_child": book.get('TRUECHILD'),
+        "earliest_issue_name": earliest.get('name'),
+        "earliest_publish_year": earliest.get('publish_year'),
+        "earliest_publish_month": earliest.get('publish_month'),
+        "latest_issue_name": latest.get('name'),
+        "latest_publish_year": latest.get('publish_year'),
+        "latest_publish_month": latest.get('publish_month'),
+        "issues": issues,
+        "events": events,
+        "unparsed": unparsed,
     }
+
+BOOK_COLUMNS = (
+    "book_type", "prh_url", "ist_url", "canon_year", "elseworlds_earth", "elseworlds_coverage",
+    "true_child", "earliest_issue_name", "earliest_publish_year", "earliest_publish_month",
+    "latest_issue_name", "latest_publish_year", "latest_publish_month",
+)
+
+def file_content_hash(file_path: Path) -> str:
+    """SHA-256 of an era file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def book_content_hash(raw_sub_era: str, book: Dict) -> str:
+    """SHA-256 of a book entry and the sub-era it is listed under"""
+    payload = json.dumps([raw_sub_era, book], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_data_version(cursor: sqlite3.Cursor) -> int:
+    """Current data version stamp, bumped whenever a migration changes timeline data"""
+    cursor.execute("SELECT value FROM timeline_meta WHERE key = 'data_version'")
+    result = cursor.fetchone()
+    return int(result[0]) if result else 0
+
+def bump_data_version(cursor: sqlite3.Cursor) -> int:
+    """Increment the data version stamp so readers can invalidate their caches"""
+    cursor.execute('''
+        INSERT INTO timeline_meta (key, value) VALUES ('data_version', 1)
+        ON CONFLICT (key) DO UPDATE SET value = value + 1
+    ''')
+    return get_data_version(cursor)
+
+def load_current_prices(cursor: sqlite3.Cursor, csv_path: Path = PRICE_CSV_PATH) -> int:
+    """Copy the latest scraped price of each book onto books.current_price, returning rows changed"""
+    if not csv_path.exists():
+        return 0
     
-    for old, new in replacements.items():
-        issue_str = issue_str.replace(old, new)
+    price_rows = []
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            price = row.get('Min Current Price') or row.get('IST Current Price')
+            try:
+                price_rows.append((float(str(price).replace('$', '').replace(',', '')), row['IST Url']))
+            except ValueError:
+                continue
     
-    return issue_str
+    # Only rows whose price actually changed are counted
+    cursor.executemany('''
+        UPDATE books SET current_price = ?
+        WHERE ist_url = ? AND current_price IS NOT ?
+    ''', [(price, url, price) for price, url in price_rows])
+    return max(cursor.rowcount, 0)
+
+class ParsedEraFile(NamedTuple):
+    """Normalized contents of one era file, produced by the parse stage"""
+    file_name: str
+    content_hash: str
+    # (raw sub-era title, entry title, normalized record or None for references, parent title, relation)
+    entries: List[Tuple[str, str, Optional[Dict[str, Any]], Optional[str], Optional[str]]]
+    # Entry title -> hash over every entry with that title
+    book_hashes: Dict[str, str]
+    parse_seconds: float
 
-def process_json_file(file_path: Path, era_id: int, publisher_id: int, cursor: sqlite3.Cursor):
-    """Process a single JSON file and extract comic data"""
+def parse_era_file(file_path: Path, content_hash: Optional[str] = None) -> ParsedEraFile:
+    """Parse, normalize and hash every book in an era file without touching the database
     
-    print(f"Processing {file_path.name}...")
+    Pure and picklable, so the migration can run it for several files in a process pool.
+    """
+    start = time.perf_counter()
+    if content_hash is None:
+        content_hash = file_content_hash(file_path)
     
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        processed_series = 0
-        processed_issues = 0
-        
-        # The structure will depend on your JSON format
-        # This is a generic processor that handles common structures
-        
-        if isinstance(data, dict):
-            # If data is a dictionary, look for series information
-            for key, value in data.items():
-                if isinstance(value, list):
-                    # Assume this is a series with a list of issues
-                    series_id = get_or_create_series(cursor, publisher_id, era_id, key)
-                    processed_series += 1
-                    
-                    for item in value:
-                        if isinstance(item, dict):
-                            # Process individual issue
-                            issue_num = item.get('issue', item.get('number', item.get('#', 'Unknown')))
-                            issue_num = parse_issue_number(issue_num)
-                            
-                            title = item.get('title', item.get('name', ''))
-                            pub_date = item.get('publication_date', item.get('date', item.get('year')))
-                            cover_price = item.get('cover_price', item.get('price'))
-                            
-                            # Insert issue
-                            cursor.execute('''
-                                INSERT OR IGNORE INTO comic_issues 
-                                (series_id, issue_number, title, publication_date, cover_price)
-                                VALUES (?, ?, ?, ?, ?)
-                            ''', (series_id, issue_num, title, pub_date, cover_price))
-                            
-                            processed_issues += 1
-                            
-                elif isinstance(value, dict):
-                    # Single series entry
-                    series_id = get_or_create_series(cursor, publisher_id, era_id, key)
-                    processed_series += 1
-                    
-                    # Check if this dict contains issue information
-                    if 'issues' in value and isinstance(value['issues'], list):
-                        for issue in value['issues']:
-                            issue_num = issue.get('issue', issue.get('number', 'Unknown'))
-                            issue_num = parse_issue_number(issue_num)
-                            
-                            title = issue.get('title', '')
-                            pub_date = issue.get('publication_date', issue.get('date'))
-                            cover_price = issue.get('cover_price', issue.get('price'))
-                            
-                            cursor.execute('''
-                                INSERT OR IGNORE INTO comic_issues 
-                                (series_id, issue_number, title, publication_date, cover_price)
-                                VALUES (?, ?, ?, ?, ?)
-                            ''', (series_id, issue_num, title, pub_date, cover_price))
-                            
-                            processed_issues += 1
-        
-        elif isinstance(data, list):
-            # If data is a list, assume it's a list of series or issues
-            for item in data:
-                if isinstance(item, dict):
-                    series_name = item.get('series', item.get('title', item.get('name', 'Unknown Series')))
-                    series_id = get_or_create_series(cursor, publisher_id, era_id, series_name)
-                    processed_series += 1
-                    
-                    # Check for issue information in the item
-                    issue_num = item.get('issue', item.get('number', '1'))
-                    issue_num = parse_issue_number(issue_num)
-                    
-                    title = item.get('issue_title', item.get('title', ''))
-                    pub_date = item.get('publication_date', item.get('date'))
-                    cover_price = item.get('cover_price', item.get('price'))
-                    
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO comic_issues 
-                        (series_id, issue_number, title, publication_date, cover_price)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (series_id, issue_num, title, pub_date, cover_price))
-                    
-                    processed_issues += 1
-        
-        print(f"  ✓ Processed {processed_series} series and {processed_issues} issues")
-        
-    except json.JSONDecodeError as e:
-        print(f"  ✗ JSON parsing error in {file_path.name}: {e}")
-    except Exception as e:
-        print(f"  ✗ Error processing {file_path.name}: {e}")
+    entries = []
+    digests: Dict[str, Any] = {}
+    if file_path.stat().st_size > 0:
+        for raw_sub_era, title, book in iter_era_books(file_path):
+            for entry_title, entry, parent_title, relation in iter_book_entries(title, book):
+                record = None
+                if entry is not None:
+                    digests.setdefault(entry_title, hashlib.sha256()).update(
+                        book_content_hash(raw_sub_era, entry).encode('ascii'))
+                    record = normalize_book(entry_title, entry)
+                entries.append((raw_sub_era, entry_title, record, parent_title, relation))
+    
+    book_hashes = {title: digest.hexdigest() for title, digest in digests.items()}
+    return ParsedEraFile(file_path.name, content_hash, entries, book_hashes, time.perf_counter() - start)
 
-def migrate_all_json_data():
-    """Migrate all JSON files to database"""
+def parse_era_files(file_hashes: Dict[Path, str], workers: Optional[int] = None) -> Dict[Path, Any]:
+    """Parse era files in a process pool, one file per task
+    
+    Returns {file path: ParsedEraFile, or the exception its parse raised}. With a single
+    file or a single worker the files are parsed in this process, skipping the pool.
+    """
+    results: Dict[Path, Any] = {}
+    workers = workers or min(len(file_hashes), os.cpu_count() or 1)
+    if workers <= 1:
+        for file_path, content_hash in file_hashes.items():
+            try:
+                results[file_path] = parse_era_file(file_path, content_hash)
+            except Exception as e:
+                results[file_path] = e
+        return results
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {file_path: pool.submit(parse_era_file, file_path, content_hash)
+                   for file_path, content_hash in file_hashes.items()}
+        for file_path, future in futures.items():
+            try:
+                results[file_path] = future.result()
+            except Exception as e:
+                results[file_path] = e
+    return results
+
+class EraLoadResult(NamedTuple):
+    books_loaded: int
+    links_loaded: int
+    books_removed: int
+    unchanged: bool
+
+class TimelineLoader:
+    """Bulk loader for era JSON files
+    
+    Series, sub-eras and issues are resolved from in-memory caches, and issue, book-issue link
+    and notable event rows are buffered and written with executemany. Nothing is committed
+    here, so a whole migration runs in the caller's single transaction.
+    
+    Loads are incremental: the migration ledger holds a hash per era file and per book, so
+    unchanged files are skipped and only books whose content changed are rewritten.
+    """
+    
+    def __init__(self, cursor: sqlite3.Cursor, publisher_id: int, force: bool = False):
+        self.cursor = cursor
+        self.publisher_id = publisher_id
+        self.force = force
+        self.series_cache = load_series_cache(cursor)
+        
+        cursor.execute("SELECT canonical_key, id FROM comic_issues WHERE canonical_key IS NOT NULL")
+        self.issue_cache: Dict[str, int] = dict(cursor.fetchall())
+        
+        # Issue IDs are allocated here so new issues can be linked before they are flushed
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM comic_issues")
+        self.next_issue_id = cursor.fetchone()[0] + 1
+        self.first_new_issue_id = self.next_issue_id
+        
+        cursor.execute("SELECT era_id, title, id FROM sub_eras")
+        self.sub_era_cache = {(era_id, title): sub_era_id for era_id, title, sub_era_id in cursor.fetchall()}
+        
+        self.loaded_books = set()
+        self.removed_books = set()
+        self.removed_event_ids: List[int] = []
+        self.changed_eras = set()
+        self.touched_sub_eras = set()
+        self.issue_rows: List[Tuple] = []
+        self.date_rows: List[Tuple] = []
+        self.link_rows: List[Tuple] = []
+        self.ledger_rows: List[Tuple] = []
+        self.event_rows: List[Tuple] = []
+        self.relation_rows: List[Tuple] = []
+    
+    def get_or_create_sub_era(self, era_id: int, raw_title: str, display_order: int) -> int:
+        """Get existing sub-era ID or create it with the era's years as placeholders"""
+        title = normalize_sub_era_title(raw_title)
+        sub_era_id = self.sub_era_cache.get((era_id, title))
+        if sub_era_id is None:
+            self.cursor.execute('''
+                INSERT INTO sub_eras (era_id, title, start_year, end_year, display_order)
+                SELECT id, ?, start_year, end_year, ? FROM eras WHERE id = ?
+            ''', (title, display_order, era_id))
+            sub_era_id = self.sub_era_cache[(era_id, title)] = self.cursor.lastrowid
+        
+        self.touched_sub_eras.add(sub_era_id)
+        return sub_era_id
+    
+    def resolve_issue(self, era_id: int, series_title: str, start_year: int, issue_number: str,
+                      key: str, publication_date: Optional[str]) -> int:
+        """Get the ID of a canonical issue, buffering an insert the first time it is seen"""
+        issue_id = self.issue_cache.get(key)
+        if issue_id is None:
+            series_id = get_or_create_series(self.cursor, self.series_cache, self.publisher_id,
+                                             era_id, series_title, start_year)
+            issue_id = self.issue_cache[key] = self.next_issue_id
+            self.next_issue_id += 1
+            self.issue_rows.append((issue_id, series_id, issue_number, key, publication_date))
+        elif publication_date:
+            self.date_rows.append((publication_date, issue_id))
+        return issue_id
+    
+    def load_book(self, era_id: int, sub_era_id: int, record: Dict[str, Any]) -> int:
+        """Upsert one normalized book and buffer its issue links and notable events"""
+        
+        self.cursor.execute(f'''
+            INSERT INTO books (era_id, sub_era_id, title, issue_count, {", ".join(BOOK_COLUMNS)})
+            VALUES (?, ?, ?, ?, {", ".join("?" for _ in BOOK_COLUMNS)})
+            ON CONFLICT (era_id, title) DO UPDATE SET
+                sub_era_id = excluded.sub_era_id,
+                issue_count = excluded.issue_count,
+                {", ".join(f"{column} = excluded.{column}" for column in BOOK_COLUMNS)}
+            RETURNING id
+        ''', (era_id, sub_era_id, record["title"], len(record["issues"]),
+              *(record[column] for column in BOOK_COLUMNS)))
+        book_id = self.cursor.fetchone()[0]
+        
+        existing_links = {}
+        if book_id not in self.loaded_books:
+            # Book may exist from an earlier run, diff its links instead of rewriting them
+            self.loaded_books.add(book_id)
+            self.cursor.execute("SELECT issue_id, position FROM book_issues WHERE book_id = ?", (book_id,))
+            existing_links = dict(self.cursor.fetchall())
+            self.cursor.execute("DELETE FROM notable_events WHERE book_id = ? RETURNING id", (book_id,))
+            self.removed_event_ids.extend(event_id for (event_id,) in self.cursor.fetchall())
+            self.cursor.execute("DELETE FROM book_relations WHERE book_id = ?", (book_id,))
+        
+        links: Dict[int, int] = {}
+        for position, (series_title, start_year, issue_number, key, pub_date) in enumerate(record["issues"]):
+            issue_id = self.resolve_issue(era_id, series_title, start_year, issue_number, key, pub_date)
+            links.setdefault(issue_id, position)
+        
+        self.cursor.executemany("DELETE FROM book_issues WHERE book_id = ? AND issue_id = ?",
+                                [(book_id, issue_id) for issue_id in existing_links.keys() - links.keys()])
+        self.link_rows.extend((book_id, issue_id, position) for issue_id, position in links.items()
+                              if existing_links.get(issue_id) != position)
+        
+        for series_title, start_year, issue_number, key, pub_date, description in record["events"]:
+            issue_id = self.resolve_issue(era_id, series_title, start_year, issue_number, key, pub_date)
+            self.event_rows.append((book_id, issue_id, description))
+        
+        if len(self.issue_rows) + len(self.link_rows) >= ISSUE_BATCH_SIZE:
+            self.flush()
+        
+        return book_id
+    
+    def is_unchanged(self, file_path: Path, content_hash: str) -> bool:
+        """Whether the ledger already holds this exact era file"""
+        if self.force:
+            return False
+        self.cursor.execute("SELECT content_hash FROM migration_files WHERE file_name = ?", (file_path.name,))
+        result = self.cursor.fetchone()
+        return result is not None and result[0] == content_hash
+    
+    def load_era_file(self, file_path: Path, era_id: int) -> EraLoadResult:
+        """Parse and apply an era file, loading only the books whose content changed since the last run"""
+        
+        if file_path.stat().st_size == 0:
+            print(f"⚠️  Warning: {file_path.name} is empty, skipping...")
+            return EraLoadResult(0, 0, 0, True)
+        
+        file_hash = file_content_hash(file_path)
+        if self.is_unchanged(file_path, file_hash):
+            return EraLoadResult(0, 0, 0, True)
+        
+        return self.apply_era_file(parse_era_file(file_path, file_hash), era_id)
+    
+    # In-memory state a failed era file must not leave changed: caches of rows it inserted,
+    # its buffered rows and its record of what changed
+    FILE_STATE = (
+        "series_cache", "issue_cache", "sub_era_cache", "next_issue_id",
+        "loaded_books", "removed_books", "removed_event_ids", "changed_eras", "touched_sub_eras",
+        "issue_rows", "date_rows", "link_rows", "ledger_rows", "event_rows", "relation_rows",
+    )
+    
+    def apply_era_file_atomically(self, parsed: ParsedEraFile, era_id: int) -> EraLoadResult:
+        """apply_era_file in a savepoint, so a file that fails leaves nothing behind
+        
+        On failure its writes are rolled back, the loader's caches and buffers are
+        restored to before the file, and the exception is re-raised.
+        """
+        # Earlier files' buffered rows are written first, so only this file's are at stake
+        self.flush()
+        snapshot = {name: copy.copy(getattr(self, name)) for name in self.FILE_STATE}
+        
+        # Inside the caller's transaction, so releasing the savepoint doesn't commit
+        if not self.cursor.connection.in_transaction:
+            self.cursor.execute("BEGIN")
+        self.cursor.execute("SAVEPOINT era_file")
+        try:
+            result = self.apply_era_file(parsed, era_id)
+            self.flush()
+        except Exception:
+            self.cursor.execute("ROLLBACK TO era_file")
+            self.cursor.execute("RELEASE era_file")
+            for name, value in snapshot.items():
+                setattr(self, name, value)
+            raise
+        self.cursor.execute("RELEASE era_file")
+        return result
+    
+    def apply_era_file(self, parsed: ParsedEraFile, era_id: int) -> EraLoadResult:
+        """Write a parsed era file, loading only the books whose hash differs from the ledger"""
+        
+        self.cursor.execute("SELECT title, book_id, content_hash FROM migration_books WHERE era_id = ?", (era_id,))
+        old_ledger = {title: (book_id, content_hash) for title, book_id, content_hash in self.cursor.fetchall()}
+        changed_titles = {
+            title for title, content_hash in parsed.book_hashes.items()
+            if self.force or old_ledger.get(title, (None, None))[1] != content_hash
+        }
+        
+        book_count = link_count = 0
+        sub_era_order: Dict[str, int] = {}
+        
+        for raw_sub_era, entry_title, record, parent_title, relation in parsed.entries:
+            display_order = sub_era_order.setdefault(raw_sub_era, len(sub_era_order) + 1)
+            if parent_title is not None and (parent_title in changed_titles or entry_title in changed_titles):
+                self.relation_rows.append((relation, era_id, parent_title, entry_title))
+            if record is None or entry_title not in changed_titles:
+                continue
+            
+            sub_era_id = self.get_or_create_sub_era(era_id, raw_sub_era, display_order)
+            
+            for issue_str in record["unparsed"]:
+                print(f"  ⚠️  Unrecognized issue '{issue_str}' in '{entry_title}'")
+            
+            book_id = self.load_book(era_id, sub_era_id, record)
+            self.ledger_rows.append((book_id, era_id, entry_title, parsed.book_hashes[entry_title]))
+            book_count += 1
+            link_count += len(record["issues"])
+        
+        # Books no longer listed in the file are removed with everything that references them
+        removed_ids = [book_id for title, (book_id, _) in old_ledger.items() if title not in parsed.book_hashes]
+        self.delete_books(removed_ids)
+        
+        self.cursor.execute('''
+            INSERT INTO migration_files (file_name, era_id, content_hash, applied_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (file_name) DO UPDATE SET
+                era_id = excluded.era_id,
+                content_hash = excluded.content_hash,
+                applied_at = excluded.applied_at
+        ''', (parsed.file_name, era_id, parsed.content_hash))
+        
+        if book_count or removed_ids:
+            self.changed_eras.add(era_id)
+        
+        return EraLoadResult(book_count, link_count, len(removed_ids), False)
+    
+    def delete_books(self, book_ids: Iterable[int]):
+        """Delete books along with their links, events, relations, overlaps and ledger rows"""
+        rows = [(book_id,) for book_id in book_ids]
+        if not rows:
+            return
+        
+        self.removed_books.update(book_id for (book_id,) in rows)
+        for (book_id,) in rows:
+            self.cursor.execute("SELECT id FROM notable_events WHERE book_id = ?", (book_id,))
+            self.removed_event_ids.extend(event_id for (event_id,) in self.cursor.fetchall())
+        
+        for table, column in (
+            ("book_issues", "book_id"),
+            ("notable_events", "book_id"),
+            ("book_relations", "book_id"),
+            ("book_relations", "related_book_id"),
+            ("book_issue_bitsets", "book_id"),
+            ("book_overlaps", "book_id"),
+            ("book_overlaps", "other_book_id"),
+            ("migration_books", "book_id"),
+            ("books", "id"),
+        ):
+            self.cursor.executemany(f"DELETE FROM {table} WHERE {column} = ?", rows)
+    
+    def flush(self):
+        """Write all buffered rows, issues first so links never reference a missing issue"""
+        
+        if self.issue_rows:
+            self.cursor.executemany('''
+                INSERT INTO comic_issues (id, series_id, issue_number, canonical_key, publication_date)
+                VALUES (?, ?, ?, ?, ?)
+            ''', self.issue_rows)
+            self.issue_rows.clear()
+        
+        if self.date_rows:
+            self.cursor.executemany('''
+                UPDATE comic_issues SET publication_date = ?
+                WHERE id = ? AND publication_date IS NULL
+            ''', self.date_rows)
+            self.date_rows.clear()
+        
+        if self.link_rows:
+            self.cursor.executemany('''
+                INSERT INTO book_issues (book_id, issue_id, position)
+                VALUES (?, ?, ?)
+                ON CONFLICT (book_id, issue_id) DO UPDATE SET position = excluded.position
+            ''', self.link_rows)
+            self.link_rows.clear()
+        
+        if self.ledger_rows:
+            self.cursor.executemany('''
+                INSERT INTO migration_books (book_id, era_id, title, content_hash)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (book_id) DO UPDATE SET content_hash = excluded.content_hash
+            ''', self.ledger_rows)
+            self.ledger_rows.clear()
+        
+        if self.event_rows:
+            self.cursor.executemany('''
+                INSERT INTO notable_events (book_id, issue_id, description)
+                VALUES (?, ?, ?)
+                ON CONFLICT (book_id, issue_id) DO UPDATE SET description = excluded.description
+            ''', self.event_rows)
+            self.event_rows.clear()
+    
+    def finish(self):
+        """Flush remaining rows, resolve book relations and fit sub-era years to their books
+        
+        Updates the search index for loaded books and new issues, and bumps the data
+        version when any era changed.
+        """
+        
+        self.flush()
+        
+        # Relations are resolved by title once every book in the era exists
+        self.cursor.executemany('''
+            INSERT OR IGNORE INTO book_relations (book_id, related_book_id, relation)
+            SELECT parent.id, related.id, ?
+            FROM books parent
+            JOIN books related ON related.era_id = parent.era_id
+            WHERE parent.era_id = ? AND parent.title = ? AND related.title = ?
+        ''', self.relation_rows)
+        self.relation_rows.clear()
+        
+        self.cursor.executemany('''
+            UPDATE sub_eras SET
+                start_year = COALESCE((SELECT MIN(earliest_publish_year) FROM books WHERE sub_era_id = sub_eras.id), start_year),
+                end_year = COALESCE((SELECT MAX(latest_publish_year) FROM books WHERE sub_era_id = sub_eras.id), end_year)
+            WHERE id = ?
+        ''', [(sub_era_id,) for sub_era_id in self.touched_sub_eras])
+        self.touched_sub_eras.clear()
+        
+        update_search_index(self.cursor, self.loaded_books, self.removed_books,
+                            self.removed_event_ids, self.first_new_issue_id)
+        self.removed_books.clear()
+        self.removed_event_ids.clear()
+        self.first_new_issue_id = self.next_issue_id
+        
+        if self.changed_eras:
+            bump_data_version(self.cursor)
+
+def migrate_all_json_data(database_path: Path = DATABASE_PATH, force: bool = False, workers: Optional[int] = None):
+    """Migrate changed JSON files to database (all files when force is set)
+    
+    Runs in stages: hash every file against the ledger, parse the changed files in a
+    process pool, then write them from this process in one transaction.
+    """
     
     print("Comics Timeline Data Migration")
     print("=" * 40)
     
-    conn = connect_database()
+    conn = connect_database(database_path)
     cursor = conn.cursor()
     
     try:
+        # Apply changes made to existing tables since the database was set up
+        upgrade_schema(cursor)
+        
         # Get DC Comics publisher ID
         cursor.execute("SELECT id FROM publishers WHERE name = 'DC Comics'")
         result = cursor.fetchone()
@@ -213,9 +723,16 @@ def migrate_all_json_data():
         # Create era lookup
         era_lookup = {title: era_id for era_id, title in eras}
         
-        # Process each JSON file
+        loader = TimelineLoader(cursor, dc_id, force=force)
+        
+        timings: Dict[str, float] = {}
+        
+        # Stage 1: hash each JSON file and skip the ones the ledger already holds
+        stage_start = time.perf_counter()
         total_files = 0
         processed_files = 0
+        pending: Dict[Path, int] = {}
+        file_hashes: Dict[Path, str] = {}
         
         for filename, era_title in file_era_mapping.items():
             file_path = Path(__file__).parent / filename
@@ -230,12 +747,76 @@ def migrate_all_json_data():
                 print(f"⚠️  Warning: Era '{era_title}' not found for {filename}, skipping...")
                 continue
             
-            era_id = era_lookup[era_title]
-            process_json_file(file_path, era_id, dc_id, cursor)
+            if file_path.stat().st_size == 0:
+                print(f"⚠️  Warning: {filename} is empty, skipping...")
+                processed_files += 1
+                continue
+            
+            content_hash = file_content_hash(file_path)
+            if loader.is_unchanged(file_path, content_hash):
+                print(f"✓ {filename} unchanged, skipped")
+                processed_files += 1
+                continue
+            
+            pending[file_path] = era_lookup[era_title]
+            file_hashes[file_path] = content_hash
+        timings["hash"] = time.perf_counter() - stage_start
+        
+        # Stage 2: parse and normalize the changed files in parallel
+        stage_start = time.perf_counter()
+        parsed_files = parse_era_files(file_hashes, workers)
+        timings["parse"] = time.perf_counter() - stage_start
+        
+        # Stage 3: a single writer applies the parsed files in era order
+        stage_start = time.perf_counter()
+        for file_path, era_id in pending.items():
+            parsed = parsed_files[file_path]
+            print(f"Processing {file_path.name}...")
+            try:
+                if isinstance(parsed, Exception):
+                    raise parsed
+                result = loader.apply_era_file_atomically(parsed, era_id)
+            except Exception as e:
+                print(f"  ✗ Error processing {file_path.name}, none of it was applied: {e}")
+                continue
+            print(f"  ✓ Applied {result.books_loaded} changed books ({result.links_loaded} book issues), "
+                  f"removed {result.books_removed} (parsed in {parsed.parse_seconds * 1000:.1f} ms)")
             processed_files += 1
         
+        loader.finish()
+        timings["write"] = time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        if loader.changed_eras:
+            overlap_count = compute_book_overlaps(cursor, loader.changed_eras)
+            print(f"✓ Recomputed {overlap_count} book overlaps")
+        timings["overlaps"] = time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        price_count = load_current_prices(cursor)
+        if price_count:
+            bump_data_version(cursor)
+        print(f"✓ Updated {price_count} current book prices")
+        timings["prices"] = time.perf_counter() - stage_start
+        
+        # Price changes can touch any era, so they refresh every summary
+        stage_start = time.perf_counter()
+        if price_count or loader.changed_eras:
+            summary_count = refresh_era_summaries(cursor, None if price_count else loader.changed_eras)
+            print(f"✓ Refreshed {summary_count} era summaries")
+        if loader.changed_eras:
+            event_count = refresh_timeline_events(cursor, loader.changed_eras)
+            print(f"✓ Refreshed {event_count} timeline events")
+        timings["summaries"] = time.perf_counter() - stage_start
+        
         # Commit all changes
+        stage_start = time.perf_counter()
         conn.commit()
+        timings["commit"] = time.perf_counter() - stage_start
+        
+        print("\nStage timings:")
+        for stage, seconds in timings.items():
+            print(f"  {stage:<9} {seconds * 1000:8.1f} ms")
         
         print(f"\n✓ Migration completed!")
         print(f"✓ Processed {processed_files} of {total_files} JSON files")
@@ -247,8 +828,12 @@ def migrate_all_json_data():
         cursor.execute("SELECT COUNT(*) FROM comic_issues")
         issues_count = cursor.fetchone()[0]
         
+        cursor.execute("SELECT COUNT(*) FROM books")
+        books_count = cursor.fetchone()[0]
+        
         print(f"✓ Total series in database: {series_count}")
         print(f"✓ Total issues in database: {issues_count}")
+        print(f"✓ Total books in database: {books_count}")
         
         return True
         
@@ -311,4 +896,7 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--inspect":
         inspect_json_structure()
     else:
-        migrate_all_json_data()
+        workers = None
+        if "--workers" in sys.argv[1:]:
+            workers = int(sys.argv[sys.argv.index("--workers") + 1])
+        migrate_all_json_data(force="--full" in sys.argv[1:], workers=workers)
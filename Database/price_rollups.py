@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Price History Rollup Job for Comics Timeline
+
+Scrapers append one price_tracking row per issue, condition, source and
+day, so the table grows without bound. This job compacts old history
+under a retention policy:
+- daily rows are kept for DAILY_RETENTION_DAYS
+- older daily rows are merged into weekly min/max/avg rows in price_rollups
+- weekly rows older than WEEKLY_RETENTION_DAYS are merged into monthly rows
+
+Merges are additive (min of mins, max of maxes, sample-weighted averages),
+so the job can run daily and never double counts.
+"""
+
+import argparse
+import sqlite3
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from timeline_db import connect
+
+# Database configuration
+DATABASE_NAME = "comics_timeline.db"
+DATABASE_PATH = Path(__file__).parent / DATABASE_NAME
+
+# Retention policy
+DAILY_RETENTION_DAYS = 90
+WEEKLY_RETENTION_DAYS = 730
+
+# Period start of a date: Monday of its week, or the first of its month
+PERIOD_START_SQL = {
+    "week": "date({column}, 'weekday 0', '-6 days')",
+    "month": "date({column}, 'start of month')",
+}
+
+# Averages are multiplied by 1.0 since NUMERIC columns store whole-number averages as integers
+MERGE_ROLLUP_SQL = '''
+    INSERT INTO price_rollups (
+        issue_id, period, period_start, condition, source, min_price, max_price, avg_price, sample_count
+    )
+    {select}
+    ON CONFLICT (issue_id, period, period_start, condition, source) DO UPDATE SET
+        min_price = MIN(min_price, excluded.min_price),
+        max_price = MAX(max_price, excluded.max_price),
+        avg_price = (avg_price * sample_count + excluded.avg_price * excluded.sample_count) * 1.0
+                    / (sample_count + excluded.sample_count),
+        sample_count = sample_count + excluded.sample_count
+'''
+
+def roll_up_daily_rows(cursor: sqlite3.Cursor, cutoff: str) -> int:
+    """Merge daily price rows older than cutoff into weekly rollups and delete them"""
+    week_start = PERIOD_START_SQL["week"].format(column="tracked_date")
+    cursor.execute(MERGE_ROLLUP_SQL.format(select=f'''
+        SELECT issue_id, 'week', {week_start}, condition, COALESCE(source, ''),
+               MIN(price), MAX(price), AVG(price), COUNT(*)
+        FROM price_tracking
+        WHERE tracked_date < ?
+        GROUP BY issue_id, {week_start}, condition, COALESCE(source, '')
+    '''), (cutoff,))
+    cursor.execute("DELETE FROM price_tracking WHERE tracked_date < ?", (cutoff,))
+    return cursor.rowcount
+
+def roll_up_weekly_rows(cursor: sqlite3.Cursor, cutoff: str) -> int:
+    """Merge weekly rollups that start before cutoff into monthly rollups and delete them"""
+    month_start = PERIOD_START_SQL["month"].format(column="period_start")
+    cursor.execute(MERGE_ROLLUP_SQL.format(select=f'''
+        SELECT issue_id, 'month', {month_start}, condition, source,
+               MIN(min_price), MAX(max_price), SUM(avg_price * sample_count) * 1.0 / SUM(sample_count), SUM(sample_count)
+        FROM price_rollups
+        WHERE period = 'week' AND period_start < ?
+        GROUP BY issue_id, {month_start}, condition, source
+    '''), (cutoff,))
+    cursor.execute("DELETE FROM price_rollups WHERE period = 'week' AND period_start < ?", (cutoff,))
+    return cursor.rowcount
+
+def run_rollups(cursor: sqlite3.Cursor, today: Optional[date] = None,
+                daily_days: int = DAILY_RETENTION_DAYS, weekly_days: int = WEEKLY_RETENTION_DAYS) -> Dict[str, int]:
+    """Apply the retention policy, returning how many daily and weekly rows were compacted"""
+    today = today or date.today()
+    daily_cutoff = (today - timedelta(days=daily_days)).isoformat()
+    weekly_cutoff = (today - timedelta(days=weekly_days)).isoformat()
+
+    return {
+        "daily": roll_up_daily_rows(cursor, daily_cutoff),
+        "weekly": roll_up_weekly_rows(cursor, weekly_cutoff),
+    }
+
+def price_history(cursor: sqlite3.Cursor, issue_id: int, condition: Optional[str] = None,
+                  start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Price points for an issue, oldest first, at the finest resolution still kept
+
+    Daily rows come from price_tracking through its (issue_id, tracked_date, ...) covering
+    index; weekly and monthly rows come from price_rollups, clustered by issue.
+    """
+    start = start or "0000-01-01"
+    end = end or "9999-12-31"
+    condition_sql = "" if condition is None else "AND condition = ?"
+    condition_params = () if condition is None else (condition,)
+
+    cursor.execute(f'''
+        SELECT period_start, period, condition, source, min_price, max_price, avg_price, sample_count
+        FROM price_rollups
+        WHERE issue_id = ? AND period_start BETWEEN ? AND ? {condition_sql}
+        UNION ALL
+        SELECT tracked_date, 'day', condition, COALESCE(source, ''), MIN(price), MAX(price), AVG(price), COUNT(*)
+        FROM price_tracking
+        WHERE issue_id = ? AND tracked_date BETWEEN ? AND ? {condition_sql}
+        GROUP BY tracked_date, condition, COALESCE(source, '')
+        ORDER BY 1
+    ''', (issue_id, start, end, *condition_params, issue_id, start, end, *condition_params))
+
+    return [
+        {"date": period_start, "period": period, "condition": condition_name, "source": source or None,
+         "min_price": min_price, "max_price": max_price, "avg_price": round(avg_price, 2), "samples": samples}
+        for period_start, period, condition_name, source, min_price, max_price, avg_price, samples
+        in cursor.fetchall()
+    ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact old price history into weekly and monthly rollups")
+    parser.add_argument('--daily-days', type=int, default=DAILY_RETENTION_DAYS,
+                        help="Days of daily price rows to keep")
+    parser.add_argument('--weekly-days', type=int, default=WEEKLY_RETENTION_DAYS,
+                        help="Days of weekly rollups to keep before merging them into months")
+    args = parser.parse_args()
+
+    if not DATABASE_PATH.exists():
+        print(f"✗ Database {DATABASE_NAME} not found!")
+        print("Please run setup_timeline_database.py first.")
+        sys.exit(1)
+
+    conn = connect(DATABASE_PATH)
+    try:
+        compacted = run_rollups(conn.cursor(), daily_days=args.daily_days, weekly_days=args.weekly_days)
+        conn.commit()
+        print(f"✓ Rolled {compacted['daily']} daily price rows into weeks")
+        print(f"✓ Rolled {compacted['weekly']} weekly price rows into months")
+    finally:
+        conn.close()
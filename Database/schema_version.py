@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Schema Versioning for Comics Timeline
+
+The schema version is kept in SQLite's user_version header field. Tables are
+created with CREATE TABLE IF NOT EXISTS, which never changes a table that
+is already there, so changes to existing tables are made here instead: each
+version above 1 has an upgrade step that brings the previous version up to it.
+
+Databases built before versioning report version 0. Those that already have
+the canonical issue columns are the version 1 schema. Older ones come from
+the original schema, whose eras and issues tables can't be altered into
+shape, and have to be rebuilt.
+"""
+
+import sqlite3
+from typing import Callable, Dict
+
+SCHEMA_VERSION = 2
+
+class SchemaVersionError(RuntimeError):
+    """The database's schema can't be upgraded in place"""
+
+def table_columns(cursor: sqlite3.Cursor, table: str) -> set:
+    return {row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+
+def add_bitset_base(cursor: sqlite3.Cursor):
+    """Version 2: book bitsets are stored offset by the book's lowest dense ID"""
+    columns = table_columns(cursor, "book_issue_bitsets")
+    if columns and "base_dense_id" not in columns:
+        # Blobs written before this are unshifted, which is what a base of 0 means
+        cursor.execute("ALTER TABLE book_issue_bitsets ADD COLUMN base_dense_id INTEGER NOT NULL DEFAULT 0")
+
+# version -> step bringing a database at version - 1 up to it
+UPGRADES: Dict[int, Callable[[sqlite3.Cursor], None]] = {
+    2: add_bitset_base,
+}
+
+def get_schema_version(cursor: sqlite3.Cursor) -> int:
+    return cursor.execute("PRAGMA user_version").fetchone()[0]
+
+def set_schema_version(cursor: sqlite3.Cursor, version: int = SCHEMA_VERSION):
+    cursor.execute(f"PRAGMA user_version = {int(version)}")
+
+def upgrade_schema(cursor: sqlite3.Cursor) -> int:
+    """Bring an existing database up to SCHEMA_VERSION, returning the version it was at
+
+    An empty database is left alone (version 0) for create_timeline_tables to fill in.
+    """
+    version = get_schema_version(cursor)
+    if version > SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Database schema version {version} is newer than this code's {SCHEMA_VERSION}; update the code"
+        )
+
+    found = version
+    if version == 0:
+        columns = table_columns(cursor, "comic_issues")
+        if not columns:
+            return 0
+        if not {"canonical_key", "dense_id"} <= columns:
+            raise SchemaVersionError(
+                "Database was created by the original schema (no canonical issue keys), which can't be "
+                "upgraded in place; run setup_timeline_database.py --rebuild (this drops its price history)"
+            )
+        version = found = 1  # Built from the version 1 schema before it was recorded
+
+    for next_version in range(version + 1, SCHEMA_VERSION + 1):
+        UPGRADES[next_version](cursor)
+    set_schema_version(cursor)
+    return found
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Full-Text Search Index for Comics Timeline
+
+Book titles (with their earliest/latest issue names), issue strings and
+notable event descriptions are indexed in one FTS5 table, search_index.
+The migration updates it for the books and issues it loads; run this script
+to rebuild it from scratch.
+
+Each document's rowid encodes its source row (source id * 4 + kind), so
+updates and deletes go through the rowid index.
+"""
+
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from timeline_db import connect
+
+# Database configuration
+DATABASE_NAME = "comics_timeline.db"
+DATABASE_PATH = Path(__file__).parent / DATABASE_NAME
+
+# Document kinds and the rowid offset each one uses
+SEARCH_KINDS = {"book": 1, "issue": 2, "event": 3}
+
+# Document text of each kind, selected from its source table
+BOOK_DOCUMENT_SQL = f'''
+    SELECT id * 4 + {SEARCH_KINDS["book"]}, title,
+           TRIM(COALESCE(earliest_issue_name, '') || ' ' || COALESCE(latest_issue_name, '')),
+           'book', id, NULL
+    FROM books
+'''
+
+ISSUE_DOCUMENT_SQL = f'''
+    SELECT i.id * 4 + {SEARCH_KINDS["issue"]},
+           s.title || ' (' || COALESCE(s.start_year, '?') || ') #' || i.issue_number,
+           '', 'issue', NULL, i.id
+    FROM comic_issues i JOIN comic_series s ON s.id = i.series_id
+'''
+
+EVENT_DOCUMENT_SQL = f'''
+    SELECT e.id * 4 + {SEARCH_KINDS["event"]},
+           s.title || ' (' || COALESCE(s.start_year, '?') || ') #' || i.issue_number,
+           e.description, 'event', e.book_id, e.issue_id
+    FROM notable_events e
+    JOIN comic_issues i ON i.id = e.issue_id
+    JOIN comic_series s ON s.id = i.series_id
+'''
+
+INSERT_DOCUMENT_SQL = "INSERT INTO search_index (rowid, title, body, kind, book_id, issue_id)"
+
+def create_search_index(cursor: sqlite3.Cursor):
+    """Create the FTS5 table, backfilling it from any rows already loaded"""
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_index'")
+    exists = cursor.fetchone() is not None
+
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            title,
+            body,
+            kind UNINDEXED,
+            book_id UNINDEXED,
+            issue_id UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+
+    if not exists:
+        rebuild_search_index(cursor)
+
+def rebuild_search_index(cursor: sqlite3.Cursor) -> int:
+    """Re-index every book, issue and notable event, returning the number of documents"""
+
+    cursor.execute("DELETE FROM search_index")
+    for document_sql in (BOOK_DOCUMENT_SQL, ISSUE_DOCUMENT_SQL, EVENT_DOCUMENT_SQL):
+        cursor.execute(f"{INSERT_DOCUMENT_SQL} {document_sql}")
+    cursor.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+    cursor.execute("SELECT COUNT(*) FROM search_index")
+    return cursor.fetchone()[0]
+
+def update_search_index(cursor: sqlite3.Cursor, book_ids: Iterable[int], removed_book_ids: Iterable[int],
+                        removed_event_ids: Iterable[int], first_new_issue_id: int):
+    """Bring the index up to date after a migration
+    
+    book_ids are books that were (re)loaded, whose book and event documents are
+    rewritten; removed ids are dropped; issues from first_new_issue_id on are added.
+    Issue documents never change, since an issue's display string is its identity.
+    """
+    book_rows = [(book_id,) for book_id in book_ids]
+    cursor.executemany("DELETE FROM search_index WHERE rowid = ?",
+                       [(book_id * 4 + SEARCH_KINDS["book"],) for book_id in removed_book_ids] +
+                       [(book_id * 4 + SEARCH_KINDS["book"],) for (book_id,) in book_rows] +
+                       [(event_id * 4 + SEARCH_KINDS["event"],) for event_id in removed_event_ids])
+    
+    cursor.executemany(f'''
+        DELETE FROM search_index
+        WHERE rowid IN (SELECT id * 4 + {SEARCH_KINDS["event"]} FROM notable_events WHERE book_id = ?)
+    ''', book_rows)
+    
+    cursor.executemany(f"{INSERT_DOCUMENT_SQL} {BOOK_DOCUMENT_SQL} WHERE id = ?", book_rows)
+    cursor.executemany(f"{INSERT_DOCUMENT_SQL} {EVENT_DOCUMENT_SQL} WHERE e.book_id = ?", book_rows)
+    cursor.execute(f"{INSERT_DOCUMENT_SQL} {ISSUE_DOCUMENT_SQL} WHERE i.id >= ?", (first_new_issue_id,))
+
+def build_match_query(text: str, prefix: bool = True) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression
+
+    Every word is quoted so FTS5 operators in user input are treated as text, and
+    the last word becomes a prefix query so results show up while typing.
+    """
+    words = re.findall(r"\w+", text, flags=re.UNICODE)
+    if not words:
+        return None
+    terms: List[str] = [f'"{word}"' for word in words]
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+if __name__ == "__main__":
+    if not DATABASE_PATH.exists():
+        print(f"✗ Database {DATABASE_NAME} not found!")
+        print("Please run setup_timeline_database.py first.")
+        sys.exit(1)
+
+    conn = connect(DATABASE_PATH)
+    try:
+        create_search_index(conn.cursor())
+        document_count = rebuild_search_index(conn.cursor())
+        conn.commit()
+        print(f"✓ Indexed {document_count} search documents")
+    finally:
+        conn.close()
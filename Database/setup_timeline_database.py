@@ -19,12 +19,23 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any
 
+from migrate_json_data import TimelineLoader, bump_data_version, file_content_hash, parse_era_files
+from book_overlaps import compute_book_overlaps
+from search_index import create_search_index
+from timeline_events import refresh_timeline_events
+from timeline_summaries import refresh_era_summaries
+from timeline_db import connect, remove_database_files
+from schema_version import set_schema_version, upgrade_schema
+
 # Database configuration
 DATABASE_NAME = "comics_timeline.db"
 DATABASE_PATH = Path(__file__).parent / DATABASE_NAME
 
 def create_timeline_tables(cursor: sqlite3.Cursor):
-    """Create tables for timeline data"""
+    """Create tables for timeline data, upgrading the ones an existing database already has"""
+    
+    # Raises SchemaVersionError for a database that needs --rebuild
+    upgrade_schema(cursor)
     
     # Publishers table
     cursor.execute('''
@@ -49,7 +60,8 @@ def create_timeline_tables(cursor: sqlite3.Cursor):
             description TEXT,
             display_order INTEGER DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (publisher_id) REFERENCES publishers (id)
+            FOREIGN KEY (publisher_id) REFERENCES publishers (id),
+            UNIQUE(publisher_id, title)
         )
     ''')
     
@@ -94,6 +106,8 @@ def create_timeline_tables(cursor: sqlite3.Cursor):
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             series_id INTEGER NOT NULL,
             issue_number TEXT NOT NULL, -- Can be "1", "1.5", "Annual 1", etc.
+            canonical_key TEXT UNIQUE, -- e.g. "action comics (1938) #1", used to dedupe issues across books
+            dense_id INTEGER UNIQUE, -- Stable 0-based index used for issue bitsets
             title TEXT,
             publication_date DATE,
             cover_price DECIMAL(10,2),
@@ -105,6 +119,97 @@ def create_timeline_tables(cursor: sqlite3.Cursor):
         )
     ''')
     
+    # Collected editions (books) from the era JSON files
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            era_id INTEGER NOT NULL,
+            sub_era_id INTEGER,
+            title TEXT NOT NULL,
+            book_type TEXT DEFAULT 'book', -- book, hypothetical
+            prh_url TEXT,
+            ist_url TEXT,
+            canon_year INTEGER,
+            elseworlds_earth TEXT,
+            elseworlds_coverage TEXT, -- full, partial
+            true_child BOOLEAN,
+            issue_count INTEGER DEFAULT 0,
+            current_price DECIMAL(10,2), -- Lowest current retail price, from the price scrapers
+            earliest_issue_name TEXT,
+            earliest_publish_year INTEGER,
+            earliest_publish_month INTEGER,
+            latest_issue_name TEXT,
+            latest_publish_year INTEGER,
+            latest_publish_month INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (era_id) REFERENCES eras (id),
+            FOREIGN KEY (sub_era_id) REFERENCES sub_eras (id),
+            UNIQUE(era_id, title)
+        )
+    ''')
+    
+    # Issues collected in each book
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS book_issues (
+            book_id INTEGER NOT NULL,
+            issue_id INTEGER NOT NULL,
+            position INTEGER NOT NULL, -- Order of the issue within the book
+            PRIMARY KEY (book_id, issue_id),
+            FOREIGN KEY (book_id) REFERENCES books (id),
+            FOREIGN KEY (issue_id) REFERENCES comic_issues (id)
+        )
+    ''')
+    
+    # EQUIVALENTS/CHILDREN relationships between books
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS book_relations (
+            book_id INTEGER NOT NULL,
+            related_book_id INTEGER NOT NULL,
+            relation TEXT NOT NULL, -- equivalent, child
+            PRIMARY KEY (book_id, related_book_id, relation),
+            FOREIGN KEY (book_id) REFERENCES books (id),
+            FOREIGN KEY (related_book_id) REFERENCES books (id)
+        )
+    ''')
+    
+    # Notable events called out per issue in each book
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notable_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            issue_id INTEGER NOT NULL,
+            description TEXT NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id),
+            FOREIGN KEY (issue_id) REFERENCES comic_issues (id),
+            UNIQUE(book_id, issue_id)
+        )
+    ''')
+    
+    # Each book's issues as a bitset over comic_issues.dense_id, stored from base_dense_id up
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS book_issue_bitsets (
+            book_id INTEGER PRIMARY KEY,
+            issue_count INTEGER NOT NULL,
+            base_dense_id INTEGER NOT NULL DEFAULT 0, -- Bit 0 of the blob is this dense ID
+            bitset BLOB NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    ''')
+    
+    # Top overlapping books for each book, precomputed from the bitsets
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS book_overlaps (
+            book_id INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            other_book_id INTEGER NOT NULL,
+            shared_count INTEGER NOT NULL,
+            jaccard REAL NOT NULL,
+            PRIMARY KEY (book_id, rank),
+            FOREIGN KEY (book_id) REFERENCES books (id),
+            FOREIGN KEY (other_book_id) REFERENCES books (id)
+        )
+    ''')
+    
     # Price tracking table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS price_tracking (
@@ -119,6 +224,151 @@ def create_timeline_tables(cursor: sqlite3.Cursor):
         )
     ''')
     
+    # Weekly/monthly price aggregates compacted from old price_tracking rows by price_rollups.py,
+    # clustered by issue and date so one issue's history is a single range scan
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_rollups (
+            issue_id INTEGER NOT NULL,
+            period_start DATE NOT NULL, -- Monday of the week or first of the month
+            period TEXT NOT NULL, -- week, month
+            condition TEXT NOT NULL,
+            source TEXT NOT NULL DEFAULT '',
+            min_price DECIMAL(10,2) NOT NULL,
+            max_price DECIMAL(10,2) NOT NULL,
+            avg_price DECIMAL(10,2) NOT NULL,
+            sample_count INTEGER NOT NULL,
+            PRIMARY KEY (issue_id, period_start, period, condition, source),
+            FOREIGN KEY (issue_id) REFERENCES comic_issues (id)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Migration ledger: content hash of each applied era file
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS migration_files (
+            file_name TEXT PRIMARY KEY,
+            era_id INTEGER NOT NULL,
+            content_hash TEXT NOT NULL, -- SHA-256 of the file bytes
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (era_id) REFERENCES eras (id)
+        )
+    ''')
+    
+    # Migration ledger: content hash of each loaded book entry
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS migration_books (
+            book_id INTEGER PRIMARY KEY,
+            era_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            content_hash TEXT NOT NULL, -- SHA-256 of the book entry and its sub-era
+            FOREIGN KEY (book_id) REFERENCES books (id),
+            UNIQUE(era_id, title)
+        )
+    ''')
+    
+    # Key/value metadata, e.g. the data version bumped by every migration that changes data
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS timeline_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    
+    # Precomputed per-era summaries, refreshed by the migration for the eras it changes
+    summary_columns = '''
+            book_count INTEGER NOT NULL DEFAULT 0,
+            issue_count INTEGER NOT NULL DEFAULT 0, -- Distinct issues collected by the books
+            series_count INTEGER NOT NULL DEFAULT 0,
+            earliest_year INTEGER,
+            latest_year INTEGER,
+            priced_book_count INTEGER NOT NULL DEFAULT 0,
+            min_price DECIMAL(10,2),
+            max_price DECIMAL(10,2),
+            avg_price DECIMAL(10,2),
+            total_price DECIMAL(10,2),
+            year_histogram TEXT, -- JSON {year: {"books": n, "issues": n}} by first issue year
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    '''
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS era_summaries (
+            era_id INTEGER PRIMARY KEY,
+            {summary_columns},
+            FOREIGN KEY (era_id) REFERENCES eras (id)
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS sub_era_summaries (
+            sub_era_id INTEGER PRIMARY KEY,
+            era_id INTEGER NOT NULL,
+            {summary_columns},
+            FOREIGN KEY (sub_era_id) REFERENCES sub_eras (id),
+            FOREIGN KEY (era_id) REFERENCES eras (id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS publisher_summaries (
+            publisher_id INTEGER PRIMARY KEY,
+            era_count INTEGER NOT NULL,
+            start_year INTEGER,
+            end_year INTEGER,
+            total_years INTEGER,
+            book_count INTEGER NOT NULL DEFAULT 0,
+            issue_count INTEGER NOT NULL DEFAULT 0, -- Sum of era issue counts
+            priced_book_count INTEGER NOT NULL DEFAULT 0,
+            total_price DECIMAL(10,2),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (publisher_id) REFERENCES publishers (id)
+        )
+    ''')
+    
+    # Accounts of the timeline app; AUTOINCREMENT so a deleted account's id is never handed out again
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            email TEXT,
+            is_active BOOLEAN NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Per-account issue lists (read, owned) as compressed bitsets over comic_issues.dense_id
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reading_progress (
+            account_id INTEGER NOT NULL,
+            list TEXT NOT NULL, -- read, owned
+            issue_count INTEGER NOT NULL,
+            bitmap BLOB NOT NULL, -- Roaring-style containers, see reading_progress.py in the backend
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (account_id, list),
+            FOREIGN KEY (account_id) REFERENCES accounts (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    
+    # Notable events and era ending events, flattened for the events endpoint
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS timeline_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            publisher_id INTEGER NOT NULL,
+            era_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL DEFAULT 0, -- 0 when only the year is known
+            event_type TEXT NOT NULL, -- notable, era_end
+            title TEXT NOT NULL,
+            detail TEXT, -- Book the event happens in, or the era it ends
+            book_id INTEGER,
+            issue_id INTEGER,
+            source_id INTEGER NOT NULL, -- notable_events.id or eras.id
+            FOREIGN KEY (publisher_id) REFERENCES publishers (id),
+            FOREIGN KEY (era_id) REFERENCES eras (id),
+            UNIQUE(event_type, source_id)
+        )
+    ''')
+    
+    # Full-text search over books, issues and notable events
+    create_search_index(cursor)
+    
+    set_schema_version(cursor)
     print("✓ Created all timeline database tables")
 
 def insert_publishers(cursor: sqlite3.Cursor):
@@ -137,8 +387,36 @@ def insert_publishers(cursor: sqlite3.Cursor):
     
     print("✓ Inserted default publishers")
 
+def insert_timeline_eras(cursor: sqlite3.Cursor):
+    """Insert eras that have no era JSON file yet, so the timeline covers them"""
+    eras = [
+        ("DC Comics", "Rebirth", "Doomsday Clock", 2016, 2018,
+         "Soft reboot bringing back classic elements to DC continuity", 7),
+        ("Marvel Comics", "Golden Age", "Creation of the Fantastic Four", 1939, 1956,
+         "Early Marvel Comics under Timely Publications", 1),
+        ("Marvel Comics", "The Marvel Age", "Secret Wars (1984)", 1961, 1984,
+         "Marvel renaissance under Stan Lee(but also Jack Kirby, Steve Ditko, etc.)", 2),
+        ("Marvel Comics", "Copper Age", "Onslaught", 1984, 1996,
+         "Marvel's response to the DC Crisis events, leading to a more interconnected universe", 3),
+        ("Marvel Comics", "Modern Age", "Secret Wars (2015)", 1996, 2015,
+         "Marvel's current era with multiple reboots and continuities", 4),
+        ("Marvel Comics", "All-New, All-Different Marvel", "Ongoing", 2015, 2025,
+         "Post-Secret Wars era with new directions for characters and teams", 5),
+    ]
+    
+    cursor.executemany('''
+        INSERT OR IGNORE INTO eras
+        (publisher_id, title, ending_event, start_year, end_year, description, display_order)
+        SELECT id, ?, ?, ?, ?, ?, ? FROM publishers WHERE name = ?
+    ''', [(title, ending_event, start_year, end_year, description, display_order, publisher)
+          for publisher, title, ending_event, start_year, end_year, description, display_order in eras])
+    if cursor.rowcount > 0:
+        bump_data_version(cursor)
+    
+    print("✓ Inserted timeline eras")
+
 def load_json_timeline_data(cursor: sqlite3.Cursor):
-    """Load timeline data from JSON files"""
+    """Load timeline data from JSON files, applying only what changed since the last load"""
     
     # Get DC Comics publisher ID
     cursor.execute("SELECT id FROM publishers WHERE name = 'DC Comics'")
@@ -196,6 +474,10 @@ def load_json_timeline_data(cursor: sqlite3.Cursor):
         }
     }
     
+    loader = TimelineLoader(cursor, dc_id)
+    pending = {}
+    file_hashes = {}
+    
     for filename, era_info in era_files.items():
         file_path = Path(__file__).parent / filename
         
@@ -226,20 +508,57 @@ def load_json_timeline_data(cursor: sqlite3.Cursor):
             ''', (dc_id, era_info["title"]))
             era_id = cursor.fetchone()[0]
             
-            # Load and process JSON data
-            with open(file_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-                
-            # Process the JSON data to extract comic information
-            # This will depend on the structure of your JSON files
-            # For now, we'll just log that we found the file
-            print(f"✓ Loaded era '{era_info['title']}' from {filename}")
+            if file_path.stat().st_size == 0:
+                print(f"⚠️  Warning: {filename} is empty, skipping...")
+                continue
+            
+            content_hash = file_content_hash(file_path)
+            if loader.is_unchanged(file_path, content_hash):
+                print(f"✓ Era '{era_info['title']}' unchanged in {filename}")
+                continue
+            
+            pending[file_path] = (era_id, era_info["title"])
+            file_hashes[file_path] = content_hash
             
         except Exception as e:
             print(f"✗ Error loading {filename}: {e}")
     
+    # Parse the changed era files in parallel, then write them from this process
+    parsed_files = parse_era_files(file_hashes)
+    
+    for file_path, (era_id, era_title) in pending.items():
+        try:
+            parsed = parsed_files[file_path]
+            if isinstance(parsed, Exception):
+                raise parsed
+            
+            # Load the changed books and issues in the era file
+            result = loader.apply_era_file_atomically(parsed, era_id)
+            print(f"✓ Loaded era '{era_title}' from {file_path.name} "
+                  f"({result.books_loaded} books, {result.links_loaded} book issues, "
+                  f"{result.books_removed} removed)")
+            
+        except Exception as e:
+            print(f"✗ Error loading {file_path.name}: {e}")
+    
+    loader.finish()
+    
+    if loader.changed_eras:
+        overlap_count = compute_book_overlaps(cursor, loader.changed_eras)
+        print(f"✓ Computed {overlap_count} book overlaps")
+
     print("✓ Loaded timeline data from JSON files")
 
+# Sort keys of the books listing, each with an expression index on (key, id) for keyset paging.
+# Queries must use these exact expressions for SQLite to match the indexes; books with no
+# year or price sort after every book that has one.
+BOOK_SORT_KEYS = {
+    "title": "title COLLATE NOCASE",
+    "year": "COALESCE(earliest_publish_year * 100 + COALESCE(earliest_publish_month, 0), 999999)",
+    "price": "COALESCE(current_price, 1e9)",
+    "issue_count": "issue_count",
+}
+
 def create_indexes(cursor: sqlite3.Cursor):
     """Create indexes for better query performance"""
     
@@ -250,17 +569,38 @@ def create_indexes(cursor: sqlite3.Cursor):
         "CREATE INDEX IF NOT EXISTS idx_comic_series_publisher ON comic_series(publisher_id)",
         "CREATE INDEX IF NOT EXISTS idx_comic_series_era ON comic_series(era_id)",
         "CREATE INDEX IF NOT EXISTS idx_comic_issues_series ON comic_issues(series_id)",
-        "CREATE INDEX IF NOT EXISTS idx_price_tracking_issue ON price_tracking(issue_id)",
+        "CREATE INDEX IF NOT EXISTS idx_books_era ON books(era_id, sub_era_id)",
+        "CREATE INDEX IF NOT EXISTS idx_books_year ON books(earliest_publish_year, latest_publish_year)",
+        "CREATE INDEX IF NOT EXISTS idx_books_price ON books(current_price)",
+        "CREATE INDEX IF NOT EXISTS idx_book_issues_issue ON book_issues(issue_id)",
+        "CREATE INDEX IF NOT EXISTS idx_book_relations_related ON book_relations(related_book_id)",
+        "CREATE INDEX IF NOT EXISTS idx_notable_events_issue ON notable_events(issue_id)",
+        # Events endpoint filters, each ending in its (year, month, id) sort and page key
+        "CREATE INDEX IF NOT EXISTS idx_timeline_events_year ON timeline_events(year, month, id)",
+        "CREATE INDEX IF NOT EXISTS idx_timeline_events_publisher ON timeline_events(publisher_id, year, month, id)",
+        "CREATE INDEX IF NOT EXISTS idx_timeline_events_era ON timeline_events(era_id, year, month, id)",
+        # Covers price history queries for an issue without touching the table
+        "DROP INDEX IF EXISTS idx_price_tracking_issue",
+        "CREATE INDEX IF NOT EXISTS idx_price_tracking_issue_date ON price_tracking(issue_id, tracked_date, condition, source, price)",
         "CREATE INDEX IF NOT EXISTS idx_price_tracking_date ON price_tracking(tracked_date)",
     ]
     
+    indexes.extend(
+        f"CREATE INDEX IF NOT EXISTS idx_books_sort_{name} ON books({sort_key}, id)"
+        for name, sort_key in BOOK_SORT_KEYS.items()
+    )
+    
     for index_sql in indexes:
         cursor.execute(index_sql)
     
     print("✓ Created database indexes")
 
-def setup_database():
-    """Main setup function"""
+def setup_database(rebuild: bool = False):
+    """Main setup function
+    
+    An existing database is updated in place from the migration ledger unless
+    rebuild is set, in which case it is deleted and created from scratch.
+    """
     
     print("Comics Timeline Database Setup")
     print("=" * 40)
@@ -268,30 +608,34 @@ def setup_database():
     print()
     
     # Check if database already exists
-    if DATABASE_PATH.exists():
+    if DATABASE_PATH.exists() and rebuild:
         response = input(f"Database {DATABASE_NAME} already exists. Recreate? (y/N): ")
         if response.lower() != 'y':
             print("Setup cancelled.")
             return False
         
         # Remove existing database
-        DATABASE_PATH.unlink()
+        remove_database_files(DATABASE_PATH)
         print("✓ Removed existing database")
     
     try:
         # Create database and tables
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = connect(DATABASE_PATH)
         cursor = conn.cursor()
         
-        # Enable foreign key constraints
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
         # Create all tables
         create_timeline_tables(cursor)
         
         # Insert initial data
         insert_publishers(cursor)
         load_json_timeline_data(cursor)
+        insert_timeline_eras(cursor)
+        
+        # Every era gets a summary row, including eras without books yet
+        summary_count = refresh_era_summaries(cursor)
+        print(f"✓ Refreshed {summary_count} era summaries")
+        event_count = refresh_timeline_events(cursor)
+        print(f"✓ Refreshed {event_count} timeline events")
         
         # Create indexes
         create_indexes(cursor)
@@ -300,7 +644,7 @@ def setup_database():
         conn.commit()
         
         print("\n✓ Database setup completed successfully!")
-        print(f"✓ Database created at: {DATABASE_PATH}")
+        print(f"✓ Database ready at: {DATABASE_PATH}")
         print("\nNext steps:")
         print("1. Update backend configuration to use this database")
         print("2. Run the backend server to test the connection")
@@ -317,4 +661,4 @@ def setup_database():
             conn.close()
 
 if __name__ == "__main__":
-    setup_database()
+    setup_database(rebuild="--rebuild" in sys.argv[1:])
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite Connection Layer for Comics Timeline
+
+Every script and service that touches comics_timeline.db opens it through
+this module, so they all run with the same settings:
+- WAL journal, so readers never block on a writer (and vice versa)
+- synchronous=NORMAL, which is durable enough in WAL mode
+- memory-mapped reads and a larger page cache
+- a busy timeout instead of failing immediately on a locked database
+- a larger prepared statement cache
+
+ConnectionPool hands out configured connections to request handlers and
+keeps a few idle ones around instead of reconnecting on every request.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+# Database configuration
+DATABASE_NAME = "comics_timeline.db"
+DATABASE_PATH = Path(__file__).parent / DATABASE_NAME
+
+# Connection tuning
+MMAP_SIZE = 256 * 1024 * 1024  # Bytes of the file mapped into memory for reads
+CACHE_SIZE_KB = 64 * 1024  # Page cache per connection
+BUSY_TIMEOUT_MS = 5000  # How long a statement waits on a lock before raising "database is locked"
+STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection
+
+# Idle connections kept by a pool between requests
+POOL_MAX_IDLE = 8
+
+def configure_connection(conn: sqlite3.Connection, read_only: bool = False) -> sqlite3.Connection:
+    """Apply the shared PRAGMA settings to a connection"""
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    if not read_only:
+        # The journal mode is stored in the database file, so only writers need to set it
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA foreign_keys = ON")
+    if read_only:
+        # Already enforced by mode=ro; kept for connections opened some other way
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+def connect(database_path: Path = DATABASE_PATH, read_only: bool = False,
+            row_factory=None, factory=sqlite3.Connection) -> sqlite3.Connection:
+    """Open a tuned connection to the timeline database
+
+    factory is the sqlite3.Connection subclass to open, e.g. one that times its queries.
+    Read-only connections are opened with mode=ro, so a missing database raises
+    sqlite3.OperationalError instead of being created empty.
+    """
+    if read_only:
+        database = f"{Path(database_path).resolve().as_uri()}?mode=ro"
+    else:
+        database = database_path
+    conn = sqlite3.connect(
+        database,
+        uri=read_only,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=factory,
+    )
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    return configure_connection(conn, read_only)
+
+class ConnectionPool:
+    """Small pool of tuned connections, each checked out by one thread at a time
+
+    Connections are returned to a LIFO stack, so a busy thread keeps reusing the
+    connection (and prepared statements) it just had. At most max_idle connections
+    are kept; extra ones are closed when they are released.
+    """
+
+    def __init__(self, database_path: Path = DATABASE_PATH, read_only: bool = False,
+                 row_factory=None, max_idle: int = POOL_MAX_IDLE, factory=sqlite3.Connection):
+        self.database_path = database_path
+        self.read_only = read_only
+        self.row_factory = row_factory
+        self.max_idle = max_idle
+        self.factory = factory
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out an idle connection, opening a new one if none are left"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return connect(self.database_path, self.read_only, self.row_factory, self.factory)
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, rolling back anything left uncommitted"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection for the duration of a with block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+def remove_database_files(database_path: Path = DATABASE_PATH):
+    """Delete a database along with its WAL and shared-memory files"""
+    for suffix in ("", "-wal", "-shm"):
+        path = database_path.with_name(database_path.name + suffix)
+        if path.exists():
+            path.unlink()
+
+if __name__ == "__main__":
+    conn = connect()
+    try:
+        for pragma in ("journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout", "foreign_keys"):
+            print(f"✓ {pragma:<14} {conn.execute(f'PRAGMA {pragma}').fetchone()[0]}")
+    finally:
+        conn.close()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Timeline Events Refresh Script for Comics Timeline
+
+Flattens the events shown on the timeline into one timeline_events table:
+every notable event of a book (dated by its issue, or by the book when
+the issue has no date) and every era's ending event. Rows carry their
+publisher, era and year, and the table's indexes are ordered by
+(year, month, id), so the events endpoint filters and pages through them
+with a single index range scan.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Iterable, Optional
+
+from timeline_db import connect
+
+# Database configuration
+DATABASE_NAME = "comics_timeline.db"
+DATABASE_PATH = Path(__file__).parent / DATABASE_NAME
+
+# Notable events of a book, dated by issue publication date, else the book's first issue, else the era start
+NOTABLE_EVENTS_SQL = '''
+    INSERT INTO timeline_events (
+        publisher_id, era_id, year, month, event_type, title, detail, book_id, issue_id, source_id
+    )
+    SELECT e.publisher_id, b.era_id,
+           COALESCE(CAST(substr(i.publication_date, 1, 4) AS INTEGER), b.earliest_publish_year, e.start_year),
+           CASE
+               WHEN i.publication_date IS NOT NULL THEN CAST(substr(i.publication_date, 6, 2) AS INTEGER)
+               WHEN b.earliest_publish_year IS NOT NULL THEN COALESCE(b.earliest_publish_month, 0)
+               ELSE 0
+           END,
+           'notable', ne.description, b.title, ne.book_id, ne.issue_id, ne.id
+    FROM notable_events ne
+    JOIN books b ON b.id = ne.book_id
+    JOIN eras e ON e.id = b.era_id
+    JOIN comic_issues i ON i.id = ne.issue_id
+    WHERE b.era_id = ?
+'''
+
+# The event that ends an era, placed at the era's last year
+ERA_END_EVENT_SQL = '''
+    INSERT INTO timeline_events (
+        publisher_id, era_id, year, month, event_type, title, detail, book_id, issue_id, source_id
+    )
+    SELECT publisher_id, id, end_year, 12, 'era_end', ending_event, 'End of ' || title, NULL, NULL, id
+    FROM eras
+    WHERE id = ? AND ending_event IS NOT NULL AND end_year IS NOT NULL
+'''
+
+def refresh_timeline_events(cursor: sqlite3.Cursor, era_ids: Optional[Iterable[int]] = None) -> int:
+    """Rebuild the timeline events of the given eras (all eras by default)
+
+    Returns the number of events written.
+    """
+    if era_ids is None:
+        cursor.execute("DELETE FROM timeline_events")
+        cursor.execute("SELECT id FROM eras")
+        era_ids = [era_id for (era_id,) in cursor.fetchall()]
+
+    event_count = 0
+    for era_id in era_ids:
+        cursor.execute("DELETE FROM timeline_events WHERE era_id = ?", (era_id,))
+        for insert_sql in (NOTABLE_EVENTS_SQL, ERA_END_EVENT_SQL):
+            cursor.execute(insert_sql, (era_id,))
+            event_count += cursor.rowcount
+
+    return event_count
+
+if __name__ == "__main__":
+    if not DATABASE_PATH.exists():
+        print(f"✗ Database {DATABASE_NAME} not found!")
+        print("Please run setup_timeline_database.py first.")
+        sys.exit(1)
+
+    conn = connect(DATABASE_PATH)
+    try:
+        event_count = refresh_timeline_events(conn.cursor())
+        conn.commit()
+        print(f"✓ Refreshed {event_count} timeline events")
+    finally:
+        conn.close()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Timeline Summary Precompute Script for Comics Timeline
+
+Keeps one summary row per publisher, era and sub-era: book, issue and
+series counts, publication year span, a publication-year histogram and
+current book price stats. The migration refreshes the summaries of the
+eras it changed, so summary endpoints read a single precomputed row
+instead of aggregating the timeline on every request.
+"""
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from timeline_db import connect
+
+# Database configuration
+DATABASE_NAME = "comics_timeline.db"
+DATABASE_PATH = Path(__file__).parent / DATABASE_NAME
+
+# Aggregates shared by era and sub-era summaries, over the books matched by {scope}
+SUMMARY_SQL = '''
+    SELECT
+        (SELECT COUNT(*) FROM books b WHERE {scope}),
+        (SELECT COUNT(DISTINCT bi.issue_id) FROM book_issues bi JOIN books b ON b.id = bi.book_id WHERE {scope}),
+        (SELECT COUNT(DISTINCT i.series_id) FROM book_issues bi
+            JOIN books b ON b.id = bi.book_id
+            JOIN comic_issues i ON i.id = bi.issue_id
+            WHERE {scope}),
+        (SELECT MIN(b.earliest_publish_year) FROM books b WHERE {scope}),
+        (SELECT MAX(COALESCE(b.latest_publish_year, b.earliest_publish_year)) FROM books b WHERE {scope}),
+        (SELECT COUNT(b.current_price) FROM books b WHERE {scope}),
+        (SELECT MIN(b.current_price) FROM books b WHERE {scope}),
+        (SELECT MAX(b.current_price) FROM books b WHERE {scope}),
+        (SELECT ROUND(AVG(b.current_price), 2) FROM books b WHERE {scope}),
+        (SELECT ROUND(SUM(b.current_price), 2) FROM books b WHERE {scope})
+'''
+SUMMARY_PARAM_COUNT = SUMMARY_SQL.count("{scope}")
+
+HISTOGRAM_SQL = '''
+    SELECT b.earliest_publish_year, COUNT(*), SUM(b.issue_count)
+    FROM books b
+    WHERE {scope} AND b.earliest_publish_year IS NOT NULL
+    GROUP BY b.earliest_publish_year
+    ORDER BY b.earliest_publish_year
+'''
+
+def year_histogram(cursor: sqlite3.Cursor, scope: str, scope_id: int) -> str:
+    """JSON {year: {"books": n, "issues": n}} keyed by the year each book's first issue came out"""
+    cursor.execute(HISTOGRAM_SQL.format(scope=scope), (scope_id,))
+    histogram: Dict[str, Dict[str, int]] = {
+        str(year): {"books": book_count, "issues": issue_count or 0}
+        for year, book_count, issue_count in cursor.fetchall()
+    }
+    return json.dumps(histogram)
+
+def refresh_era_summaries(cursor: sqlite3.Cursor, era_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute the summaries of the given eras (all eras by default), their sub-eras and publishers
+
+    Returns the number of era summaries written.
+    """
+    if era_ids is None:
+        cursor.execute("SELECT id FROM eras")
+        era_ids = [era_id for (era_id,) in cursor.fetchall()]
+    era_ids = list(era_ids)
+
+    era_scope = "b.era_id = ?"
+    sub_era_scope = "b.sub_era_id = ?"
+
+    for era_id in era_ids:
+        cursor.execute(SUMMARY_SQL.format(scope=era_scope), (era_id,) * SUMMARY_PARAM_COUNT)
+        stats = cursor.fetchone()
+        cursor.execute('''
+            INSERT OR REPLACE INTO era_summaries (
+                era_id, book_count, issue_count, series_count, earliest_year, latest_year,
+                priced_book_count, min_price, max_price, avg_price, total_price, year_histogram, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (era_id, *stats, year_histogram(cursor, era_scope, era_id)))
+
+        cursor.execute("DELETE FROM sub_era_summaries WHERE era_id = ?", (era_id,))
+        cursor.execute("SELECT id FROM sub_eras WHERE era_id = ?", (era_id,))
+        for (sub_era_id,) in cursor.fetchall():
+            cursor.execute(SUMMARY_SQL.format(scope=sub_era_scope), (sub_era_id,) * SUMMARY_PARAM_COUNT)
+            stats = cursor.fetchone()
+            cursor.execute('''
+                INSERT INTO sub_era_summaries (
+                    sub_era_id, era_id, book_count, issue_count, series_count, earliest_year, latest_year,
+                    priced_book_count, min_price, max_price, avg_price, total_price, year_histogram, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (sub_era_id, era_id, *stats, year_histogram(cursor, sub_era_scope, sub_era_id)))
+
+    # Publisher rows roll up their era rows, so they are cheap to rebuild in full
+    cursor.execute("DELETE FROM publisher_summaries")
+    cursor.execute('''
+        INSERT INTO publisher_summaries (
+            publisher_id, era_count, start_year, end_year, total_years,
+            book_count, issue_count, priced_book_count, total_price, updated_at
+        )
+        SELECT e.publisher_id, COUNT(*), MIN(e.start_year), MAX(e.end_year), MAX(e.end_year) - MIN(e.start_year),
+               COALESCE(SUM(s.book_count), 0), COALESCE(SUM(s.issue_count), 0),
+               COALESCE(SUM(s.priced_book_count), 0), ROUND(COALESCE(SUM(s.total_price), 0), 2), CURRENT_TIMESTAMP
+        FROM eras e
+        LEFT JOIN era_summaries s ON s.era_id = e.id
+        GROUP BY e.publisher_id
+    ''')
+
+    return len(era_ids)
+
+if __name__ == "__main__":
+    if not DATABASE_PATH.exists():
+        print(f"✗ Database {DATABASE_NAME} not found!")
+        print("Please run setup_timeline_database.py first.")
+        sys.exit(1)
+
+    conn = connect(DATABASE_PATH)
+    try:
+        summary_count = refresh_era_summaries(conn.cursor())
+        conn.commit()
+        print(f"✓ Refreshed {summary_count} era summaries")
+    finally:
+        conn.close()
@@ -1,6 +1,16 @@
 import { ApiClient } from './base'
 
+export interface BatchResult<T> {
+  results: (T | null)[]
+  missing: number[]
+}
+
 export class BooksClient extends ApiClient {
-  // Add specific book methods here as needed
-  // For now, just the basic structure
+  // Resolve every book card of a sub-timeline in one round trip, in the order given
+  async getBooksBatch<T = Record<string, unknown>>(ids: number[]): Promise<BatchResult<T>> {
+    return await this.request<BatchResult<T>>('/books/batch', {
+      method: 'POST',
+      body: JSON.stringify({ ids }),
+    })
+  }
 }